@@ -2,10 +2,17 @@ from .dict_to_float import dict_value_to_float
 from .dim_check_vector import dim_check_vector
 from .filter_input import filter_input_log
 from .filter_output import filter_output
+from .representative_subset import representative_subset
+from .run_in_chunks import chunk_slices, run_in_chunks
+from .unique_rows import unique_rows
 
 __all__ = [
     "dict_value_to_float",
     "dim_check_vector",
     "filter_input_log",
     "filter_output",
+    "representative_subset",
+    "chunk_slices",
+    "run_in_chunks",
+    "unique_rows",
 ]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from .unique_rows import unique_rows
+
+
+def representative_subset(arrays, subset_size):
+    """
+    Select a subset of samples that represents the space spanned by a set of arrays, e.g. porosity, mineral and fluid
+    properties of a log, for calibrations on a reduced number of samples.
+
+    The range of each column is divided into the same number of bins of equal width, and the number of bins is the
+    largest that gives at most subset_size occupied cells. One sample is selected from each occupied cell, the one
+    that is closest to the mean of the samples in the cell. Columns with a single value do not distinguish samples.
+
+    Parameters
+    ----------
+    arrays : list or tuple
+        Input arrays of equal length along the first axis. 2D arrays contribute one column per element along the
+        second axis. Scalars are ignored.
+    subset_size : int
+        Target number of samples in the subset.
+
+    Returns
+    -------
+    tuple
+        idx_subset, counts : (np.ndarray, np.ndarray). Sorted index of the selected samples, and the number of samples
+        in the cell of each selected sample.
+    """
+    columns = []
+    for arr in arrays:
+        arr = np.asarray(arr, dtype=float)
+        if arr.ndim == 0:
+            continue
+        columns.extend(arr.reshape(arr.shape[0], -1).T)
+    if not columns:
+        raise ValueError("representative_subset: at least one input array is required")
+    if subset_size < 1:
+        raise ValueError("representative_subset: subset_size must be at least 1")
+    n_samples = columns[0].shape[0]
+    if any(col.shape[0] != n_samples for col in columns):
+        raise ValueError("representative_subset: input arrays must have equal length")
+
+    # Scale the columns to the range 0 - 1, columns with a single value are left out
+    scaled = []
+    for col in columns:
+        col_range = np.ptp(col)
+        if col_range > 0:
+            scaled.append((col - col.min()) / col_range)
+    if not scaled or n_samples <= subset_size:
+        return np.arange(n_samples), np.ones(n_samples, dtype=int)
+    scaled = np.stack(scaled, axis=1)
+
+    def _cells(n_bins):
+        bins = np.minimum((scaled * n_bins).astype(np.int64), n_bins - 1)
+        return unique_rows([bins])[1]
+
+    # Largest number of bins that gives at most subset_size occupied cells
+    lower, upper = 1, subset_size + 1
+    cells = _cells(1)
+    while upper - lower > 1:
+        mid = (lower + upper) // 2
+        mid_cells = _cells(mid)
+        if mid_cells.max() < subset_size:
+            lower, cells = mid, mid_cells
+        else:
+            upper = mid
+
+    # Sample closest to the mean of each cell
+    counts = np.bincount(cells)
+    cell_mean = np.stack(
+        [np.bincount(cells, weights=col) / counts for col in scaled.T], axis=1
+    )
+    dist = np.sum((scaled - cell_mean[cells]) ** 2, axis=1)
+    order = np.lexsort((dist, cells))
+    first = np.r_[True, cells[order][1:] != cells[order][:-1]]
+    idx_subset = order[first]
+    sort_idx = np.argsort(idx_subset)
+    return idx_subset[sort_idx], counts[cells[idx_subset]][sort_idx]
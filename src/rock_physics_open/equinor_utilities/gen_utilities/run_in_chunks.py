@@ -0,0 +1,72 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import numpy as np
+
+
+def chunk_slices(n_samples, chunk_size):
+    """
+    Consecutive slices of at most chunk_size samples, covering n_samples.
+    """
+    chunk_size = max(int(chunk_size), 1)
+    return [
+        slice(start, min(start + chunk_size, n_samples))
+        for start in range(0, n_samples, chunk_size)
+    ]
+
+
+def run_in_chunks(
+    func, arrays, callback, chunk_size, n_workers=None, use_processes=False
+):
+    """
+    Evaluate func on consecutive chunks of the input arrays, optionally in a thread or process pool. Only the chunks
+    that are being evaluated are held in memory, so that inputs can be np.memmap arrays that are larger than memory.
+    The results are passed to callback in the calling thread as they are finished.
+
+    Parameters
+    ----------
+    func : callable
+        Function called as func(*chunks), where chunks are the input arrays sliced along the first axis. Must be
+        picklable if use_processes is True.
+    arrays : list or tuple
+        Input arrays of equal length along the first axis.
+    callback : callable
+        Called as callback(chunk_slice, result) for each chunk, in order of completion.
+    chunk_size : int
+        Number of samples per chunk.
+    n_workers : int or None
+        Number of parallel workers. None or 1 evaluates the chunks serially in the calling thread.
+    use_processes : bool
+        Use a process pool instead of a thread pool.
+    """
+    n_samples = len(arrays[0])
+    if any(len(arr) != n_samples for arr in arrays):
+        raise ValueError("run_in_chunks: input arrays must have equal length")
+    slices = chunk_slices(n_samples, chunk_size)
+
+    def _chunks(sl):
+        return [np.asarray(arr[sl]) for arr in arrays]
+
+    if n_workers is None or n_workers <= 1:
+        for sl in slices:
+            callback(sl, func(*_chunks(sl)))
+        return
+
+    pool_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_type(max_workers=n_workers) as pool:
+        # Limit the number of chunks in flight to bound peak memory
+        pending = {}
+        for sl in slices:
+            if len(pending) >= 2 * n_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    callback(pending.pop(future), future.result())
+            pending[pool.submit(func, *_chunks(sl))] = sl
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                callback(pending.pop(future), future.result())
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+def unique_rows(arrays):
+    """
+    Find the unique rows of a set of arrays, where a row consists of the values at the same index along the first
+    axis of all the arrays. This is used to evaluate models only once for repeated combinations of inputs, e.g. logs
+    with a few distinct mineral or fluid compositions: evaluate the model for arr[idx_unique] and scatter the results
+    back with result[idx_restore].
+
+    Each column is coded separately and the codes are combined, which is much faster than
+    np.unique(np.stack(arrays, axis=1), axis=0) for long logs.
+
+    Parameters
+    ----------
+    arrays : list or tuple
+        Input arrays of equal length along the first axis. 2D arrays contribute one column per element along the
+        second axis. Scalars do not distinguish rows and are ignored.
+
+    Returns
+    -------
+    tuple
+        idx_unique, idx_restore : (np.ndarray, np.ndarray). Index of the first occurrence of each unique row, and the
+        index of the unique row for each original row.
+    """
+    columns = []
+    for arr in arrays:
+        arr = np.asarray(arr)
+        if arr.ndim == 0:
+            continue
+        columns.extend(arr.reshape(arr.shape[0], -1).T)
+    if not columns:
+        raise ValueError("unique_rows: at least one input array is required")
+    n_samples = columns[0].shape[0]
+    if any(col.shape[0] != n_samples for col in columns):
+        raise ValueError("unique_rows: input arrays must have equal length")
+
+    key = np.zeros(n_samples, dtype=np.int64)
+    for col in columns:
+        _, code = np.unique(col, return_inverse=True)
+        # Recode the combined key after each column, so that it is always less than n_samples**2
+        _, key = np.unique(
+            key * (code.max(initial=0) + 1) + code.reshape(-1), return_inverse=True
+        )
+    _, idx_unique, idx_restore = np.unique(key, return_index=True, return_inverse=True)
+    return idx_unique, idx_restore.reshape(-1)
@@ -20,6 +20,7 @@ def friable_model_optimisation(
     file_out_str: str = "friable_model_optimal_params.pkl",
     display_results: bool = False,
     well_name: str = "Unknown well",
+    **opt_kwargs,
 ):
     """Patchy cement model with optimisation for a selection of parameters.
 
@@ -51,6 +52,10 @@ def friable_model_optimisation(
         D isplay optimal parameters in a window after run.
     well_name :
         Name of well to be displayed in info box title.
+    opt_kwargs :
+        Additional keywords to be passed to optimisation function, e.g. jac_workers for a parallel Jacobian,
+        subset_size and fit_report for a first optimisation on a subset of the samples, or n_starts and start_workers
+        for optimisations from several start points, see gen_opt_routine.
 
     Returns
     -------
@@ -89,7 +94,7 @@ def friable_model_optimisation(
     x0 = (upper_bound + lower_bound) / 2.0
     # Optimisation step without fluid substitution
     vel_mod, vel_res, opt_params = gen_opt_routine(
-        opt_fun, x_data, y_data, x0, lower_bound, upper_bound
+        opt_fun, x_data, y_data, x0, lower_bound, upper_bound, **opt_kwargs
     )
 
     # Reshape outputs and remove weight from vs
@@ -28,6 +28,7 @@ def patchy_cement_model_optimisation(
     display_results: bool = False,
     well_name: str = "Unknown well",
     opt_params_only=False,
+    **opt_kwargs,
 ):
     """Patchy cement model with optimisation for a selection of parameters.
 
@@ -69,6 +70,10 @@ def patchy_cement_model_optimisation(
         Name of well to be displayed in info box title.
     opt_params_only : bool
         return parameters from optimisation only
+    opt_kwargs :
+        Additional keywords to be passed to optimisation function, e.g. jac_workers for a parallel Jacobian,
+        subset_size and fit_report for a first optimisation on a subset of the samples, or n_starts and start_workers
+        for optimisations from several start points, see gen_opt_routine.
     Returns
     -------
     tuple
@@ -124,7 +129,7 @@ def patchy_cement_model_optimisation(
     x0 = (upper_bound + lower_bound) / 2.0
     # Optimisation step without fluid substitution
     vel_mod, vel_res, opt_params = gen_opt_routine(
-        opt_fun, x_data, y_data, x0, lower_bound, upper_bound
+        opt_fun, x_data, y_data, x0, lower_bound, upper_bound, **opt_kwargs
     )
 
     # Reshape outputs and remove weight from vs
@@ -1,5 +1,6 @@
-from .co2_properties import co2_properties
+from .co2_properties import co2_properties, co2_property_bundle
 
 __all__ = [
     "co2_properties",
+    "co2_property_bundle",
 ]
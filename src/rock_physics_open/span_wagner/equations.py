@@ -1,12 +1,35 @@
 """
-Package for calculating the residual helmholtz energy for CO2. The module uses sympy to evaluate the functions defined
-in Span & Wagner [2], as well as its derivatives.
+Package for calculating the residual helmholtz energy for CO2. The functions defined in Span & Wagner [2] and their
+derivatives up to second order are evaluated with closed-form numpy expressions, following Table 32 of Span & Wagner
+[2].
 """
 
 import numpy as np
-import sympy as sp
 
-from . import coefficients
+from .coefficients import (
+    A4,
+    B4,
+    C4,
+    D4,
+    a4,
+    alpha3,
+    b4,
+    beta3,
+    beta4,
+    c2,
+    d1,
+    d2,
+    d3,
+    epsilon3,
+    gamma3,
+    n1,
+    n2,
+    n3,
+    n4,
+    t1,
+    t2,
+    t3,
+)
 
 
 def residual_helmholtz_energy(delta_, tau_, diff_delta, diff_tau):
@@ -21,84 +44,187 @@ def residual_helmholtz_energy(delta_, tau_, diff_delta, diff_tau):
 
     :return: Helmholtz free energy. Unit-less. numpy.ndarray with shape (N,)
     """
-    _s1 = np.sum(
-        _LAMBDIFIED_EXPRESSIONS[(s1, diff_delta, diff_tau)](tau_, delta_), axis=-1
-    )
-    _s2 = np.sum(
-        _LAMBDIFIED_EXPRESSIONS[(s2, diff_delta, diff_tau)](tau_, delta_), axis=-1
-    )
-    _s3 = np.sum(
-        _LAMBDIFIED_EXPRESSIONS[(s3, diff_delta, diff_tau)](tau_, delta_), axis=-1
-    )
-    _s4 = np.sum(
-        _LAMBDIFIED_EXPRESSIONS[(s4, diff_delta, diff_tau)](tau_, delta_), axis=-1
-    )
+    order = (diff_delta, diff_tau)
+    return residual_helmholtz_derivatives(delta_, tau_, [order])[order]
 
-    return _s1 + _s2 + _s3 + _s4
 
+def residual_helmholtz_derivatives(delta_, tau_, orders):
+    """
+    Evaluates several derivatives of the residual helmholtz energy at once. Exponentials and powers that are common to
+    the derivatives are only computed once for each group of terms.
 
-# Define coefficients symbols. These should correspond one-to-one with variable names in the coefficient module
-coeff_symbols = (
-    n1,
-    t1,
-    d1,
-    n2,
-    d2,
-    t2,
-    c2,
-    n3,
-    d3,
-    t3,
-    alpha3,
-    epsilon3,
-    beta3,
-    gamma3,
-    n4,
-    b4,
-    a4,
-    beta4,
-    A4,
-    B4,
-    C4,
-    D4,
-) = sp.symbols(
-    "n1 t1 d1 n2 d2 t2 c2 n3 d3 t3 alpha3 epsilon3 beta3 gamma3 n4 b4 a4 beta4 A4 B4 C4 D4"
-)
-tau, delta = sp.symbols("tau delta", real=True)
-i = sp.symbols("i", integer=True)
-s1 = n1 * delta**d1 * tau**t1
-s2 = n2 * delta**d2 * tau**t2 * sp.exp(-(delta**c2))
-s3 = (
-    n3
-    * delta**d3
-    * tau**t3
-    * sp.exp(-alpha3 * (delta - epsilon3) ** 2 - beta3 * (tau - gamma3) ** 2)
-)
+    :param delta_: Reduced density. Unit-less. numpy.ndarray with shape (N, 1)
+    :param tau_: Inverse reduced temperature. Unit-less. numpy.ndarray with shape (N, 1)
+    :param orders: Iterable of (diff_delta, diff_tau) tuples, with diff_delta + diff_tau <= 2.
+
+    :return: Dictionary of derivatives keyed by (diff_delta, diff_tau). numpy.ndarray with shape (N,)
+    """
+    orders = list(dict.fromkeys(orders))
+    for diff_delta, diff_tau in orders:
+        if diff_delta < 0 or diff_tau < 0 or diff_delta + diff_tau > 2:
+            raise ValueError(
+                f"unsupported derivative order: diff_delta={diff_delta}, diff_tau={diff_tau}"
+            )
+    result = dict.fromkeys(orders, 0.0)
+    for terms in (_s1_terms, _s2_terms, _s3_terms, _s4_terms):
+        values = terms(delta_, tau_, orders)
+        for order in orders:
+            result[order] = result[order] + np.sum(values[order], axis=-1)
+    return result
+
+
+def _powers(x, exponent, diff_orders):
+    """
+    x**(exponent - k) for k in diff_orders, keyed by k. Only the lowest power is evaluated with np.power, the others
+    are found by repeated multiplication with x.
+    """
+    k_max = max(diff_orders)
+    result = {k_max: x ** (exponent - k_max)}
+    for k in range(k_max - 1, min(diff_orders) - 1, -1):
+        result[k] = result[k + 1] * x
+    return result
 
-theta_expr = (1 - tau) + A4 * ((delta - 1) ** 2) ** (1 / (2 * beta4))
-bigdelta_expr = theta_expr**2 + B4 * ((delta - 1) ** 2) ** a4
-bigphi_expr = sp.exp(-C4 * (delta - 1) ** 2 - D4 * (tau - 1) ** 2)
-s4 = n4 * bigdelta_expr**b4 * delta * bigphi_expr
-
-
-def _lambdify(expr, diff_delta, diff_tau):
-    diff = [delta] * diff_delta + [tau] * diff_tau
-    if len(diff) > 0:
-        expr = expr.diff(*diff)
-    expr = expr.powsimp()
-    coeff_vars = [getattr(coefficients, s.name) for s in coeff_symbols]
-    _sympy_lambda = sp.utilities.lambdify(
-        list(coeff_symbols) + [tau, delta],
-        expr,
-        modules=["numpy", {"DiracDelta": lambda x: x == 0}],
-    )
-    return lambda _tau, _delta: _sympy_lambda(*coeff_vars, _tau, _delta)
 
+def _power_derivatives(x, exponent, diff_orders):
+    """
+    Derivatives of x**exponent of the given orders (0, 1 or 2), keyed by order.
+    """
+    powers = _powers(x, exponent, diff_orders)
+    result = {}
+    if 0 in diff_orders:
+        result[0] = powers[0]
+    if 1 in diff_orders:
+        result[1] = exponent * powers[1]
+    if 2 in diff_orders:
+        result[2] = exponent * (exponent - 1) * powers[2]
+    return result
+
+
+def _s1_terms(delta, tau, orders):
+    """
+    Polynomial terms, n * delta**d * tau**t.
+    """
+    f_delta = _power_derivatives(delta, d1, {dd for dd, _ in orders})
+    g_tau = _power_derivatives(tau, t1, {dt for _, dt in orders})
+    return {(dd, dt): n1 * f_delta[dd] * g_tau[dt] for dd, dt in orders}
+
+
+def _s2_terms(delta, tau, orders):
+    """
+    Exponential terms, n * delta**d * tau**t * exp(-delta**c).
+    """
+    delta_c = delta**c2
+    exp_delta_c = np.exp(-delta_c)
+    delta_orders = {dd for dd, _ in orders}
+    delta_d = _powers(delta, d2, delta_orders)
+    f_delta = {}
+    if 0 in delta_orders:
+        f_delta[0] = delta_d[0] * exp_delta_c
+    if 1 in delta_orders:
+        f_delta[1] = delta_d[1] * (d2 - c2 * delta_c) * exp_delta_c
+    if 2 in delta_orders:
+        f_delta[2] = (
+            delta_d[2]
+            * ((d2 - c2 * delta_c) * (d2 - 1 - c2 * delta_c) - c2**2 * delta_c)
+            * exp_delta_c
+        )
+    g_tau = _power_derivatives(tau, t2, {dt for _, dt in orders})
+    return {(dd, dt): n2 * f_delta[dd] * g_tau[dt] for dd, dt in orders}
+
+
+def _gaussian_factors(x, exponent, alpha, epsilon, diff_orders):
+    """
+    Derivatives of the given orders of x**exponent * exp(-alpha * (x - epsilon)**2), keyed by order.
+    """
+    f = x**exponent * np.exp(-alpha * (x - epsilon) ** 2)
+    result = {0: f}
+    if 1 in diff_orders or 2 in diff_orders:
+        g = exponent / x - 2 * alpha * (x - epsilon)
+        result[1] = f * g
+        result[2] = f * (g**2 - exponent / x**2 - 2 * alpha)
+    return result
+
+
+def _s3_terms(delta, tau, orders):
+    """
+    Gaussian bell-shaped terms, n * delta**d * tau**t * exp(-alpha * (delta - eps)**2 - beta * (tau - gamma)**2).
+    """
+    f_delta = _gaussian_factors(delta, d3, alpha3, epsilon3, {dd for dd, _ in orders})
+    g_tau = _gaussian_factors(tau, t3, beta3, gamma3, {dt for _, dt in orders})
+    return {(dd, dt): n3 * f_delta[dd] * g_tau[dt] for dd, dt in orders}
+
+
+def _s4_terms(delta, tau, orders):
+    """
+    Non-analytical terms, n * Delta**b * delta * psi, with Delta and psi as defined in Table 32 of Span & Wagner [2].
+    """
+    dm1 = delta - 1
+    tm1 = tau - 1
+    dm1_sq = dm1**2
+    inv_2beta = 1 / (2 * beta4)
+
+    theta = (1 - tau) + A4 * dm1_sq**inv_2beta
+    big_delta = theta**2 + B4 * dm1_sq**a4
+    psi = np.exp(-C4 * dm1_sq - D4 * tm1**2)
+    delta_b = big_delta**b4
+
+    result = {}
+    if (0, 0) in orders:
+        result[(0, 0)] = n4 * delta_b * delta * psi
+    if set(orders) <= {(0, 0)}:
+        return result
+
+    # First order derivatives of Delta, Delta**b and psi
+    big_delta_bm1 = big_delta ** (b4 - 1)
+    big_delta_bm2 = big_delta ** (b4 - 2)
+    dm1_sq_beta = dm1_sq ** (inv_2beta - 1)
+    big_delta_d = dm1 * (
+        A4 * theta * (2 / beta4) * dm1_sq_beta + 2 * B4 * a4 * dm1_sq ** (a4 - 1)
+    )
+    delta_b_d = b4 * big_delta_bm1 * big_delta_d
+    delta_b_t = -2 * theta * b4 * big_delta_bm1
+    psi_d = -2 * C4 * dm1 * psi
+    psi_t = -2 * D4 * tm1 * psi
 
-_LAMBDIFIED_EXPRESSIONS = {
-    (e, dd, dt): _lambdify(e, dd, dt)
-    for e in (s1, s2, s3, s4)
-    for dd in (0, 1, 2)
-    for dt in (0, 1, 2)
-    if dd + dt <= 2
-}
+    if (1, 0) in orders:
+        result[(1, 0)] = n4 * (
+            delta_b * (psi + delta * psi_d) + delta_b_d * delta * psi
+        )
+    if (0, 1) in orders:
+        result[(0, 1)] = n4 * delta * (delta_b_t * psi + delta_b * psi_t)
+    if (2, 0) in orders:
+        big_delta_dd = big_delta_d / dm1 + dm1_sq * (
+            4 * B4 * a4 * (a4 - 1) * dm1_sq ** (a4 - 2)
+            + 2 * A4**2 * (1 / beta4) ** 2 * dm1_sq_beta**2
+            + A4 * theta * (4 / beta4) * (inv_2beta - 1) * dm1_sq ** (inv_2beta - 2)
+        )
+        delta_b_dd = b4 * (
+            big_delta_bm1 * big_delta_dd + (b4 - 1) * big_delta_bm2 * big_delta_d**2
+        )
+        psi_dd = (2 * C4 * dm1_sq - 1) * 2 * C4 * psi
+        result[(2, 0)] = n4 * (
+            delta_b * (2 * psi_d + delta * psi_dd)
+            + 2 * delta_b_d * (psi + delta * psi_d)
+            + delta_b_dd * delta * psi
+        )
+    if (0, 2) in orders:
+        delta_b_tt = (
+            2 * b4 * big_delta_bm1 + 4 * theta**2 * b4 * (b4 - 1) * big_delta_bm2
+        )
+        psi_tt = (2 * D4 * tm1**2 - 1) * 2 * D4 * psi
+        result[(0, 2)] = (
+            n4 * delta * (delta_b_tt * psi + 2 * delta_b_t * psi_t + delta_b * psi_tt)
+        )
+    if (1, 1) in orders:
+        delta_b_dt = (
+            -A4 * b4 * (2 / beta4) * big_delta_bm1 * dm1 * dm1_sq_beta
+            - 2 * theta * b4 * (b4 - 1) * big_delta_bm2 * big_delta_d
+        )
+        psi_dt = 4 * C4 * D4 * dm1 * tm1 * psi
+        result[(1, 1)] = n4 * (
+            delta_b * (psi_t + delta * psi_dt)
+            + delta * delta_b_d * psi_t
+            + delta_b_t * (psi + delta * psi_d)
+            + delta_b_dt * delta * psi
+        )
+    return result
@@ -0,0 +1,173 @@
+"""
+Generation of the CO2 property lookup tables that are shipped with the package. The tables are regenerated with
+
+    python -m rock_physics_open.span_wagner.tables.generate_tables [--output-dir DIR] [--check]
+
+Temperature is given in K and pressure in MPa. The grid has a uniform fine spacing in the temperature range around the
+critical point and in the pressure range of the saturation line, where the properties change rapidly, see
+table_temperatures and table_pressures. The grid does not follow the saturation line itself, and the properties are
+discontinuous across it within the grid cells.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from rock_physics_open.span_wagner.co2_properties import (
+    CO2_CRITICAL_PRESSURE,
+    CO2_CRITICAL_TEMPERATURE,
+    carbon_dioxide_bulk_modulus,
+    vapor_pressure,
+    vectorized_carbon_dioxide_density,
+)
+from rock_physics_open.span_wagner.tables.lookup_table import (
+    generate_lookup_table,
+    load_lookup_table_interpolator,
+    save_lookup_table,
+)
+
+TABLE_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_NAMES = (
+    "carbon_dioxide_density",
+    "carbon_dioxide_bulk_modulus",
+    "carbon_dioxide_velocity",
+)
+
+
+def table_temperatures():
+    """
+    Absolute temperature axis (K) of the CO2 tables, 220 K - 500 K. Spacing is 0.25 K within 15 K of the critical
+    temperature, 1 K elsewhere. This uniform fine spacing is the only refinement around the critical point.
+    """
+    t_c = np.round(CO2_CRITICAL_TEMPERATURE)
+    return np.unique(
+        np.concatenate(
+            (
+                np.arange(220.0, t_c - 15.0, 1.0),
+                np.arange(t_c - 15.0, t_c + 15.0, 0.25),
+                np.arange(t_c + 15.0, 500.0 + 0.5, 1.0),
+            )
+        )
+    )
+
+
+def table_pressures():
+    """
+    Pressure axis (MPa) of the CO2 tables, 0.1 MPa - 100 MPa. Spacing is 0.05 MPa up to 15 MPa, which covers the
+    pressure range of the saturation line and the critical region, 0.25 MPa up to 40 MPa and 1 MPa above that. The
+    spacing is uniform within each range, and is not refined along the saturation line.
+    """
+    return np.unique(
+        np.concatenate(
+            (
+                np.arange(0.1, 15.0, 0.05),
+                np.arange(15.0, 40.0, 0.25),
+                np.arange(40.0, 100.0 + 0.5, 1.0),
+            )
+        )
+    )
+
+
+def _table_path(output_dir, name):
+    return os.path.join(output_dir, f"{name}.npz")
+
+
+def generate_co2_tables(output_dir=TABLE_DIR, temperatures=None, pressures=None):
+    """
+    Generate density (kg/m^3), isentropic bulk modulus (Pa) and velocity (m/s) tables for CO2. Density is solved once
+    for the whole grid, and the other tables are derived from it.
+
+    :param output_dir: Directory to store the tables in.
+    :param temperatures: Absolute temperature axis (K). Defaults to table_temperatures().
+    :param pressures: Pressure axis (MPa). Defaults to table_pressures().
+
+    :return: Dictionary with the table grids, keyed by table name.
+    """
+    temperatures = table_temperatures() if temperatures is None else temperatures
+    pressures = table_pressures() if pressures is None else pressures
+    os.makedirs(output_dir, exist_ok=True)
+
+    (temperature_grid, _), density = generate_lookup_table(
+        lambda t, p: vectorized_carbon_dioxide_density(t, p, raise_error=False),
+        temperatures,
+        pressures,
+        _table_path(output_dir, TABLE_NAMES[0]),
+    )
+    bulk_modulus = carbon_dioxide_bulk_modulus(
+        temperature_grid.ravel(), density.ravel()
+    ).reshape(density.shape)
+    velocity = np.sqrt(bulk_modulus / density)
+    for name, z_grid in zip(TABLE_NAMES[1:], (bulk_modulus, velocity)):
+        save_lookup_table(
+            _table_path(output_dir, name), z_grid, temperatures, pressures
+        )
+    return dict(zip(TABLE_NAMES, (density, bulk_modulus, velocity)))
+
+
+def interpolation_error(table_dir=TABLE_DIR, method="linear", n_samples=20000, seed=0):
+    """
+    Maximum relative interpolation error of the tables in table_dir, estimated from random samples within the table
+    range. Samples within 0.5 MPa of the vapor pressure are reported separately, as the properties are discontinuous
+    across the saturation line.
+
+    :return: Dictionary keyed by table name, with (max error away from, max error near saturation line) tuples.
+    """
+    rng = np.random.default_rng(seed)
+    temperatures = table_temperatures()
+    pressures = table_pressures()
+    abs_temp = rng.uniform(temperatures[0], temperatures[-1], n_samples)
+    pres = rng.uniform(pressures[0], pressures[-1], n_samples)
+
+    density = vectorized_carbon_dioxide_density(abs_temp, pres, raise_error=False)
+    bulk_modulus = carbon_dioxide_bulk_modulus(abs_temp, density)
+    exact = dict(
+        zip(TABLE_NAMES, (density, bulk_modulus, np.sqrt(bulk_modulus / density)))
+    )
+
+    near_saturation = np.zeros(n_samples, dtype=bool)
+    below_critical = abs_temp < CO2_CRITICAL_TEMPERATURE
+    near_saturation[below_critical] = (
+        np.abs(pres[below_critical] - vapor_pressure(abs_temp[below_critical])) < 0.5
+    )
+    near_saturation |= (np.abs(abs_temp - CO2_CRITICAL_TEMPERATURE) < 1.0) & (
+        np.abs(pres - CO2_CRITICAL_PRESSURE) < 0.5
+    )
+
+    errors = {}
+    for name in TABLE_NAMES:
+        interpolator = load_lookup_table_interpolator(
+            _table_path(table_dir, name), method=method
+        )
+        rel_error = np.abs(interpolator(abs_temp, pres) / exact[name] - 1.0)
+        errors[name] = (
+            np.nanmax(rel_error[~near_saturation]),
+            np.nanmax(rel_error[near_saturation]),
+        )
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CO2 property lookup tables")
+    parser.add_argument("--output-dir", default=TABLE_DIR)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="report interpolation error of the generated tables",
+    )
+    args = parser.parse_args(argv)
+
+    generate_co2_tables(args.output_dir)
+    if args.check:
+        for method in ("linear", "cubic"):
+            for name, (err, err_sat) in interpolation_error(
+                args.output_dir, method=method
+            ).items():
+                print(
+                    f"{name} ({method}): max relative error {err:.2e}, "
+                    f"near saturation line {err_sat:.2e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import functools
+import os
 
 import numpy as np
 from scipy.interpolate import RegularGridInterpolator
@@ -9,15 +10,29 @@ def generate_lookup_table(func, x, y, filename):
     grids = [g.flatten() for g in grids2d]
     z = func(*grids)
     z_grid = z.reshape(grids2d[0].shape)
-    np.savez(filename, z_grid=z_grid, x=x, y=y)
+    save_lookup_table(filename, z_grid, x, y)
     return grids2d, z_grid
 
 
+def save_lookup_table(filename, z_grid, x, y):
+    """
+    Store a table of values z_grid on the grid spanned by x and y (z_grid[i, j] at x[i], y[j]), in the format read by
+    load_lookup_table_interpolator.
+    """
+    np.savez_compressed(filename, z_grid=z_grid, x=x, y=y)
+
+
 @functools.lru_cache(maxsize=10)
-def load_lookup_table_interpolator(filename):
+def load_lookup_table_interpolator(filename, method="linear"):
+    """
+    Interpolator for a table stored by generate_lookup_table. Points outside the table are set to np.nan.
+
+    :param filename: Table file.
+    :param method: Interpolation method of RegularGridInterpolator, e.g. "nearest", "linear" or "cubic".
+    """
     data = np.load(filename)
     reg = RegularGridInterpolator(
-        (data["x"], data["y"]), data["z_grid"], method="nearest", bounds_error=False
+        (data["x"], data["y"]), data["z_grid"], method=method, bounds_error=False
     )
 
     def _interp(_x, _y):
@@ -31,3 +46,134 @@ def load_lookup_table_interpolator(filename):
         return res
 
     return _interp
+
+
+class LazyLookupGrid:
+    """
+    Lookup table of func(x, y) on a logarithmically spaced lattice, x_k = x_step**k and y_l = y_step**l. The lattice
+    is only computed where it is needed: when called with points outside the current grid, the grid is extended to
+    cover them and func is evaluated for the new nodes only. If filename is given, the grid is read from file on
+    construction (if the file exists) and written back after each extension. The suffix .npz is added to filename if
+    it is missing.
+
+    Inputs x and y must be positive. func must be vectorised, taking flat arrays of x and y.
+    """
+
+    def __init__(self, func, x_step, y_step, filename=None):
+        self.func = func
+        self.x_step = float(x_step)
+        self.y_step = float(y_step)
+        if filename is not None:
+            filename = os.fspath(filename)
+            if not filename.endswith(".npz"):
+                filename += ".npz"
+        self.filename = filename
+        self.x_range = (0, -1)
+        self.y_range = (0, -1)
+        self.z_grid = np.empty((0, 0))
+        if filename is not None and os.path.isfile(filename):
+            self.load(filename)
+
+    @property
+    def x(self):
+        return self.x_step ** np.arange(self.x_range[0], self.x_range[1] + 1)
+
+    @property
+    def y(self):
+        return self.y_step ** np.arange(self.y_range[0], self.y_range[1] + 1)
+
+    @staticmethod
+    def _index_range(values, step):
+        # At least two nodes in each direction, as required by linear interpolation
+        log_values = np.log(values) / np.log(step)
+        low = int(np.floor(np.min(log_values)))
+        return low, max(int(np.ceil(np.max(log_values))), low + 1)
+
+    def extend(self, x, y):
+        """
+        Extend the grid to cover all positive, finite points (x, y). Returns True if the grid was extended.
+        """
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        )
+        valid = np.isfinite(x) & np.isfinite(y) & (x > 0.0) & (y > 0.0)
+        if not np.any(valid):
+            return False
+        x_range = self._index_range(x[valid], self.x_step)
+        y_range = self._index_range(y[valid], self.y_step)
+        if self.z_grid.size > 0:
+            x_range = (
+                min(x_range[0], self.x_range[0]),
+                max(x_range[1], self.x_range[1]),
+            )
+            y_range = (
+                min(y_range[0], self.y_range[0]),
+                max(y_range[1], self.y_range[1]),
+            )
+        if (x_range, y_range) == (self.x_range, self.y_range):
+            return False
+
+        z_grid = np.full(
+            (x_range[1] - x_range[0] + 1, y_range[1] - y_range[0] + 1), np.nan
+        )
+        new_nodes = np.ones(z_grid.shape, dtype=bool)
+        if self.z_grid.size > 0:
+            i0 = self.x_range[0] - x_range[0]
+            j0 = self.y_range[0] - y_range[0]
+            old_block = (
+                slice(i0, i0 + self.z_grid.shape[0]),
+                slice(j0, j0 + self.z_grid.shape[1]),
+            )
+            z_grid[old_block] = self.z_grid
+            new_nodes[old_block] = False
+
+        self.x_range, self.y_range = x_range, y_range
+        xx, yy = np.meshgrid(self.x, self.y, indexing="ij")
+        z_grid[new_nodes] = self.func(xx[new_nodes], yy[new_nodes])
+        self.z_grid = z_grid
+        if self.filename is not None:
+            self.save(self.filename)
+        return True
+
+    def __call__(self, x, y):
+        """
+        Linear interpolation in the grid, which is extended as needed to cover (x, y).
+        """
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        )
+        self.extend(x, y)
+        if self.z_grid.size == 0:
+            return np.full(x.shape, np.nan)
+        reg = RegularGridInterpolator(
+            (self.x, self.y), self.z_grid, method="linear", bounds_error=False
+        )
+        return reg(np.column_stack((x.ravel(), y.ravel()))).reshape(x.shape)
+
+    def save(self, filename):
+        """
+        Store the grid in filename. The file is only replaced when the new grid is completely written, so that other
+        processes that read it never see a partly written grid.
+        """
+        tmp_file = f"{os.fspath(filename)}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as file_out:
+            np.savez(
+                file_out,
+                z_grid=self.z_grid,
+                x_step=self.x_step,
+                y_step=self.y_step,
+                x_range=self.x_range,
+                y_range=self.y_range,
+            )
+        os.replace(tmp_file, filename)
+
+    def load(self, filename):
+        """
+        Read a grid stored by save. Grids stored with a different lattice are ignored.
+        """
+        with np.load(filename) as data:
+            if data["x_step"] != self.x_step or data["y_step"] != self.y_step:
+                return
+            self.z_grid = data["z_grid"]
+            self.x_range = tuple(int(i) for i in data["x_range"])
+            self.y_range = tuple(int(i) for i in data["y_range"])
@@ -1,4 +1,5 @@
 from .carbonate_pressure_substitution import carbonate_pressure_model
+from .multi_well_optimisation import run_multi_well_optimisation
 from .opt_subst_utilities import (
     gen_opt_routine,
     opt_param_info,
@@ -19,14 +20,19 @@ from .t_matrix_opt_forward_model_min import (
 from .t_matrix_parameter_optimisation_exp import t_matrix_optimisation_exp
 from .t_matrix_parameter_optimisation_min import t_matrix_optimisation_petec
 from .t_matrix_vector import (
+    TITensor,
     array_inverse,
     array_matrix_mult,
+    array_solve,
+    t_matrix_frame_vectorised,
     t_matrix_porosity_vectorised,
+    velocity_vti_multi_angles_vec,
 )
 
 __all__ = [
     "carbonate_pressure_model",
     "gen_opt_routine",
+    "run_multi_well_optimisation",
     "opt_param_info",
     "opt_param_to_ascii",
     "save_opt_params",
@@ -41,5 +47,9 @@ __all__ = [
     "t_matrix_optimisation_petec",
     "array_inverse",
     "array_matrix_mult",
+    "array_solve",
+    "TITensor",
+    "t_matrix_frame_vectorised",
     "t_matrix_porosity_vectorised",
+    "velocity_vti_multi_angles_vec",
 ]
@@ -5,6 +5,8 @@ from rock_physics_open.equinor_utilities.std_functions import hashin_shtrikman_a
 from rock_physics_open.t_matrix_models import t_matrix_porosity_c_alpha_v
 
 from .opt_subst_utilities import opt_param_info
+from .t_matrix_C import PreparedTMatrixRun
+from .t_matrix_vector import t_matrix_frame_vectorised
 
 
 def curvefit_t_matrix_exp(
@@ -58,15 +60,6 @@ def curvefit_t_matrix_exp(
     np.ndarray
         Modelled velocity, vp and vs.
     """
-    # Restore original value range for parameters - must match the scaling performed in calling function
-    scale_val = opt_param_info()[1]
-    k_c *= scale_val["k_carb"]
-    mu_c *= scale_val["mu_carb"]
-    rho_c *= scale_val["rho_carb"]
-    k_sh *= scale_val["k_sh"]
-    mu_sh *= scale_val["mu_sh"]
-    rho_sh *= scale_val["rho_sh"]
-
     # Unpack x inputs
     # In calling function:
     # x_data = np.stack((por, vsh, k_fl, rho_fl, k_r, eta_f, tau, freq, def_vpvs), axis=1)
@@ -82,13 +75,9 @@ def curvefit_t_matrix_exp(
     freq = x_data[0, 8]
     def_vp_vs_ratio = x_data[0, 9]
 
-    # Mineral properties
-    # Expand elastic properties to vectors of the same length as the x_data inputs
-    k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh, _ = dim_check_vector(
-        (k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh, phi)
+    k_min, mu_min, rho_min = _mineral_properties(
+        phi, vsh, k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh
     )
-    k_min, mu_min = hashin_shtrikman_average(k_sh, mu_sh, k_c, mu_c, vsh)
-    rho_min = vsh * rho_sh + (1.0 - vsh) * rho_c
 
     # Inclusion aspect ratios and concentrations
     log_len = phi.shape[0]
@@ -122,3 +111,155 @@ def curvefit_t_matrix_exp(
         vsv = np.zeros(k_min.shape)
 
     return np.stack((vp, def_vp_vs_ratio * vsv), axis=1).flatten("F")
+
+
+class PreparedCurveFitExp:
+    """curvefit_t_matrix_exp for a fixed set of inputs x_data, for use in optimisation. The log inputs are checked
+    and packed for the C++ library once, and each evaluation only updates the mineral properties and the inclusion
+    parameters.
+
+    The object can be given to curve_fit in place of curvefit_t_matrix_exp. Calls with other inputs than x_data are
+    passed on to curvefit_t_matrix_exp.
+
+    Parameters
+    ----------
+    x_data : np.ndarray
+        Inputs to unpack, see curvefit_t_matrix_exp.
+    """
+
+    def __init__(self, x_data):
+        self.x_data = x_data
+        self._phi = x_data[:, 0]
+        self._vsh = x_data[:, 1]
+        self._run = PreparedTMatrixRun(
+            0.0,
+            0.0,
+            0.0,
+            x_data[:, 2],
+            x_data[:, 3],
+            self._phi,
+            x_data[:, 5],
+            x_data[:, 6],
+            2,
+            x_data[0, 8],
+            x_data[0, 4],
+        )
+        self._def_vp_vs_ratio = x_data[0, 9]
+
+    def evaluate(self, params):
+        """Modelled velocity for the parameters frac_ani, frac_con, alpha1, alpha2, v1, k_c, mu_c, rho_c, k_sh,
+        mu_sh, rho_sh, see curvefit_t_matrix_exp."""
+        frac_ani, frac_con, alpha1, alpha2, v1, *mineral_params = params
+        mineral = _mineral_properties(self._phi, self._vsh, *mineral_params)
+        with self._run.lock:
+            self._run.set_mineral(*mineral)
+            try:
+                vp, vsv, _, _ = self._run.evaluate(
+                    [alpha1, alpha2], [v1, 1 - v1], frac_con, frac_ani
+                )
+            except ValueError:
+                return np.zeros(2 * self._run.log_length)
+            return np.concatenate((vp, self._def_vp_vs_ratio * vsv))
+
+    def __call__(self, x_data, *params):
+        if x_data is not self.x_data:
+            return curvefit_t_matrix_exp(x_data, *params)
+        return self.evaluate(params)
+
+
+def frame_t_matrix_exp(
+    x_data,
+    frac_ani,
+    frac_con,
+    alpha1,
+    alpha2,
+    v1,
+    k_c,
+    mu_c,
+    rho_c,
+    k_sh,
+    mu_sh,
+    rho_sh,
+):
+    """Fluid independent part of curvefit_t_matrix_exp, for fluid substitution to one or more fluids. The T-Matrix
+    frame is calculated once from the x_data inputs, and the returned function calculates the modelled velocities for
+    x_data with other fluid properties (columns k_fl, rho_fl and visco) from the frame.
+
+    The frame is calculated with the vectorised T-Matrix model, since the C++ library does not give access to the
+    intermediate results. Unlike the C++ library, the vectorised model uses the relaxation time constant tau. The two
+    implementations only agree for a fraction of anisotropic inclusions of 0.5 and short relaxation times.
+
+    Parameters
+    ----------
+    x_data : np.ndarray
+        Inputs to unpack, see curvefit_t_matrix_exp.
+    frac_ani, frac_con, alpha1, alpha2, v1, k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh : float
+        Model parameters, see curvefit_t_matrix_exp.
+
+    Returns
+    -------
+    callable
+        Function of x_data that returns the modelled velocity in the same format as curvefit_t_matrix_exp.
+    """
+    phi = x_data[:, 0]
+    vsh = x_data[:, 1]
+    perm = x_data[:, 5]
+    tau = x_data[0, 7]
+
+    k_min, mu_min, rho_min = _mineral_properties(
+        phi, vsh, k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh
+    )
+    try:
+        frame = t_matrix_frame_vectorised(
+            k_min,
+            mu_min,
+            rho_min,
+            phi,
+            perm,
+            np.array([alpha1, alpha2]),
+            np.array([v1, 1.0 - v1]),
+            np.full(2, tau),
+            frac_con,
+            frac_ani,
+        )
+    except ValueError:
+        frame = None
+
+    def fluid_fcn(x_data_fluid):
+        # Only the fluid properties, angle, frequency and vp/vs ratio are taken from x_data_fluid
+        k_fl = x_data_fluid[:, 2]
+        rho_fl = x_data_fluid[:, 3]
+        angle_sym_plane = x_data_fluid[0, 4]
+        visco = x_data_fluid[:, 6]
+        freq = x_data_fluid[0, 8]
+        def_vp_vs_ratio = x_data_fluid[0, 9]
+        try:
+            if frame is None:
+                raise ValueError("frame_t_matrix_exp: invalid T-Matrix frame")
+            vp, vsv, _, _ = frame.evaluate(k_fl, rho_fl, visco, freq, angle_sym_plane)
+        except ValueError:
+            vp = np.zeros(k_fl.shape)
+            vsv = np.zeros(k_fl.shape)
+        return np.stack((vp, def_vp_vs_ratio * vsv), axis=1).flatten("F")
+
+    return fluid_fcn
+
+
+def _mineral_properties(phi, vsh, k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh):
+    # Restore original value range for parameters - must match the scaling performed in calling function
+    scale_val = opt_param_info()[1]
+    k_c *= scale_val["k_carb"]
+    mu_c *= scale_val["mu_carb"]
+    rho_c *= scale_val["rho_carb"]
+    k_sh *= scale_val["k_sh"]
+    mu_sh *= scale_val["mu_sh"]
+    rho_sh *= scale_val["rho_sh"]
+
+    # Mineral properties
+    # Expand elastic properties to vectors of the same length as the x_data inputs
+    k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh, _ = dim_check_vector(
+        (k_c, mu_c, rho_c, k_sh, mu_sh, rho_sh, phi)
+    )
+    k_min, mu_min = hashin_shtrikman_average(k_sh, mu_sh, k_c, mu_c, vsh)
+    rho_min = vsh * rho_sh + (1.0 - vsh) * rho_c
+    return k_min, mu_min, rho_min
@@ -2,6 +2,9 @@ import numpy as np
 
 from rock_physics_open.t_matrix_models import t_matrix_porosity_c_alpha_v
 
+from .t_matrix_C import PreparedTMatrixRun
+from .t_matrix_vector import t_matrix_frame_vectorised
+
 
 def curve_fit_2_inclusion_sets(x_data, frac_ani, frac_con, alpha1, alpha2, v1):
     """Optimisation of input parameters to T-Matrix for carbonate in case where the mineral composition for each
@@ -48,16 +51,7 @@ def curve_fit_2_inclusion_sets(x_data, frac_ani, frac_con, alpha1, alpha2, v1):
 
     log_length = len(phi)
 
-    # alpha and v values should follow these conditions:
-    # - alphas are given in decreasing values
-    # - the sum of v's should add up to unity
-    if not (alpha1 > alpha2 and 0.0 < v1 <= 1.0):
-        raise ValueError(
-            "curvefit_t_matrix: alpha 1 must have higher value than alpha 2, and v1 must be a "
-            "positive fraction"
-        )
-    alpha = np.array([alpha1, alpha2]).reshape(1, 2)
-    v = np.array([v1, 1.0 - v1]).reshape(1, 2)
+    alpha, v = _inclusion_sets(alpha1, alpha2, v1)
     alpha_vec = alpha * np.ones((log_length, 1))
     v_vec = v * np.ones((log_length, 1))
 
@@ -84,3 +78,138 @@ def curve_fit_2_inclusion_sets(x_data, frac_ani, frac_con, alpha1, alpha2, v1):
         vsv = np.zeros(k_min.shape)
 
     return np.stack((vp, def_vp_vs_ratio * vsv), axis=1).flatten("F")
+
+
+class PreparedCurveFit2InclusionSets:
+    """curve_fit_2_inclusion_sets for a fixed set of inputs x_data, for use in optimisation. The log inputs are
+    checked and packed for the C++ library once, and each evaluation only updates the inclusion parameters.
+
+    The object can be given to curve_fit in place of curve_fit_2_inclusion_sets. Calls with other inputs than
+    x_data are passed on to curve_fit_2_inclusion_sets.
+
+    Parameters
+    ----------
+    x_data : np.ndarray
+        Inputs to unpack, see curve_fit_2_inclusion_sets.
+    """
+
+    def __init__(self, x_data):
+        self.x_data = x_data
+        self._run = PreparedTMatrixRun(
+            x_data[:, 1],
+            x_data[:, 2],
+            x_data[:, 3],
+            x_data[:, 4],
+            x_data[:, 5],
+            x_data[:, 0],
+            x_data[:, 7],
+            x_data[:, 8],
+            2,
+            x_data[0, 10],
+            x_data[0, 6],
+        )
+        self._def_vp_vs_ratio = x_data[0, 11]
+
+    def evaluate(self, params):
+        """Modelled velocity for the parameters frac_ani, frac_con, alpha1, alpha2, v1, see
+        curve_fit_2_inclusion_sets."""
+        frac_ani, frac_con, alpha1, alpha2, v1 = params
+        alpha, v = _inclusion_sets(alpha1, alpha2, v1)
+        with self._run.lock:
+            try:
+                vp, vsv, _, _ = self._run.evaluate(alpha, v, frac_con, frac_ani)
+            except ValueError:
+                return np.zeros(2 * self._run.log_length)
+            return np.concatenate((vp, self._def_vp_vs_ratio * vsv))
+
+    def __call__(self, x_data, *params):
+        if x_data is not self.x_data:
+            return curve_fit_2_inclusion_sets(x_data, *params)
+        return self.evaluate(params)
+
+
+def frame_2_inclusion_sets(x_data, frac_ani, frac_con, alpha1, alpha2, v1):
+    """Fluid independent part of curve_fit_2_inclusion_sets, for fluid substitution to one or more fluids. The
+    T-Matrix frame is calculated once from the x_data inputs, and the returned function calculates the modelled
+    velocities for x_data with other fluid properties (columns k_fl, rho_fl and visco) from the frame.
+
+    The frame is calculated with the vectorised T-Matrix model, since the C++ library does not give access to the
+    intermediate results. Unlike the C++ library, the vectorised model uses the relaxation time constant tau. The two
+    implementations only agree for a fraction of anisotropic inclusions of 0.5 and short relaxation times.
+
+    Parameters
+    ----------
+    x_data : np.ndarray
+        Inputs to unpack, see curve_fit_2_inclusion_sets.
+    frac_ani : float
+        Fraction of anisotropic inclusions.
+    frac_con : float
+        Fraction of connected inclusions.
+    alpha1 : float
+        Aspect ratio of first inclusion set.
+    alpha2 : float
+        Aspect ratio of second inclusion set.
+    v1 : float
+        Concentration ratio of first inclusion set.
+
+    Returns
+    -------
+    callable
+        Function of x_data that returns the modelled velocity in the same format as curve_fit_2_inclusion_sets.
+    """
+    phi = x_data[:, 0]
+    k_min = x_data[:, 1]
+    mu_min = x_data[:, 2]
+    rho_min = x_data[:, 3]
+    perm = x_data[:, 7]
+    tau = x_data[0, 9]
+
+    alpha, v = _inclusion_sets(alpha1, alpha2, v1)
+    try:
+        frame = t_matrix_frame_vectorised(
+            k_min,
+            mu_min,
+            rho_min,
+            phi,
+            perm,
+            alpha[0],
+            v[0],
+            np.full(2, tau),
+            frac_con,
+            frac_ani,
+        )
+    except ValueError:
+        frame = None
+
+    def fluid_fcn(x_data_fluid):
+        # Only the fluid properties, angle, frequency and vp/vs ratio are taken from x_data_fluid
+        k_fl = x_data_fluid[:, 4]
+        rho_fl = x_data_fluid[:, 5]
+        angle_sym_plane = x_data_fluid[0, 6]
+        visco = x_data_fluid[:, 8]
+        freq = x_data_fluid[0, 10]
+        def_vp_vs_ratio = x_data_fluid[0, 11]
+        try:
+            if frame is None:
+                raise ValueError("frame_2_inclusion_sets: invalid T-Matrix frame")
+            vp, vsv, _, _ = frame.evaluate(k_fl, rho_fl, visco, freq, angle_sym_plane)
+        except ValueError:
+            vp = np.zeros(k_fl.shape)
+            vsv = np.zeros(k_fl.shape)
+        return np.stack((vp, def_vp_vs_ratio * vsv), axis=1).flatten("F")
+
+    return fluid_fcn
+
+
+def _inclusion_sets(alpha1, alpha2, v1):
+    # alpha and v values should follow these conditions:
+    # - alphas are given in decreasing values
+    # - the sum of v's should add up to unity
+    if not (alpha1 > alpha2 and 0.0 < v1 <= 1.0):
+        raise ValueError(
+            "curvefit_t_matrix: alpha 1 must have higher value than alpha 2, and v1 must be a "
+            "positive fraction"
+        )
+    alpha = np.array([alpha1, alpha2]).reshape(1, 2)
+    v = np.array([v1, 1.0 - v1]).reshape(1, 2)
+    return alpha, v
@@ -0,0 +1,131 @@
+import os
+import pickle
+import tempfile
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .opt_subst_utilities import load_opt_params
+
+
+def run_multi_well_optimisation(
+    opt_function,
+    wells,
+    file_out_str: str = "multi_well_optimal_params.pkl",
+    n_workers=None,
+    return_logs: bool = True,
+    **opt_kwargs,
+):
+    """Run an optimisation function, e.g. t_matrix_optimisation_petec, patchy_cement_model_optimisation,
+    constant_cement_model_optimisation or friable_model_optimisation, for many wells, optionally in a process pool.
+
+    A failure in one well does not stop the others, it is recorded in the report. The optimal parameters of each well
+    are collected in one parameter store as they are finished: a pickle file with a dictionary of well name and the
+    parameter dictionary that the optimisation function saves, see save_opt_params.
+
+    Parameters
+    ----------
+    opt_function : callable
+        Optimisation function with file_out_str and well_name keywords. Must be picklable if n_workers > 1.
+    wells : dict or iterable
+        Inputs for each well, as a dictionary of well name and inputs, or an iterable (e.g. a generator) of
+        (well name, inputs) pairs. Inputs are a dictionary of keyword arguments or a tuple of positional arguments to
+        opt_function. Only the wells that are being optimised are held in memory when a generator is given.
+    file_out_str : str
+        Output file name for the parameter store (pickle format), by default 'multi_well_optimal_params.pkl'.
+    n_workers : int or None
+        Number of parallel worker processes. None or 1 runs the wells serially in the calling process.
+    return_logs : bool
+        Return the modelled and residual logs from opt_function for each well, by default True.
+    opt_kwargs : dict
+        Additional keywords to be passed to opt_function for all wells.
+
+    Returns
+    -------
+    tuple
+        logs, report : (dict, dict). logs: outputs of opt_function for each successful well if return_logs is True,
+        report: dictionary for each well with 'status' ('ok' or 'failed'), 'time' [s] and 'error' (traceback of
+        failed wells, None otherwise).
+    """
+    if isinstance(wells, dict):
+        wells = wells.items()
+
+    store = {}
+    logs = {}
+    report = {}
+
+    def _collect(well_name, result):
+        well_logs, opt_dict, error, run_time = result
+        report[well_name] = {
+            "status": "failed" if error else "ok",
+            "time": run_time,
+            "error": error,
+        }
+        if error:
+            return
+        store[well_name] = opt_dict
+        if return_logs:
+            logs[well_name] = well_logs
+        _write_store(store, file_out_str)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jobs = (
+            (opt_function, well_name, inputs, os.path.join(tmp_dir, f"{i}.pkl"))
+            for i, (well_name, inputs) in enumerate(wells)
+        )
+
+        if n_workers is None or n_workers <= 1:
+            for job in jobs:
+                _collect(job[1], _optimise_well(*job, return_logs, opt_kwargs))
+            return logs, report
+
+        def _collect_done(pending):
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                well_name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception:
+                    # The worker process was lost, e.g. due to memory
+                    result = (None, None, traceback.format_exc(), float("nan"))
+                _collect(well_name, result)
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            # Limit the number of wells in flight to bound peak memory for well generators
+            pending = {}
+            for job in jobs:
+                if len(pending) >= 2 * n_workers:
+                    _collect_done(pending)
+                pending[pool.submit(_optimise_well, *job, return_logs, opt_kwargs)] = (
+                    job[1]
+                )
+            while pending:
+                _collect_done(pending)
+
+    return logs, report
+
+
+def _optimise_well(opt_function, well_name, inputs, file_out, return_logs, opt_kwargs):
+    """Optimisation of a single well, with any error returned instead of raised."""
+    start = time.perf_counter()
+    try:
+        if isinstance(inputs, dict):
+            res = opt_function(
+                **inputs, **opt_kwargs, file_out_str=file_out, well_name=well_name
+            )
+        else:
+            res = opt_function(
+                *inputs, **opt_kwargs, file_out_str=file_out, well_name=well_name
+            )
+        opt_dict = load_opt_params(file_out)[2]
+    except Exception:
+        return None, None, traceback.format_exc(), time.perf_counter() - start
+    return res if return_logs else None, opt_dict, None, time.perf_counter() - start
+
+
+def _write_store(store, file_name):
+    """Write the parameter store, replacing the previous version only when the new one is complete."""
+    tmp_file = f"{file_name}.tmp"
+    with open(tmp_file, "wb") as file_out:
+        pickle.dump(store, file_out)
+    os.replace(tmp_file, file_name)
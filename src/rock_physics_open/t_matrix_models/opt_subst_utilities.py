@@ -3,10 +3,21 @@ import pickle
 
 # from scipy.optimize import minimize, Bounds
 import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 
 import numpy as np
+from scipy.interpolate import RBFInterpolator
 from scipy.optimize import curve_fit
 
+from rock_physics_open.equinor_utilities.gen_utilities import representative_subset
+
 
 def curve_fit_wrapper(x_init, opt_func, x_data, y_data, *args, **opt_kwargs):
     """Use in tests with scipy.optimize.minimize instead of curve_fit.
@@ -36,12 +47,46 @@ def curve_fit_wrapper(x_init, opt_func, x_data, y_data, *args, **opt_kwargs):
 
 
 def gen_opt_routine(
-    opt_function, x_data_orig, y_data, x_init, low_bound, high_bound, **opt_kwargs
+    opt_function,
+    x_data_orig,
+    y_data,
+    x_init,
+    low_bound,
+    high_bound,
+    jac_workers=None,
+    jac_processes=True,
+    subset_size=None,
+    fit_report=None,
+    memo_size=32,
+    surrogate_samples=None,
+    surrogate_seed=0,
+    n_starts=None,
+    start_workers=None,
+    start_seed=0,
+    start_tol=1e-3,
+    converged_starts=3,
+    **opt_kwargs,
 ):
     """
     This function is a lean method for running optimisation with the given opt_function in curve_fit. Predicted values,
     residuals to the observed values and optimal parameters are returned.
 
+    With subset_size, the optimisation is made in two stages: first for a representative subset of the samples, see
+    representative_subset, where each sample is weighted by the number of samples it represents, and then for all
+    samples, starting from the optimal parameters of the subset.
+
+    With surrogate_samples, a first optimisation is made against an emulator of opt_function: opt_function is run for
+    a Latin hypercube sample of the parameter bounds, and a radial basis function interpolation of the model values
+    between the parameter sets is optimised. The optimisation with opt_function is then started from the optimal
+    parameters of the emulator, and normally needs far fewer evaluations. If opt_function is not defined at the
+    optimal parameters of the emulator, or they are worse than the best of the parameter sets, the optimisation is
+    started from the best parameter set instead. The emulator error is reported in fit_report.
+
+    With n_starts, the optimisation is run from x_init and from a Latin hypercube sample of further start points
+    within the bounds, to avoid local minima. The result with the lowest RMS of residuals is returned. The remaining
+    starts are skipped when converged_starts of them have found the same optimal parameters as the best one. The
+    optimal parameters and RMS of each start, and the spread of the optimal parameters, are reported in fit_report.
+
     Parameters
     ----------
     opt_function : callable
@@ -56,6 +101,42 @@ def gen_opt_routine(
         parameter low bound
     high_bound : np.ndarray
         parameter high bound
+    jac_workers : int or None
+        number of parallel workers for the finite difference Jacobian. With more than one worker, the function
+        evaluations for the Jacobian columns are made concurrently, by default None (serial evaluation in curve_fit)
+    jac_processes : bool
+        use a process pool for the Jacobian, which is needed for functions that hold the GIL, such as the C++ T-Matrix
+        library. opt_function and x_data_orig must then be picklable. A thread pool is used if False, by default True
+    subset_size : int or None
+        target number of samples for a first optimisation on a subset of the samples, selected from the columns of
+        x_data_orig, by default None (all samples only)
+    fit_report : dict or None
+        dictionary that is updated with information on the optimisation: number of samples, number of function
+        evaluations and RMS of residuals for all samples, also for the subset optimisation if it is made. Also the
+        number of calls to opt_function (n_calls, and jac_calls for the parallel Jacobian), the number of cache
+        hits, the time spent in opt_function in total and per call [s], and the total time of the optimisation [s]
+    memo_size : int
+        number of the most recent function values that are kept, so that repeated evaluations for the same parameters
+        are not run again, by default 32. Rejected trial steps at the end of an optimisation can make the optimal
+        parameters one of the last 10 - 20 evaluations. 0 disables the cache
+    surrogate_samples : int or None
+        number of parameter sets to train an emulator of opt_function for a first optimisation, by default None (no
+        emulator). At least 10 times the number of parameters is recommended
+    surrogate_seed : int
+        seed for the parameter sets of the emulator, by default 0
+    n_starts : int or None
+        number of start points for the optimisation, including x_init, by default None (x_init only). Can not be
+        combined with surrogate_samples
+    start_workers : int or None
+        number of parallel worker processes for the start points. opt_function and x_data_orig must then be
+        picklable, by default None (serial optimisations)
+    start_seed : int
+        seed for the start points, by default 0
+    start_tol : float
+        largest difference in optimal parameters, relative to the parameter range, for two starts to have converged
+        to the same optimum, by default 1e-3
+    converged_starts : int
+        number of starts with the same optimum, including the best one, that stops the optimisation, by default 3
     opt_kwargs : dict
         optional meta-parameters to the optimisation function
 
@@ -67,38 +148,621 @@ def gen_opt_routine(
         y_res : residual values,
         opt_params : optimal model parameters.
     """
-    try:
-        opt_params, param_cov = curve_fit(
+    memo_function = None
+    if isinstance(opt_function, _MemoFunction):
+        # Function values cached by the caller, e.g. the start points checked by gen_opt_percentile_routine
+        memo_function = opt_function
+        opt_function = memo_function.opt_function
+    if n_starts is not None and n_starts > 1:
+        if surrogate_samples is not None:
+            raise ValueError(
+                "gen_opt_routine: n_starts can not be combined with surrogate_samples"
+            )
+        return _multi_start(
             opt_function,
             x_data_orig,
-            y_data.flatten("F"),
+            y_data,
             x_init,
-            bounds=(low_bound, high_bound),
-            method="trf",
-            loss="soft_l1",
-            **opt_kwargs,
+            low_bound,
+            high_bound,
+            n_starts,
+            start_workers,
+            start_seed,
+            start_tol,
+            converged_starts,
+            fit_report,
+            dict(
+                opt_kwargs,
+                jac_workers=jac_workers,
+                jac_processes=jac_processes,
+                subset_size=subset_size,
+                memo_size=memo_size,
+            ),
         )
 
-    except ValueError:
+    start_time = time.perf_counter()
+    report = {"n_samples": y_data.shape[0], "jac_calls": 0}
+    x_data_orig = np.asarray(x_data_orig)
+    if memo_function is None:
+        memo_function = _MemoFunction(opt_function, memo_size)
+    # Only the calls of this optimisation are reported for a cache given by the caller
+    calls_0 = memo_function.n_calls
+    hits_0 = memo_function.cache_hits
+    time_0 = memo_function.call_time
+
+    def _fit(x_data, y_fit, x_start, sigma=None):
+        """Single optimisation stage, returns the optimal parameters and the number of function evaluations."""
+        stage_kwargs = dict(opt_kwargs)
+        jacobian = None
+        if jac_workers is not None and jac_workers > 1 and "jac" not in opt_kwargs:
+            jacobian = ParallelJacobian(
+                opt_function,
+                x_data,
+                low_bound,
+                high_bound,
+                jac_workers,
+                use_processes=jac_processes,
+                rel_step=opt_kwargs.get("diff_step"),
+                y_data=y_fit.flatten("F"),
+                base_function=memo_function,
+            )
+            stage_kwargs["jac"] = jacobian
+        if sigma is not None:
+            stage_kwargs["sigma"] = sigma
+        try:
+            opt_params, _, info, _, _ = curve_fit(
+                memo_function,
+                x_data,
+                y_fit.flatten("F"),
+                x_start,
+                bounds=(low_bound, high_bound),
+                method="trf",
+                loss="soft_l1",
+                full_output=True,
+                **stage_kwargs,
+            )
+        except ValueError:
+            raise ValueError(
+                "gen_opt_routine: failed in optimisation step: {}".format(
+                    str(sys.exc_info())
+                )
+            )
+        finally:
+            if jacobian is not None:
+                jacobian.close()
+                report["jac_calls"] += jacobian.n_calls
+        return opt_params, info["nfev"]
+
+    def _residuals(opt_params):
+        # The final parameters are normally the last evaluation in the optimisation, and are found in the cache
+        y_pred = np.reshape(
+            memo_function(x_data_orig, *opt_params), y_data.shape, order="F"
+        )
+        return y_pred, y_pred - y_data
+
+    if surrogate_samples is not None:
+        x_init, surrogate_report = _surrogate_start(
+            memo_function,
+            x_data_orig,
+            y_data,
+            low_bound,
+            high_bound,
+            surrogate_samples,
+            surrogate_seed,
+        )
+        report.update(surrogate_report)
+
+    if subset_size is not None and y_data.shape[0] > subset_size:
+        idx_subset, counts = representative_subset([x_data_orig], subset_size)
+        # Each sample in the subset is weighted by the number of samples it represents
+        sigma = np.tile(1.0 / np.sqrt(counts), y_data.size // y_data.shape[0])
+        x_init, nfev = _fit(
+            x_data_orig[idx_subset], y_data[idx_subset], x_init, sigma=sigma
+        )
+        report.update(
+            {
+                "subset_size": idx_subset.shape[0],
+                "subset_nfev": nfev,
+                "subset_params": x_init,
+                "subset_rms": np.sqrt(np.mean(_residuals(x_init)[1] ** 2)),
+            }
+        )
+
+    opt_params, nfev = _fit(x_data_orig, y_data, x_init)
+    y_pred, y_res = _residuals(opt_params)
+    report.update(
+        {
+            "nfev": nfev,
+            "rms": np.sqrt(np.mean(y_res**2)),
+            "n_calls": memo_function.n_calls - calls_0,
+            "cache_hits": memo_function.cache_hits - hits_0,
+            "call_time": memo_function.call_time - time_0,
+            "time_per_call": (memo_function.call_time - time_0)
+            / max(memo_function.n_calls - calls_0, 1),
+            "total_time": time.perf_counter() - start_time,
+        }
+    )
+    if fit_report is not None:
+        fit_report.clear()
+        fit_report.update(report)
+
+    # Alternative implementation, not shown to improve results
+    # alt_opt_params = minimize(curve_fit_wrapper, x_init, args=(opt_function, x_data_orig, y_data.flatten('F')),
+    #                          bounds=Bounds(low_bound, high_bound), method='SLSQP', options={'maxiter': 10000})
+    # y_pred_1 = np.reshape(opt_function(x_data_orig, *alt_opt_params['x'], **opt_kwargs), y_data.shape, order='F')
+    # y_res_1 = y_pred_1 - y_data
+    # return y_pred_1, y_res_1, alt_opt_params['x']
+
+    return y_pred, y_res, opt_params
+
+
+def gen_opt_percentile_routine(
+    opt_function,
+    x_data_orig,
+    y_data,
+    bounds_fcn,
+    percentiles,
+    bisect=False,
+    percentile_tol=1.0,
+    **opt_kwargs,
+):
+    """Optimisation with gen_opt_routine, where the parameter bounds depend on a percentile of a log, e.g. the
+    minimum aspect ratio of an inclusion set that depends on the porosity. The lowest percentile that gives a valid
+    optimisation is searched for.
+
+    Each percentile is first checked by a single run of opt_function at the start point, and percentiles with
+    non-finite model values there are skipped without optimisation. The function values are cached across the
+    percentiles, so the optimisation does not run opt_function again at the checked start point. Percentiles are
+    tried in the order of the list, each started from the middle of its parameter bounds. With bisect=True, the
+    percentile is then refined by bisection between the last failing and the first valid percentile. Only the
+    bisection steps are started from the optimal parameters of the last valid percentile.
+
+    Parameters
+    ----------
+    opt_function : callable
+        function to optimise
+    x_data_orig : np.ndarray
+        input data to the function - independent variables
+    y_data : np.ndarray
+        results that the optimisation should match - dependent variables
+    bounds_fcn : callable
+        function that returns the parameter bounds (low_bound, high_bound) for a percentile
+    percentiles : list
+        percentiles in increasing order
+    bisect : bool
+        refine the percentile by bisection, by default False
+    percentile_tol : float
+        bisection is stopped when the percentile interval is less than this, by default 1.0
+    opt_kwargs : dict
+        optional meta-parameters to gen_opt_routine
+
+    Returns
+    -------
+    tuple
+        y_pred, y_res, opt_params, percentile : (np.ndarray, np.ndarray, np.ndarray, float).
+        y_pred : predicted values,
+        y_res : residual values,
+        opt_params : optimal model parameters,
+        percentile : percentile of the optimisation.
+
+    Raises
+    ------
+    ValueError
+        If there is no valid optimisation for any of the percentiles.
+    """
+    best = None
+    x_data_orig = np.asarray(x_data_orig)
+    memo_function = _MemoFunction(opt_function, opt_kwargs.get("memo_size", 32))
+
+    def _finite_start(x_init):
+        try:
+            return np.all(np.isfinite(memo_function(x_data_orig, *x_init)))
+        except ValueError:
+            return False
+
+    def _attempt(percentile):
+        low_bound, high_bound = bounds_fcn(percentile)
+        if not np.all(low_bound < high_bound):
+            return None
+        starts = [(low_bound + high_bound) / 2.0]
+        if best is not None:
+            starts.insert(0, np.clip(best[2], low_bound, high_bound))
+        # The optimisation requires finite model values at the start point
+        x_init = next((x for x in starts if _finite_start(x)), None)
+        if x_init is None:
+            return None
+        try:
+            return gen_opt_routine(
+                memo_function,
+                x_data_orig,
+                y_data,
+                x_init,
+                low_bound,
+                high_bound,
+                **opt_kwargs,
+            ) + (percentile,)
+        except ValueError:
+            return None
+
+    lower = None
+    for percentile in percentiles:
+        best = _attempt(percentile)
+        if best is not None:
+            break
+        lower = percentile
+    if best is None:
+        raise ValueError(
+            "gen_opt_percentile_routine: no valid optimisation for percentiles {}".format(
+                percentiles
+            )
+        )
+
+    if bisect and lower is not None:
+        upper = best[3]
+        while upper - lower > percentile_tol:
+            mid = (lower + upper) / 2.0
+            res = _attempt(mid)
+            if res is None:
+                lower = mid
+            else:
+                best = res
+                upper = mid
+
+    return best
+
+
+def _latin_hypercube(n_points, low_bound, high_bound, seed=None):
+    """Latin hypercube sample of n_points parameter sets within the bounds."""
+    rng = np.random.default_rng(seed)
+    low_bound = np.asarray(low_bound, dtype=float)
+    high_bound = np.asarray(high_bound, dtype=float)
+    n_params = low_bound.shape[0]
+    strata = np.stack([rng.permutation(n_points) for _ in range(n_params)], axis=1)
+    unit = (strata + rng.uniform(size=(n_points, n_params))) / n_points
+    return low_bound + unit * (high_bound - low_bound)
+
+
+def _surrogate_start(
+    opt_function, x_data, y_data, low_bound, high_bound, n_samples, seed
+):
+    """Start parameters for the optimisation from an emulator of opt_function, see gen_opt_routine.
+
+    Returns
+    -------
+    tuple
+        x_start, report : (np.ndarray, dict). Optimal parameters of the emulator, or the best parameter set if the
+        model is not defined there or is worse, and number of valid parameter sets, RMS error of the emulator for held
+        out parameter sets and at the optimal parameters, the optimal parameters of the emulator and whether the best
+        parameter set is used instead.
+    """
+    low_bound = np.asarray(low_bound, dtype=float)
+    high_bound = np.asarray(high_bound, dtype=float)
+    params = _latin_hypercube(n_samples, low_bound, high_bound, seed)
+    values = []
+    valid = []
+    for param in params:
+        try:
+            value = opt_function(x_data, *param)
+        except ValueError:
+            continue
+        if np.all(np.isfinite(value)):
+            values.append(value)
+            valid.append(param)
+    if len(valid) < low_bound.shape[0] + 2:
         raise ValueError(
-            "gen_opt_routine: failed in optimisation step: {}".format(
-                str(sys.exc_info())
+            "gen_opt_routine: too few valid parameter sets for the emulator: {}".format(
+                len(valid)
             )
         )
+    params = np.array(valid)
+    values = np.array(values)
+
+    def _scale(param):
+        return (np.atleast_2d(param) - low_bound) / (high_bound - low_bound)
+
+    # Error for parameter sets that are not used in the interpolation
+    n_test = max(len(valid) // 10, 1)
+    test_rbf = RBFInterpolator(_scale(params[n_test:]), values[n_test:])
+    cv_rms = np.sqrt(
+        np.mean((test_rbf(_scale(params[:n_test])) - values[:n_test]) ** 2)
+    )
+
+    rbf = RBFInterpolator(_scale(params), values)
+
+    def _emulator(x, *param):
+        return rbf(_scale(param))[0]
+
+    # Start from the best of the parameter sets
+    y_flat = y_data.flatten("F")
+    idx_best = np.argmin(np.sum((values - y_flat) ** 2, axis=1))
+    x_best = params[idx_best]
+    x_start = gen_opt_routine(
+        _emulator, x_data, y_data, x_best, low_bound, high_bound, memo_size=0
+    )[2]
+    try:
+        value = opt_function(x_data, *x_start)
+    except ValueError:
+        value = np.full_like(y_flat, np.nan, dtype=float)
+    rms = np.sqrt(np.mean((_emulator(x_data, *x_start) - value) ** 2))
+    # The emulator optimum can be in a region where the model is not defined, or be worse than the best parameter
+    # set, the optimisation is then started from the best parameter set
+    fallback = not np.all(np.isfinite(value)) or np.sum((value - y_flat) ** 2) > np.sum(
+        (values[idx_best] - y_flat) ** 2
+    )
+    return x_best if fallback else x_start, {
+        "surrogate_samples": len(valid),
+        "surrogate_cv_rms": cv_rms,
+        "surrogate_rms": rms,
+        "surrogate_params": x_start,
+        "surrogate_fallback": fallback,
+    }
+
+
+def _multi_start(
+    opt_function,
+    x_data,
+    y_data,
+    x_init,
+    low_bound,
+    high_bound,
+    n_starts,
+    n_workers,
+    seed,
+    start_tol,
+    converged_starts,
+    fit_report,
+    opt_kwargs,
+):
+    """Optimisation from several start points, see gen_opt_routine."""
+    start_time = time.perf_counter()
+    low_bound = np.asarray(low_bound, dtype=float)
+    high_bound = np.asarray(high_bound, dtype=float)
+    starts = np.vstack(
+        (
+            np.reshape(np.asarray(x_init, dtype=float), (1, -1)),
+            _latin_hypercube(n_starts - 1, low_bound, high_bound, seed),
+        )
+    )
+    jobs = (
+        (opt_function, x_data, y_data, x_start, low_bound, high_bound, opt_kwargs)
+        for x_start in starts
+    )
+    results = []
+    n_failed = 0
+
+    def _scale(params):
+        return (np.asarray(params) - low_bound) / (high_bound - low_bound)
+
+    def _converged():
+        """Optimal parameters of the starts, the best result and the number of starts that converged to it."""
+        start_params = np.array([res[0][2] for res in results])
+        best = min(results, key=lambda res: res[1]["rms"])
+        diff = np.abs(_scale(start_params) - _scale(best[0][2]))
+        return start_params, best, int(np.sum(np.max(diff, axis=1) <= start_tol))
+
+    def _collect(result):
+        """Add the result of a start, returns True when enough starts have converged to the best optimum."""
+        nonlocal n_failed
+        if result is None:
+            n_failed += 1
+            return False
+        results.append(result)
+        return _converged()[2] >= converged_starts
+
+    if n_workers is None or n_workers <= 1:
+        for job in jobs:
+            if _collect(_start_worker(*job)):
+                break
     else:
-        y_pred = np.reshape(
-            opt_function(x_data_orig, *opt_params), y_data.shape, order="F"
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            pending = {pool.submit(_start_worker, *job) for job in jobs}
+            stop = False
+            while pending and not stop:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stop = _collect(future.result()) or stop
+            # Starts that are already running are completed, but not used
+            for future in pending:
+                future.cancel()
+
+    if not results:
+        raise ValueError(
+            "gen_opt_routine: failed in optimisation from all {} start points".format(
+                n_starts
+            )
+        )
+    start_params, ((y_pred, y_res, opt_params), report), n_converged = _converged()
+    report.update(
+        {
+            "n_starts": len(results) + n_failed,
+            "n_failed_starts": n_failed,
+            "start_params": start_params,
+            "start_rms": np.array([res[1]["rms"] for res in results]),
+            "n_converged_starts": n_converged,
+            "param_spread": np.std(start_params, axis=0),
+            "total_time": time.perf_counter() - start_time,
+        }
+    )
+    if fit_report is not None:
+        fit_report.clear()
+        fit_report.update(report)
+    return y_pred, y_res, opt_params
+
+
+def _start_worker(
+    opt_function, x_data, y_data, x_start, low_bound, high_bound, opt_kwargs
+):
+    """Optimisation from a single start point, None is returned if it fails."""
+    report = {}
+    try:
+        res = gen_opt_routine(
+            opt_function,
+            x_data,
+            y_data,
+            x_start,
+            low_bound,
+            high_bound,
+            fit_report=report,
+            **opt_kwargs,
+        )
+    except ValueError:
+        return None
+    return res, report
+
+
+class _MemoFunction:
+    """Least recently used cache of opt_function(x_data, *params), with counters for calls, cache hits and time spent
+    in opt_function. Values are identified by the parameters and the x_data object, which is kept alive by the cache
+    entry."""
+
+    def __init__(self, opt_function, maxsize):
+        self.opt_function = opt_function
+        self.maxsize = maxsize
+        self.n_calls = 0
+        self.cache_hits = 0
+        self.call_time = 0.0
+        self._cache = OrderedDict()
+
+    def __call__(self, x_data, *params):
+        key = (id(x_data), np.asarray(params, dtype=float).tobytes())
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key][1]
+        self.n_calls += 1
+        start = time.perf_counter()
+        try:
+            res = self.opt_function(x_data, *params)
+        finally:
+            self.call_time += time.perf_counter() - start
+        if self.maxsize > 0:
+            self._cache[key] = (x_data, res)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return res
+
+
+# Function and inputs for the Jacobian in each worker process, set by the pool initializer so that they are only
+# transferred once per optimisation
+_JAC_WORKER = {}
+
+
+def _init_jac_worker(opt_function, x_data):
+    _JAC_WORKER["opt_function"] = opt_function
+    _JAC_WORKER["x_data"] = x_data
+
+
+def _jac_worker_eval(params):
+    return _JAC_WORKER["opt_function"](_JAC_WORKER["x_data"], *params)
+
+
+class ParallelJacobian:
+    """Two-point finite difference Jacobian for curve_fit, with the function evaluations for all parameters made
+    concurrently. The steps and differences follow the default numerical Jacobian in scipy.optimize.least_squares, so
+    that results match a run without it. Wall time per Jacobian is close to that of a single function evaluation when
+    there are as many workers as parameters.
+
+    Parameters
+    ----------
+    opt_function : callable
+        Function to optimise, called as opt_function(x_data, *params).
+    x_data : np.ndarray
+        Input data to the function - independent variables.
+    low_bound : np.ndarray
+        Parameter low bound.
+    high_bound : np.ndarray
+        Parameter high bound.
+    n_workers : int
+        Number of parallel workers.
+    use_processes : bool
+        Use a process pool instead of a thread pool, by default True.
+    rel_step : float or None
+        Relative step size, as diff_step in scipy.optimize.least_squares, by default None.
+    y_data : np.ndarray or None
+        Flattened observations. The differences are then taken of the residuals as in curve_fit, by default None.
+    base_function : callable or None
+        Function for the value at the parameters of the Jacobian, which is evaluated in the calling process. The
+        optimisation has normally just evaluated it, and a cached function, e.g. the one given to curve_fit, avoids
+        a repeated evaluation. By default None (opt_function).
+    """
+
+    def __init__(
+        self,
+        opt_function,
+        x_data,
+        low_bound,
+        high_bound,
+        n_workers,
+        use_processes=True,
+        rel_step=None,
+        y_data=None,
+        base_function=None,
+    ):
+        self.opt_function = opt_function
+        self.base_function = opt_function if base_function is None else base_function
+        self.x_data = x_data
+        self.low_bound = np.asarray(low_bound, dtype=float)
+        self.high_bound = np.asarray(high_bound, dtype=float)
+        self.rel_step = rel_step
+        self.y_data = 0.0 if y_data is None else y_data
+        if use_processes:
+            self._pool = ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_jac_worker,
+                initargs=(opt_function, x_data),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=n_workers)
+        self._use_processes = use_processes
+        self.n_calls = 0
+
+    def _steps(self, params):
+        sign = np.where(params >= 0, 1.0, -1.0)
+        default_step = (
+            np.finfo(float).eps ** 0.5 * sign * np.maximum(1.0, np.abs(params))
+        )
+        if self.rel_step is None:
+            h = default_step
+        else:
+            h = self.rel_step * sign * np.abs(params)
+            h = np.where((params + h) - params == 0, default_step, h)
+        # Step backwards where a forward step would leave the bounds
+        x_step = params + h
+        violated = (x_step < self.low_bound) | (x_step > self.high_bound)
+        fitting = np.abs(h) <= np.maximum(
+            params - self.low_bound, self.high_bound - params
         )
-        y_res = y_pred - y_data
+        h[violated & fitting] *= -1
+        return h
 
-        # Alternative implementation, not shown to improve results
-        # alt_opt_params = minimize(curve_fit_wrapper, x_init, args=(opt_function, x_data_orig, y_data.flatten('F')),
-        #                          bounds=Bounds(low_bound, high_bound), method='SLSQP', options={'maxiter': 10000})
-        # y_pred_1 = np.reshape(opt_function(x_data_orig, *alt_opt_params['x'], **opt_kwargs), y_data.shape, order='F')
-        # y_res_1 = y_pred_1 - y_data
-        # return y_pred_1, y_res_1, alt_opt_params['x']
+    def _submit(self, x_data, params):
+        if self._use_processes and x_data is self.x_data:
+            return self._pool.submit(_jac_worker_eval, params)
+        return self._pool.submit(self.opt_function, x_data, *params)
 
-        return y_pred, y_res, opt_params
+    def __call__(self, x_data, *params):
+        params = np.asarray(params, dtype=float)
+        h = self._steps(params)
+        x_steps = []
+        for i in range(params.shape[0]):
+            x_i = params.copy()
+            x_i[i] += h[i]
+            x_steps.append(x_i)
+        # Only the stepped parameters are evaluated in the pool
+        futures = [self._submit(x_data, x_i) for x_i in x_steps]
+        self.n_calls += len(futures)
+        f0 = self.base_function(x_data, *params) - self.y_data
+        # Same memory layout as the scipy Jacobian, which makes the optimisation steps identical
+        jac_t = np.empty((params.shape[0], f0.shape[0]))
+        for i, future in enumerate(futures):
+            jac_t[i] = ((future.result() - self.y_data) - f0) / (
+                x_steps[i][i] - params[i]
+            )
+        return jac_t.T
+
+    def close(self):
+        """Shut down the worker pool."""
+        self._pool.shutdown()
 
 
 def gen_mod_routine(opt_function, xdata_orig, ydata_shape, opt_params):
@@ -161,6 +825,57 @@ def gen_sub_routine(opt_function, xdata_orig, xdata_new, ydata, opt_params):
     return y_final, y_pred, y_res
 
 
+def gen_multi_sub_routine(
+    opt_function, xdata_orig, xdata_new, ydata, opt_params, frame=False
+):
+    """Substitution function as gen_sub_routine, for several sets of substituted input parameters, e.g. fluid
+    substitution to several fluids. The model for the original inputs is only run once.
+
+    With frame=True, opt_function returns a function that models the data from a set of input parameters, e.g. the
+    T-Matrix frame functions, where the fluid independent part of the model is calculated only once for the original
+    inputs and shared by all substitutions.
+
+    Parameters
+    ----------
+    opt_function : callable
+        Function to optimise, or function that returns a model function if frame is True.
+    xdata_orig : np.ndarray
+        Input data to the function step 1 - independent variables.
+    xdata_new : list of np.ndarray
+        Input data to the function step 2 - independent variables, one array for each substitution.
+    ydata : np.ndarray
+        Original observed values step 1.
+    opt_params : np.ndarray
+        Set of optimal parameters to model.
+    frame : bool, optional
+        opt_function returns a model function, by default False.
+
+    Returns
+    -------
+    tuple
+        y_final, y_pred, y_res : (list of np.ndarray, np.ndarray, np.ndarray).
+        Original observed data + difference in estimation between steps 0 and 1 for each substitution, y_pred -
+        modelled data, y_res - residuals.
+    """
+    if frame:
+        model = opt_function(xdata_orig, *opt_params)
+    else:
+
+        def model(x_data):
+            return opt_function(x_data, *opt_params)
+
+    # Estimation of initial values
+    y_pred = np.reshape(model(xdata_orig), ydata.shape, order="F")
+    y_res = y_pred - ydata
+    # Estimation steps for substituted properties
+    y_final = []
+    for x_new in xdata_new:
+        y_subst = np.reshape(model(x_new), ydata.shape, "F")
+        y_final.append(ydata + (y_subst - y_pred))
+
+    return y_final, y_pred, y_res
+
+
 def save_opt_params(
     opt_type: str,
     opt_params: np.ndarray,
@@ -1,7 +1,10 @@
+import inspect
+
 import numpy as np
 
 from .parse_t_matrix_inputs import parse_t_matrix_inputs
-from .t_matrix_vector import calc_pressure_vec, pressure_input_utility
+from .t_matrix_vector import calc_pressure_vec
+from .t_matrix_vector.t_matrix_compact import pressure_input_compact
 
 
 def run_t_matrix(
@@ -23,6 +26,9 @@ def run_t_matrix(
     pressure=None,
     scenario=None,
     fcn=None,
+    return_c_eff=False,
+    compact=False,
+    batch_pressure=False,
 ):
     """Function to run T-Matrix in different flavours, with or without pressure steps included.
     A frontend to running T-Matrix model, including testing of all input parameters in the parse_t_matrix_inputs.
@@ -65,11 +71,25 @@ def run_t_matrix(
         Pre-set scenarios for alpha, v and tau, by default None.
     fcn : callable, optional
         Function with which to run the T-Matrix model, by default None.
+    return_c_eff : bool, optional
+        Also return the effective stiffness tensors, which can be used for velocities at other angles with
+        velocity_vti_multi_angles_vec. Requires a T-Matrix function that can return them, i.e.
+        t_matrix_porosity_vectorised, by default False.
+    compact : bool, optional
+        Return the effective stiffness tensors as TITensor instead of (..., 6, 6) arrays, by default False.
+    batch_pressure : bool, optional
+        Return the results for the pressure steps as (N, number of pressure steps) arrays, by default False. The
+        inclusion parameters for all pressure steps are found first, and the T-Matrix function is run once with the
+        pressure steps stacked along the sample axis. This is an option for the output format only, it is not faster
+        than the loop over the pressure steps.
 
     Returns
     -------
     tuple
-        vp, vsv, vsh, rho: (np.ndarray, np.ndarray, np.ndarray, np.ndarray).
+        vp, vsv, vsh, rho: (np.ndarray, np.ndarray, np.ndarray, np.ndarray), followed by c_eff if return_c_eff
+        is True. With pressure steps, a list of vp, vsv and vsh for each step, rho, and c_eff for each step if
+        return_c_eff is True. With pressure steps and batch_pressure, vp, vsv, vsh and rho are (N, number of pressure
+        steps) arrays, followed by c_eff with the same leading dimensions if return_c_eff is True.
     """
     # Check all input parameters and make sure that they are on expected format and shape
     (
@@ -113,9 +133,18 @@ def run_t_matrix(
         fcn,
     )
 
+    c_eff_kwargs = {}
+    if return_c_eff:
+        if "return_c_eff" not in inspect.signature(fcn).parameters:
+            raise ValueError(
+                "run_t_matrix: return_c_eff requires a T-Matrix function that returns the effective stiffness "
+                "tensor, e.g. t_matrix_porosity_vectorised"
+            )
+        c_eff_kwargs = {"return_c_eff": True, "compact": compact}
+
     # If there are no pressure steps to consider the whole task can be assigned to the T-Matrix function
     if pressure is None:
-        vp, vsv, vsh, rho = fcn(
+        return fcn(
             k_min,
             mu_min,
             rho_min,
@@ -131,8 +160,8 @@ def run_t_matrix(
             angle,
             frac_inc_con,
             frac_inc_ani,
+            **c_eff_kwargs,
         )
-        return vp, vsv, vsh, rho
 
     # Pressure steps is mimicking depletion, and inclusion shape parameters can be changed
     # In Remy's implementation it is generally possible to have different alpha's and v's for connected and
@@ -145,17 +174,67 @@ def run_t_matrix(
     # that estimates matrix pressure sensitivity
     delta_pres = np.diff(pressure)
 
+    # Matrix properties needed as input to calc_pressure_vec, shared by all pressure steps
+    c0, s0, gd = pressure_input_compact(k_min, mu_min)
+
+    if batch_pressure:
+        # Inclusion parameters for all pressure steps, the relaxation time is not changed by the pressure steps
+        alpha_steps = [alpha]
+        v_steps = [v]
+        frac_steps = [frac_inc_con]
+        for d_p in delta_pres:
+            alpha, v, _, frac_inc_con = _pressure_step(
+                alpha,
+                v,
+                tau,
+                phi,
+                k_fl,
+                frac_inc_con,
+                frac_inc_ani,
+                ctrl_connected,
+                c0,
+                s0,
+                gd,
+                d_p,
+            )
+            alpha_steps.append(alpha)
+            v_steps.append(v)
+            frac_steps.append(frac_inc_con)
+        if "dedup" in inspect.signature(fcn).parameters:
+            c_eff_kwargs["dedup"] = True
+        res = fcn(
+            *(
+                np.tile(arr, pressure_steps)
+                for arr in (k_min, mu_min, rho_min, k_fl, rho_fl, phi, perm, visco)
+            ),
+            np.concatenate(alpha_steps),
+            np.concatenate(v_steps),
+            tau,
+            frequency,
+            angle,
+            np.concatenate(frac_steps),
+            np.tile(frac_inc_ani, pressure_steps),
+            **c_eff_kwargs,
+        )
+        # Samples are stacked step by step, gather them as (N, pressure steps)
+        idx_steps = np.arange(log_length).reshape(-1, 1) + log_length * np.arange(
+            pressure_steps
+        )
+        out = [np.reshape(arr, -1)[idx_steps] for arr in res[:4]]
+        if return_c_eff:
+            out.append(res[4][:, 0][idx_steps])
+        return tuple(out)
+
     # Predefine output vectors
     vp = np.zeros((log_length, pressure_steps))
     vs_v = np.zeros((log_length, pressure_steps))
     vs_h = np.zeros((log_length, pressure_steps))
     rho_b_est = np.zeros((log_length, pressure_steps))
 
-    # Matrix properties needed as input to calc_pressure_vec
-    c0, s0, gd = pressure_input_utility(k_min, mu_min, log_length)
+    c_eff_out = []
 
     for i in range(pressure_steps):
-        vp[:, i], vs_v[:, i], vs_h[:, i], rho_b_est[:, i] = fcn(
+        res = fcn(
             k_min,
             mu_min,
             rho_min,
@@ -171,63 +250,31 @@ def run_t_matrix(
             angle,
             frac_inc_con,
             frac_inc_ani,
+            **c_eff_kwargs,
+        )
+        # The vectorised T-Matrix function returns an extra dimension for the (here single) pressure step
+        vp[:, i], vs_v[:, i], vs_h[:, i], rho_b_est[:, i] = (
+            np.reshape(arr, log_length) for arr in res[:4]
         )
+        if return_c_eff:
+            c_eff_out.append(res[4][:, 0])
 
         if i != pressure_steps - 1:
-            # Need to check for extreme cases with all connected or all isolated
-            if ctrl_connected != 0:
-                v_con = v * (phi * frac_inc_con).reshape(log_length, 1)
-            else:
-                v_con = np.zeros(v.shape)
-            if ctrl_connected != 2:
-                v_iso = v * (phi * (1 - frac_inc_con)).reshape(log_length, 1)
-            else:
-                v_iso = np.zeros(v.shape)
-            alpha_con, v_con, alpha_iso, v_iso, tau, gamma = calc_pressure_vec(
+            alpha, v, tau, frac_inc_con = _pressure_step(
                 alpha,
-                alpha,
-                v_con,
-                v_iso,
+                v,
+                tau,
+                phi,
+                k_fl,
+                frac_inc_con,
+                frac_inc_ani,
+                ctrl_connected,
                 c0,
                 s0,
                 gd,
                 delta_pres[i],
-                tau,
-                np.zeros_like(tau),
-                k_fl,
-                ctrl_connected,
-                frac_inc_ani,
             )
 
-            # Post-process outputs from calc_pressure_vec to match required inputs to the T-Matrix function
-            # frac_inc_con, v and alpha are inputs that need to be updated
-            # As mentioned: assume that there is no distinction between alpha_con and alpha_iso, that could only
-            # happen if they differed from the start
-
-            # v_con, alpha_con or v_iso, alpha_iso can be returned as None from calc_pressure_vec
-            if ctrl_connected == 0:
-                v_con = np.zeros_like(v_iso)
-                alpha = alpha_iso
-            elif ctrl_connected == 2:
-                alpha = alpha_con
-                v_iso = np.zeros_like(v_con)
-            else:
-                alpha = alpha_con
-            # Don't divide by zero
-            idx_zero = phi == 0
-            if np.any(idx_zero):
-                v = v_con + v_iso
-                no_zero = np.sum(idx_zero)
-                v[~idx_zero, :] = v[~idx_zero, :] / phi[~idx_zero].reshape(
-                    log_length - no_zero, 1
-                )
-            else:
-                v = (v_con + v_iso) / phi.reshape(log_length, 1)
-
-            # frac_inc_con is close to a single value, only numerical difference in the range 10^-16, can safely
-            # take the average over the alphas to make it match expected input shape
-            frac_inc_con = np.mean(v_con / (v_con + v_iso), axis=1)
-
     # Return variables for each pressure step
     vp_out = []
     vs_v_out = []
@@ -240,4 +287,79 @@ def run_t_matrix(
         vp_out.append(vp[:, i])
         vs_v_out.append(vs_v[:, i])
         vs_h_out.append(vs_h[:, i])
+    if return_c_eff:
+        return vp_out + vs_v_out + vs_h_out + [rho_out] + c_eff_out
     return vp_out + vs_v_out + vs_h_out + [rho_out]
+
+
+def _pressure_step(
+    alpha,
+    v,
+    tau,
+    phi,
+    k_fl,
+    frac_inc_con,
+    frac_inc_ani,
+    ctrl_connected,
+    c0,
+    s0,
+    gd,
+    d_p,
+):
+    """Inclusion parameters alpha, v, tau and frac_inc_con after a pressure change d_p."""
+    log_length = phi.shape[0]
+    # Need to check for extreme cases with all connected or all isolated
+    if ctrl_connected != 0:
+        v_con = v * (phi * frac_inc_con).reshape(log_length, 1)
+    else:
+        v_con = np.zeros(v.shape)
+    if ctrl_connected != 2:
+        v_iso = v * (phi * (1 - frac_inc_con)).reshape(log_length, 1)
+    else:
+        v_iso = np.zeros(v.shape)
+    # The aspect ratios change in every pressure step, calc_pressure_vec makes a g-tensor cache for this step only
+    alpha_con, v_con, alpha_iso, v_iso, tau, gamma = calc_pressure_vec(
+        alpha,
+        alpha,
+        v_con,
+        v_iso,
+        c0,
+        s0,
+        gd,
+        d_p,
+        tau,
+        np.zeros_like(tau),
+        k_fl,
+        ctrl_connected,
+        frac_inc_ani,
+    )
+
+    # Post-process outputs from calc_pressure_vec to match required inputs to the T-Matrix function
+    # frac_inc_con, v and alpha are inputs that need to be updated
+    # As mentioned: assume that there is no distinction between alpha_con and alpha_iso, that could only
+    # happen if they differed from the start
+
+    # v_con, alpha_con or v_iso, alpha_iso can be returned as None from calc_pressure_vec
+    if ctrl_connected == 0:
+        v_con = np.zeros_like(v_iso)
+        alpha = alpha_iso
+    elif ctrl_connected == 2:
+        alpha = alpha_con
+        v_iso = np.zeros_like(v_con)
+    else:
+        alpha = alpha_con
+    # Don't divide by zero
+    idx_zero = phi == 0
+    if np.any(idx_zero):
+        v = v_con + v_iso
+        no_zero = np.sum(idx_zero)
+        v[~idx_zero, :] = v[~idx_zero, :] / phi[~idx_zero].reshape(
+            log_length - no_zero, 1
+        )
+    else:
+        v = (v_con + v_iso) / phi.reshape(log_length, 1)
+
+    # frac_inc_con is close to a single value, only numerical difference in the range 10^-16, can safely
+    # take the average over the alphas to make it match expected input shape
+    frac_inc_con = np.mean(v_con / (v_con + v_iso), axis=1)
+    return alpha, v, tau, frac_inc_con
@@ -1,5 +1,7 @@
+import functools
 import inspect
 import sys
+import threading
 from ctypes import c_double, c_int
 
 import numpy as np
@@ -42,6 +44,10 @@ def t_matrix_porosity_c_alpha_v(
     angle,
     frac_inc_con,
     frac_inc_ani,
+    dedup=False,
+    chunk_size=None,
+    n_workers=None,
+    use_processes=True,
 ):
     """This function can be called directly from top level, but the present recommendation is to go though the run_t_matrix
     in order to check inputs. It is used directly from the optimisation functions for efficiency. This gives direct
@@ -79,6 +85,18 @@ def t_matrix_porosity_c_alpha_v(
         float single value or array, fraction of inclusions that are connected
     frac_inc_ani: np.ndarray or float
         float single value or array, fraction of inclusions that are anisotropic
+    dedup: bool
+        evaluate the T-Matrix model only once for each unique combination of sample inputs and scatter the results
+        back, which is faster for logs with repeated samples, e.g. constant porosity and a few distinct mineral and
+        fluid compositions. Default False
+    chunk_size: int or None
+        number of samples per call to the C++ library. Each chunk writes its results directly into its part of the
+        output array. Default None, which gives one chunk, or one chunk per worker if n_workers is given
+    n_workers: int or None
+        number of parallel workers for the chunks. None or 1 runs the chunks serially. Default None
+    use_processes: bool
+        use a process pool for the chunks. The current build of the C++ library holds the GIL, so the chunks in a
+        thread pool (use_processes=False) are run one at a time, without speed-up. Default True
 
     Returns
     -------
@@ -175,36 +193,304 @@ def t_matrix_porosity_c_alpha_v(
         alpha = alpha.reshape((len(alpha), 1))
         v = v.reshape((len(alpha), 1))
 
+    # Only evaluate unique samples, all inputs must be given per sample
+    idx_restore = None
+    if dedup and alpha.shape[0] == log_length:
+        per_sample = [min_prop, fl_prop, phi, alpha, v]
+        if frac_inc_length == log_length:
+            per_sample.extend([frac_inc_con, frac_inc_ani])
+        idx_unique, idx_restore = gen_utilities.unique_rows(per_sample)
+        if idx_unique.shape[0] < log_length:
+            min_prop, fl_prop, phi, alpha, v = (
+                arr[idx_unique] for arr in (min_prop, fl_prop, phi, alpha, v)
+            )
+            if frac_inc_length == log_length:
+                frac_inc_con = frac_inc_con[idx_unique]
+                frac_inc_ani = frac_inc_ani[idx_unique]
+                frac_inc_length = idx_unique.shape[0]
+            log_length = idx_unique.shape[0]
+            out_arr = np.zeros((log_length, 4), dtype=float, order="C")
+        else:
+            idx_restore = None
+
     # Have to declare the number of alphas per sample, even if it is constant
     alpha_length_array = np.ones(log_length, dtype=c_int, order="c") * alpha.shape[1]
     alpha_length = alpha.shape[0]
 
     try:
-        tmatrix_porosity_noscenario(
-            out_arr,
-            log_length,
-            min_prop,
-            fl_prop,
-            phi,
-            alpha,
-            v,
-            alpha_length_array,
-            alpha_length,
-            frequency,
-            angle,
-            frac_inc_con,
-            frac_inc_ani,
-            frac_inc_length,
-        )
+        if (chunk_size is None and (n_workers is None or n_workers <= 1)) or (
+            alpha_length != log_length
+        ):
+            tmatrix_porosity_noscenario(
+                out_arr,
+                log_length,
+                min_prop,
+                fl_prop,
+                phi,
+                alpha,
+                v,
+                alpha_length_array,
+                alpha_length,
+                frequency,
+                angle,
+                frac_inc_con,
+                frac_inc_ani,
+                frac_inc_length,
+            )
+        else:
+            _run_chunks(
+                out_arr,
+                min_prop,
+                fl_prop,
+                phi,
+                alpha,
+                v,
+                alpha_length_array,
+                frequency,
+                angle,
+                frac_inc_con,
+                frac_inc_ani,
+                frac_inc_length,
+                chunk_size,
+                n_workers,
+                use_processes,
+            )
     except ValueError:
         # Get more info in case this goes wrong
         raise TypeError(
             "tMatrix:t_matrix_porosity_c_alpha_v: {0}".format(str(sys.exc_info()))
         )
 
+    if idx_restore is not None:
+        out_arr = out_arr[idx_restore]
+
     vp = out_arr[:, 0]
     vsv = out_arr[:, 1]
     vsh = out_arr[:, 2]
     rhob = out_arr[:, 3]
 
     return vp, vsv, vsh, rhob
+
+
+def _t_matrix_chunk(
+    frequency,
+    angle,
+    out_arr,
+    min_prop,
+    fl_prop,
+    phi,
+    alpha,
+    v,
+    alpha_length_array,
+    frac_inc_con,
+    frac_inc_ani,
+):
+    """Call the C++ library for one chunk of samples. The results are written into out_arr, which can be a view of
+    the full output array, and out_arr is returned."""
+    chunk_length = out_arr.shape[0]
+    tmatrix_porosity_noscenario(
+        out_arr,
+        chunk_length,
+        min_prop,
+        fl_prop,
+        phi,
+        alpha,
+        v,
+        alpha_length_array,
+        chunk_length,
+        frequency,
+        angle,
+        frac_inc_con,
+        frac_inc_ani,
+        frac_inc_con.shape[0],
+    )
+    return out_arr
+
+
+def _run_chunks(
+    out_arr,
+    min_prop,
+    fl_prop,
+    phi,
+    alpha,
+    v,
+    alpha_length_array,
+    frequency,
+    angle,
+    frac_inc_con,
+    frac_inc_ani,
+    frac_inc_length,
+    chunk_size,
+    n_workers,
+    use_processes,
+):
+    """Chunked, and optionally parallel, call to the C++ library. All per sample inputs are split in consecutive
+    chunks, and each chunk gets the matching rows of out_arr. In a thread pool the chunks write directly into
+    out_arr, results from a process pool are copied into their rows as they are finished."""
+    log_length = out_arr.shape[0]
+    if chunk_size is None:
+        chunk_size = -(-log_length // n_workers)
+    arrays = [out_arr, min_prop, fl_prop, phi, alpha, v, alpha_length_array]
+    frac_kwargs = {}
+    if frac_inc_length == log_length:
+        arrays.extend([frac_inc_con, frac_inc_ani])
+    else:
+        frac_kwargs = {"frac_inc_con": frac_inc_con, "frac_inc_ani": frac_inc_ani}
+
+    def _store(chunk_slice, chunk_result):
+        # Chunks that are run in the calling process already share memory with out_arr
+        if not np.shares_memory(chunk_result, out_arr):
+            out_arr[chunk_slice] = chunk_result
+
+    gen_utilities.run_in_chunks(
+        functools.partial(_t_matrix_chunk, frequency, angle, **frac_kwargs),
+        [np.ascontiguousarray(arr) for arr in arrays],
+        _store,
+        chunk_size=chunk_size,
+        n_workers=n_workers,
+        use_processes=use_processes,
+    )
+
+
+class PreparedTMatrixRun:
+    """Prepared run of the C++ T-Matrix library for repeated evaluations of the same log, e.g. in optimisation, where
+    only the inclusion parameters (and possibly the mineral properties) change between calls. The log inputs are
+    checked and packed in the format of the library once, and the inputs and outputs of the library are kept in
+    pre-allocated buffers. See t_matrix_porosity_c_alpha_v for a description of the inputs.
+
+    Parameters
+    ----------
+    k_min : np.ndarray
+        N length array, mineral bulk modulus [Pa]
+    mu_min : np.ndarray
+        N length array, mineral shear modulus [Pa]
+    rho_min : np.ndarray
+        N length array, mineral density [kg/m^3]
+    k_fl : np.ndarray
+        N length array, fluid bulk modulus [Pa]
+    rho_fl : np.ndarray
+        N length array, fluid density [kg/m^3]
+    phi : np.ndarray
+        N length array, porosity
+    perm : np.ndarray
+        N length array, permeability [mD]
+    visco : np.ndarray
+        N length array, viscosity [cP]
+    n_inclusions : int
+        number of inclusion sets
+    frequency : float
+        float single value, signal frequency [Hz]
+    angle : float
+        float single value, angle of symmetry plane (0 = HTI, 90 = VTI medium) [deg]
+
+    Attributes
+    ----------
+    lock : threading.Lock
+        Lock for callers that share the object between threads, as the buffers are reused by all evaluations.
+    """
+
+    def __init__(
+        self,
+        k_min,
+        mu_min,
+        rho_min,
+        k_fl,
+        rho_fl,
+        phi,
+        perm,
+        visco,
+        n_inclusions,
+        frequency,
+        angle,
+    ):
+        (
+            k_min,
+            mu_min,
+            rho_min,
+            k_fl,
+            rho_fl,
+            phi,
+            perm,
+            visco,
+        ) = gen_utilities.dim_check_vector(
+            (k_min, mu_min, rho_min, k_fl, rho_fl, phi, perm, visco),
+            force_type=np.dtype("float64"),
+        )
+        self.log_length = phi.shape[0]
+        self.frequency = float(frequency)
+        self.angle = float(angle)
+        self._min_prop = np.stack([k_min, mu_min, rho_min], axis=1)
+        self._fl_prop = np.stack([k_fl, rho_fl, perm, visco], axis=1)
+        self._phi = np.ascontiguousarray(phi)
+        self._alpha = np.zeros((self.log_length, n_inclusions), dtype=float, order="C")
+        self._v = np.zeros((self.log_length, n_inclusions), dtype=float, order="C")
+        self._alpha_length_array = (
+            np.ones(self.log_length, dtype=c_int, order="c") * n_inclusions
+        )
+        self._frac_inc_con = np.zeros(1, dtype=float)
+        self._frac_inc_ani = np.zeros(1, dtype=float)
+        self._out_arr = np.zeros((self.log_length, 4), dtype=float, order="C")
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def set_mineral(self, k_min, mu_min, rho_min):
+        """Replace the mineral properties, single values or N length arrays."""
+        self._min_prop[:, 0] = k_min
+        self._min_prop[:, 1] = mu_min
+        self._min_prop[:, 2] = rho_min
+
+    def evaluate(self, alpha, v, frac_inc_con, frac_inc_ani):
+        """Run the C++ library for a set of inclusion parameters.
+
+        Parameters
+        ----------
+        alpha : np.ndarray
+            M length vector or NxM array, aspect ratios for inclusions
+        v : np.ndarray
+            M length vector or NxM array, fraction of porosity with given aspect ratio
+        frac_inc_con : float
+            fraction of inclusions that are connected
+        frac_inc_ani : float
+            fraction of inclusions that are anisotropic
+
+        Returns
+        -------
+        tuple
+            Tuple of np.ndarrays. Vp, Vsv, Vsh, Rhob. The arrays are views of the output buffer, which is overwritten
+            by the next call.
+        """
+        self._alpha[:] = alpha
+        self._v[:] = v
+        self._frac_inc_con[0] = frac_inc_con
+        self._frac_inc_ani[0] = frac_inc_ani
+        try:
+            tmatrix_porosity_noscenario(
+                self._out_arr,
+                self.log_length,
+                self._min_prop,
+                self._fl_prop,
+                self._phi,
+                self._alpha,
+                self._v,
+                self._alpha_length_array,
+                self.log_length,
+                self.frequency,
+                self.angle,
+                self._frac_inc_con,
+                self._frac_inc_ani,
+                1,
+            )
+        except ValueError:
+            # Get more info in case this goes wrong
+            raise TypeError(
+                "tMatrix:PreparedTMatrixRun: {0}".format(str(sys.exc_info()))
+            )
+        return tuple(self._out_arr[:, i] for i in range(4))
@@ -2,10 +2,10 @@ import numpy as np
 
 from rock_physics_open.equinor_utilities import gen_utilities
 
-from .curvefit_t_matrix_exp import curvefit_t_matrix_exp
+from .curvefit_t_matrix_exp import curvefit_t_matrix_exp, frame_t_matrix_exp
 from .opt_subst_utilities import (
     gen_mod_routine,
-    gen_sub_routine,
+    gen_multi_sub_routine,
     load_opt_params,
     opt_param_info,
 )
@@ -28,6 +28,7 @@ def run_t_matrix_with_opt_params_exp(
     freq,
     f_name,
     fluid_sub=True,
+    frame_reuse=False,
 ):
     """Based on the input file with parameters for the optimally fitted model, the correct modelling version is run.
     Fluid substitution follows, in case it is selected. If not, the vp_sub and vs_sub will contain the same values as
@@ -39,10 +40,10 @@ def run_t_matrix_with_opt_params_exp(
         Effective in situ fluid bulk modulus [Pa].
     fl_rho_orig : np.ndarray
         Effective in situ fluid density [kg/m^3].
-    fl_k_sub : np.ndarray
-        Effective substituted fluid bulk modulus [Pa].
-    fl_rho_sub : np.ndarray
-        Effective substituted density [kg/m^3].
+    fl_k_sub : np.ndarray or list of np.ndarray
+        Effective substituted fluid bulk modulus [Pa]. A list gives substitution to several fluids.
+    fl_rho_sub : np.ndarray or list of np.ndarray
+        Effective substituted density [kg/m^3], a list if fl_k_sub is a list.
     vp : np.ndarray
         Compressional velocity [m/s].
     vs : np.ndarray
@@ -67,12 +68,21 @@ def run_t_matrix_with_opt_params_exp(
         File name for parameter file for optimal parameters.
     fluid_sub : bool
         Boolean parameter to perform fluid substitution.
+    frame_reuse : bool
+        Calculate the fluid independent part of the model (the T-Matrix frame) once and evaluate all fluids
+        against it, with the vectorised T-Matrix model. Default False, where the C++ library that the parameters
+        are calibrated with is run for each fluid. The two models only agree for a fraction of anisotropic
+        inclusions of 0.5, for other fractions vp differs by up to about 15 %, and a ValueError is raised. The
+        vectorised model also uses tau, which the C++ library ignores, so the results only agree for short
+        relaxation times: tau = 1e-7 s gives differences below 0.1 %, tau = 1e-3 s gives vs differences of up to
+        100 %.
 
     Returns
     -------
     tuple
         Tuple of np.ndarrays: vp and vs for pressure substituted case, vp, vs and density for fluid substituted case, vp and vs for
         optimal fitted model, vp and vs residuals (observed logs minus modelled values).
+        With a list of substituted fluids, the fluid substituted outputs are lists with one element per fluid.
     """
 
     opt_type, opt_params, opt_dict = load_opt_params(f_name)
@@ -82,7 +92,11 @@ def run_t_matrix_with_opt_params_exp(
         (phi, angle, perm, visco, tau, freq, 1.0)
     )
 
-    rho_sub = rhob + (fl_rho_sub - fl_rho_orig) * phi
+    multi_fluid = isinstance(fl_k_sub, (list, tuple))
+    if not multi_fluid:
+        fl_k_sub = [fl_k_sub]
+        fl_rho_sub = [fl_rho_sub]
+    rho_sub = [rhob + (fl_rho_i - fl_rho_orig) * phi for fl_rho_i in fl_rho_sub]
     # Set None values for inputs that will be defined in the different cases
     x_data_new = None
 
@@ -94,33 +108,52 @@ def run_t_matrix_with_opt_params_exp(
         axis=1,
     )
     if fluid_sub:
-        x_data_new = np.stack(
-            (phi, vsh, fl_k_sub, fl_rho_sub, angle, perm, visco, tau, freq, def_vpvs),
-            axis=1,
-        )
+        x_data_new = [
+            np.stack(
+                (phi, vsh, fl_k_i, fl_rho_i, angle, perm, visco, tau, freq, def_vpvs),
+                axis=1,
+            )
+            for fl_k_i, fl_rho_i in zip(fl_k_sub, fl_rho_sub)
+        ]
     rho_mod = (
         (1.0 - vsh) * opt_dict["rho_carb"] * scale_val["rho_carb"]
         + vsh * opt_dict["rho_sh"] * scale_val["rho_sh"]
     ) * (1.0 - phi) + phi * fl_rho_orig
 
     if fluid_sub:
-        v_sub, v_mod, v_res = gen_sub_routine(
-            opt_fcn, x_data, x_data_new, y_data, opt_params
+        if frame_reuse and opt_dict["f_ani"] != 0.5:
+            raise ValueError(
+                "run_t_matrix_with_opt_params_exp: frame_reuse requires a fraction of anisotropic inclusions of 0.5, "
+                "got {:.3g}, use frame_reuse=False".format(opt_dict["f_ani"])
+            )
+        # With frame reuse, the fluid independent part of the model is shared by all fluids
+        v_sub, v_mod, v_res = gen_multi_sub_routine(
+            frame_t_matrix_exp if frame_reuse else opt_fcn,
+            x_data,
+            x_data_new,
+            y_data,
+            opt_params,
+            frame=frame_reuse,
         )
-        vp_sub, vs_sub = [arr.flatten() for arr in np.split(v_sub, 2, axis=1)]
+        vp_sub = [v_sub_i[:, 0].flatten() for v_sub_i in v_sub]
+        vs_sub = [v_sub_i[:, 1].flatten() for v_sub_i in v_sub]
         vp_mod, vs_mod = [arr.flatten() for arr in np.split(v_mod, 2, axis=1)]
         vp_res, vs_res = [arr.flatten() for arr in np.split(v_res, 2, axis=1)]
     else:
         v_mod = gen_mod_routine(opt_fcn, x_data, y_shape, opt_params)
         vp_mod, vs_mod = [arr.flatten() for arr in np.split(v_mod, 2, axis=1)]
-        vp_sub = vp
-        vs_sub = vs
+        vp_sub = [vp for _ in rho_sub]
+        vs_sub = [vs for _ in rho_sub]
         vp_res = vp_mod - vp
         vs_res = vs_mod - vs
 
     rho_res = rho_mod - rhob
-    ai_sub = vp_sub * rho_sub
-    vpvs_sub = vp_sub / vs_sub
+    ai_sub = [vp_i * rho_i for vp_i, rho_i in zip(vp_sub, rho_sub)]
+    vpvs_sub = [vp_i / vs_i for vp_i, vs_i in zip(vp_sub, vs_sub)]
+    if not multi_fluid:
+        vp_sub, vs_sub, rho_sub, ai_sub, vpvs_sub = (
+            arr[0] for arr in (vp_sub, vs_sub, rho_sub, ai_sub, vpvs_sub)
+        )
 
     return (
         vp_sub,
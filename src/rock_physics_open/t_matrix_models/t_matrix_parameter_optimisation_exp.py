@@ -2,8 +2,12 @@ import numpy as np
 
 from rock_physics_open.equinor_utilities import gen_utilities
 
-from .curvefit_t_matrix_exp import curvefit_t_matrix_exp
-from .opt_subst_utilities import gen_opt_routine, opt_param_info, save_opt_params
+from .curvefit_t_matrix_exp import PreparedCurveFitExp
+from .opt_subst_utilities import (
+    gen_opt_percentile_routine,
+    opt_param_info,
+    save_opt_params,
+)
 from .t_matrix_parameter_optimisation_min import DEF_VP_VS_RATIO
 
 
@@ -23,6 +27,7 @@ def t_matrix_optimisation_exp(
     file_out_str: str = "opt_params_exp.pkl",
     display_results: bool = False,
     well_name: str = "Unknown well",
+    bisect_percentile: bool = False,
     **opt_kwargs,
 ):
     """T-Matrix optimisation adapted to an exploration setting, where detailed well information is generally not known.
@@ -60,8 +65,13 @@ def t_matrix_optimisation_exp(
         D isplay optimal parameters in a window after run.
     well_name :
         Name of well to be displayed in info box title.
+    bisect_percentile :
+        Refine the porosity percentile for the minimum aspect ratio of the second inclusion set by bisection, see
+        gen_opt_percentile_routine.
     opt_kwargs :
-        Additional keywords to be passed to optimisation function
+        Additional keywords to be passed to optimisation function, e.g. surrogate_samples and fit_report for a first
+        optimisation against an emulator of the T-Matrix model, or n_starts and start_workers for optimisations from
+        several start points, see gen_opt_routine.
 
     Returns
     -------
@@ -70,8 +80,6 @@ def t_matrix_optimisation_exp(
     """
     # 1. Preparation that is independent of search for minimum possible aspect ratio for second inclusion set
 
-    # Optimisation function for selected parameters
-    opt_fun = curvefit_t_matrix_exp
     # rho_min = (rhob - por * rho_fl) / (1 - por)
     # EXP adapted inputs: include fluid data and other params in x_data
     # expand single value parameters to match logs length
@@ -81,6 +89,9 @@ def t_matrix_optimisation_exp(
     x_data = np.stack(
         (por, vsh, k_fl, rho_fl, angle, k_r, eta_f, tau, freq, def_vpvs), axis=1
     )
+    # Optimisation function for selected parameters, the log inputs are prepared once for all evaluations in the
+    # optimisation
+    opt_fun = PreparedCurveFitExp(x_data)
     # Set weight to vs to give vp and vs similar influence on optimisation
     y_data = np.stack([vp, vs * DEF_VP_VS_RATIO], axis=1)
 
@@ -88,63 +99,60 @@ def t_matrix_optimisation_exp(
     # 50% of inclusions. Minimum aspect ratio is linked to the porosity, and the most conservative estimate is to use
     # the maximum value. This is likely to deteriorate the optimisation results, so a search for a more appropriate
     # value that still produces valid results is made
-    percentiles = [50, 75, 80, 85, 90, 95, 99, 100]
-    valid_result = False
-    vel_mod = None
-    vel_res = None
-    opt_params = None
     scale_val = opt_param_info()[1]
-    while not valid_result and percentiles:
-        try:
-            # Make sure that parameters are not in conflict with T Matrix assumptions
-            min_v1 = 0.5
-            max_por = np.percentile(por, percentiles[0])
-            min_a2 = (1.0 - min_v1) * max_por
-            # Test with all parameters in the range 0.0 - 1.0
-            # Params:      f_ani f_con a1 a2 v1 k_carb mu_carb rho_carb k_sh mu_sh rho_sh
-            lower_bound = np.array(
-                [
-                    0.0,
-                    0.0,
-                    0.5,
-                    min_a2,
-                    min_v1,  # f_ani f_con a1 a2 v1
-                    35.0 / scale_val["k_carb"],
-                    30.0 / scale_val["mu_carb"],
-                    2650.0 / scale_val["rho_carb"],  # k_carb, mu_carb, rho_carb
-                    15.0 / scale_val["k_sh"],
-                    7.0 / scale_val["mu_sh"],
-                    2500.0 / scale_val["rho_sh"],
-                ],
-                dtype=float,
-            )  # k_sh, mu_sh, rho_sh
-            upper_bound = np.array(
-                [
-                    1.0,
-                    1.0,
-                    1.0,
-                    0.30,
-                    1.0,  # f_ani f_con a1 a2 v1
-                    1.0,
-                    1.0,
-                    1.0,  # k_carb, mu_carb, rho_carb
-                    1.0,
-                    1.0,
-                    1.0,
-                ],
-                dtype=float,
-            )  # k_sh, mu_sh, rho_sh
-            x0 = (upper_bound + lower_bound) / 2.0
-            # Optimisation step without fluid substitution
-            vel_mod, vel_res, opt_params = gen_opt_routine(
-                opt_fun, x_data, y_data, x0, lower_bound, upper_bound, **opt_kwargs
-            )
-            valid_result = True
-        except ValueError:
-            percentiles.pop(0)
-            valid_result = False
+    # Make sure that parameters are not in conflict with T Matrix assumptions
+    min_v1 = 0.5
 
-    if not valid_result:
+    def _bounds(percentile):
+        min_a2 = (1.0 - min_v1) * np.percentile(por, percentile)
+        # Test with all parameters in the range 0.0 - 1.0
+        # Params:      f_ani f_con a1 a2 v1 k_carb mu_carb rho_carb k_sh mu_sh rho_sh
+        lower_bound = np.array(
+            [
+                0.0,
+                0.0,
+                0.5,
+                min_a2,
+                min_v1,  # f_ani f_con a1 a2 v1
+                35.0 / scale_val["k_carb"],
+                30.0 / scale_val["mu_carb"],
+                2650.0 / scale_val["rho_carb"],  # k_carb, mu_carb, rho_carb
+                15.0 / scale_val["k_sh"],
+                7.0 / scale_val["mu_sh"],
+                2500.0 / scale_val["rho_sh"],
+            ],
+            dtype=float,
+        )  # k_sh, mu_sh, rho_sh
+        upper_bound = np.array(
+            [
+                1.0,
+                1.0,
+                1.0,
+                0.30,
+                1.0,  # f_ani f_con a1 a2 v1
+                1.0,
+                1.0,
+                1.0,  # k_carb, mu_carb, rho_carb
+                1.0,
+                1.0,
+                1.0,
+            ],
+            dtype=float,
+        )  # k_sh, mu_sh, rho_sh
+        return lower_bound, upper_bound
+
+    try:
+        # Optimisation step without fluid substitution
+        vel_mod, vel_res, opt_params, _ = gen_opt_percentile_routine(
+            opt_fun,
+            x_data,
+            y_data,
+            _bounds,
+            [50, 75, 80, 85, 90, 95, 99, 100],
+            bisect=bisect_percentile,
+            **opt_kwargs,
+        )
+    except ValueError:
         raise ValueError(
             f"{__file__}: unable to find stable value for T Matrix optimisation, second inclusion"
         )
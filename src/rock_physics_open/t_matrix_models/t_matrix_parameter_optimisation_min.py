@@ -2,8 +2,8 @@ import numpy as np
 
 from rock_physics_open.equinor_utilities import gen_utilities
 
-from .curvefit_t_matrix_min import curve_fit_2_inclusion_sets
-from .opt_subst_utilities import gen_opt_routine, save_opt_params
+from .curvefit_t_matrix_min import PreparedCurveFit2InclusionSets
+from .opt_subst_utilities import gen_opt_percentile_routine, save_opt_params
 
 # Trade-off between calcite, dolomite and quartz, vs is weighted by this in order to make it count as much as vp
 # in the optimisation
@@ -28,6 +28,7 @@ def t_matrix_optimisation_petec(
     file_out_str: str = "opt_params_min.pkl",
     display_results: bool = False,
     well_name: str = "Unknown well",
+    bisect_percentile: bool = False,
     **opt_kwargs,
 ):
     """T-Matrix optimisation adapted to a case with detailed information available, such as in a development or production
@@ -70,8 +71,13 @@ def t_matrix_optimisation_petec(
         Display optimal parameters in a window after run.
     well_name:
         Name of well to be displayed in info box title.
+    bisect_percentile:
+        Refine the porosity percentile for the minimum aspect ratio of the second inclusion set by bisection, see
+        gen_opt_percentile_routine.
     opt_kwargs:
-        Additional keywords to be passed to optimisation function
+        Additional keywords to be passed to optimisation function, e.g. surrogate_samples and fit_report for a first
+        optimisation against an emulator of the T-Matrix model, or n_starts and start_workers for optimisations from
+        several start points, see gen_opt_routine.
 
     Returns
     -------
@@ -80,8 +86,6 @@ def t_matrix_optimisation_petec(
     """
     # 1. Preparation that is independent of search for minimum possible aspect ratio for second inclusion set
 
-    # Optimisation function for selected parameters, with effective mineral properties known and 2 inclusion sets
-    opt_fun = curve_fit_2_inclusion_sets
     rhob_mod = rho_min * (1 - por) + rho_fl * por
     rhob_res = rhob - rhob_mod
     # PETEC adapted inputs: include fluid data and other params in x_data
@@ -105,6 +109,9 @@ def t_matrix_optimisation_petec(
         ),
         axis=1,
     )
+    # Optimisation function for selected parameters, with effective mineral properties known and 2 inclusion sets.
+    # The log inputs are prepared once for all evaluations in the optimisation
+    opt_fun = PreparedCurveFit2InclusionSets(x_data)
     # Set weight to vs to give vp and vs similar influence on optimisation
     y_data = np.stack([vp, vs * DEF_VP_VS_RATIO], axis=1)
 
@@ -112,32 +119,29 @@ def t_matrix_optimisation_petec(
     # 50% of inclusions. Minimum aspect ratio is linked to the porosity, and the most conservative estimate is to use
     # the maximum value. This is likely to deteriorate the optimisation results, so a search for a more appropriate
     # value that still produces valid results is made
-    percentiles = [50, 75, 80, 85, 90, 95, 99, 100]
-    valid_result = False
-    vel_mod = None
-    vel_res = None
-    opt_params = None
-    while not valid_result and percentiles:
-        try:
-            # Make sure that parameters are not in conflict with T Matrix assumptions
-            min_v1 = 0.5
-            max_por = np.percentile(por, percentiles[0])
-            min_a2 = (1.0 - min_v1) * max_por
-            # Test with all parameters in the range 0.0 - 1.0 for best optimiser performance
-            # Params:               f_ani f_con a1   a2    v1
-            lower_bound = np.array([0.0, 0.0, 0.5, min_a2, min_v1], dtype=float)
-            upper_bound = np.array([1.0, 1.0, 1.0, 0.30, 1.0], dtype=float)
-            x0 = (upper_bound + lower_bound) / 2.0
-            # Optimisation step without fluid substitution
-            vel_mod, vel_res, opt_params = gen_opt_routine(
-                opt_fun, x_data, y_data, x0, lower_bound, upper_bound, **opt_kwargs
-            )
-            valid_result = True
-        except ValueError:
-            percentiles.pop(0)
-            valid_result = False
+    # Make sure that parameters are not in conflict with T Matrix assumptions
+    min_v1 = 0.5
 
-    if not valid_result:
+    def _bounds(percentile):
+        min_a2 = (1.0 - min_v1) * np.percentile(por, percentile)
+        # Test with all parameters in the range 0.0 - 1.0 for best optimiser performance
+        # Params:               f_ani f_con a1   a2    v1
+        lower_bound = np.array([0.0, 0.0, 0.5, min_a2, min_v1], dtype=float)
+        upper_bound = np.array([1.0, 1.0, 1.0, 0.30, 1.0], dtype=float)
+        return lower_bound, upper_bound
+
+    try:
+        # Optimisation step without fluid substitution
+        vel_mod, vel_res, opt_params, _ = gen_opt_percentile_routine(
+            opt_fun,
+            x_data,
+            y_data,
+            _bounds,
+            [50, 75, 80, 85, 90, 95, 99, 100],
+            bisect=bisect_percentile,
+            **opt_kwargs,
+        )
+    except ValueError:
         raise ValueError(
             f"{__file__}: unable to find stable value for T Matrix optimisation, second inclusion"
         )
@@ -1,12 +1,23 @@
-from .array_functions import array_inverse, array_matrix_mult
+from .array_functions import array_inverse, array_matrix_mult, array_solve
 from .calc_pressure import calc_pressure_vec
+from .compact_tensor import TITensor, as_compact
+from .g_tensor import GTensorCache
 from .pressure_input import pressure_input_utility
+from .t_matrix_frame import TMatrixFrame, t_matrix_frame_vectorised
 from .t_matrix_vec import t_matrix_porosity_vectorised
+from .velocity_vti_angles import velocity_vti_multi_angles_vec
 
 __all__ = [
+    "GTensorCache",
+    "TITensor",
+    "TMatrixFrame",
     "array_inverse",
     "array_matrix_mult",
+    "array_solve",
+    "as_compact",
     "calc_pressure_vec",
     "pressure_input_utility",
+    "t_matrix_frame_vectorised",
     "t_matrix_porosity_vectorised",
+    "velocity_vti_multi_angles_vec",
 ]
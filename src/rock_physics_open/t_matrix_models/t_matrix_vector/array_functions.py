@@ -1,13 +1,40 @@
 import numpy as np
 
 
-def array_inverse(a: np.ndarray) -> np.ndarray:
-    """Inverse of higher order array (3 dim) using linalg inv routine.
+def _check_square_stack(*args: np.ndarray) -> None:
+    """Check that all inputs are nxmxm numpy arrays with the same n and m."""
+    if not all(
+        isinstance(arg, np.ndarray) and arg.ndim == 3 and arg.shape[1] == arg.shape[2]
+        for arg in args
+    ):
+        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
+    if len({arg.shape for arg in args}) > 1:
+        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
+
+
+def _result_type(*args: np.ndarray) -> np.dtype:
+    """Result is complex128 if any of the inputs are complex, float64 otherwise."""
+    return (
+        np.dtype("complex128")
+        if any(np.iscomplexobj(arg) for arg in args)
+        else np.dtype("float64")
+    )
+
+
+def array_inverse(
+    a: np.ndarray, out: np.ndarray | None = None, check: bool = True
+) -> np.ndarray:
+    """Inverse of higher order array (3 dim) using linalg inv routine. All n matrices are inverted in one stacked
+    call.
 
     Parameters
     ----------
     a : np.ndarray
         An nxmxm numpy array.
+    out : np.ndarray, optional
+        An nxmxm array to store the result in, by default None.
+    check : bool, optional
+        Check the shape of the input, by default True. Internal calls with known shapes can skip the check.
 
     Returns
     -------
@@ -19,16 +46,67 @@ def array_inverse(a: np.ndarray) -> np.ndarray:
     ValueError
         If input of wrong shape.
     """
-    if not (a.ndim == 3 and a.shape[1] == a.shape[2]):
-        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
+    if check:
+        _check_square_stack(a)
+
+    if out is None:
+        return np.linalg.inv(a)
+    out[...] = np.linalg.inv(a)
+    return out
+
+
+def array_solve(
+    a: np.ndarray, b: np.ndarray, out: np.ndarray | None = None, check: bool = True
+) -> np.ndarray:
+    """Solve a[i, :, :] @ x[i, :, :] = b[i, :, :] for all i. This is equivalent to, and more accurate and faster than
+    array_matrix_mult(array_inverse(a), b).
+
+    Parameters
+    ----------
+    a : np.ndarray
+        An nxmxm numpy array.
+    b : np.ndarray
+        An nxmxm numpy array.
+    out : np.ndarray, optional
+        An nxmxm array to store the result in, by default None.
+    check : bool, optional
+        Check the shape of the inputs, by default True. Internal calls with known shapes can skip the check.
+
+    Returns
+    -------
+    np.ndarray
+        An nxmxm array where [i, :, :] contains inv(a[i, :, :]) @ b[i, :, :].
+
+    Raises
+    ------
+    ValueError
+        If mismatch in input shape/dimension.
+    """
+    if check:
+        _check_square_stack(a, b)
 
-    return np.array([np.linalg.inv(x) for x in a])
+    if out is None:
+        return np.linalg.solve(a, b)
+    out[...] = np.linalg.solve(a, b)
+    return out
 
 
-def array_matrix_mult(*args: np.ndarray) -> np.ndarray:
+def array_matrix_mult(
+    *args: np.ndarray, out: np.ndarray | None = None, check: bool = True
+) -> np.ndarray:
     """3-dim arrays are matrix multiplied args[j][i, :, :] @ args[j+1][i, :, :].
     Input args should all be numpy arrays of shape nxmxm.
 
+    Parameters
+    ----------
+    args : np.ndarray
+        nxmxm numpy arrays.
+    out : np.ndarray, optional
+        An nxmxm array to store the result in, by default None. It must have the result type of the product, and it
+        can not be one of the inputs.
+    check : bool, optional
+        Check the shape of the inputs, by default True. Internal calls with known shapes can skip the check.
+
     Returns
     -------
     np.ndarray
@@ -40,36 +118,17 @@ def array_matrix_mult(*args: np.ndarray) -> np.ndarray:
         If input is not a list or tuple.
     ValueError
         If mismatch in input shape/dimension.
-    ValueError
-        If mismatch in input shape/dimension.
     """
-    if not isinstance(args, (list, tuple)):
-        raise ValueError(f"{__name__}: inputs must be list or tuple")
+    if check:
+        if not isinstance(args, (list, tuple)):
+            raise ValueError(f"{__name__}: inputs must be list or tuple")
+        _check_square_stack(*args)
     if not len(args) > 1:
         return args[0]
 
-    arg_shape = []
-    arg_type = []
-    for i in range(len(args)):
-        if not (
-            isinstance(args[i], np.ndarray)
-            and args[i].ndim == 3
-            and args[i].shape[1] == args[i].shape[2]
-        ):
-            raise ValueError(
-                f"{__name__}: mismatch in inputs variables dimension/shape"
-            )
-        arg_shape.append(args[i].shape)
-        arg_type.append(args[i].dtype)
-    arg_shape = np.array(arg_shape)
-    arg_type = np.array(arg_type)
-    if not np.all(arg_shape[:, 0] == arg_shape[0, 0]):
-        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
-    out_type = "complex128" if np.any(arg_type == np.dtype("complex128")) else "float64"
-
+    out_type = _result_type(*args)
     x = args[0]
+    for i in range(1, len(args) - 1):
+        x = np.matmul(x, args[i], dtype=out_type)
 
-    for i in range(1, len(args)):
-        x = np.einsum("...ij,...jk->...ik", x, args[i], dtype=out_type)
-
-    return x
+    return np.matmul(x, args[-1], out=out, dtype=out_type)
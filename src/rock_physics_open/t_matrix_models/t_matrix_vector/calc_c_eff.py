@@ -77,7 +77,11 @@ def calc_c_eff_vec(c0, c1, gd, t, t_bar, v, frac_aniso):
 
     c1 = c1 + np.sum(frac_aniso * v * t + (1.0 - frac_aniso) * v * t_bar, axis=3)
 
-    return c0 + array_matrix_mult(c1, array_inverse(i4 + array_matrix_mult(gd, c1)))
+    return c0 + array_matrix_mult(
+        c1,
+        array_inverse(i4 + array_matrix_mult(gd, c1, check=False), check=False),
+        check=False,
+    )
 
 
 def calc_c_eff_visco_vec(
@@ -141,23 +145,29 @@ def calc_c_eff_visco_vec(
         X-tensor of the connected inclusions (6x6x(numbers of inclusions) matrix).
     gd : np.ndarray
         Correlation function (6x6 matrix).
-    frequency : float
-        Frequency under consideration.
+    frequency : float or np.ndarray
+        Frequency under consideration, single value or vector of frequencies. All the other inputs are
+        frequency independent and are shared by all frequencies.
     frac_ani : np.ndarray
         Fraction of anisotropic inclusions.
 
     Returns
     -------
     np.ndarray
-        Effective stiffness tensor.
+        Effective stiffness tensor, (nx6x6) for a single frequency, (nx(number of frequencies)x6x6) for a frequency
+        vector.
     """
     dr = k_r / eta_f
 
-    omega = 2 * np.pi * frequency
-    k = omega / vs
-    theta = calc_theta_vec(v, omega, gamma, tau, kd_uuvv, dr, k, kappa, kappa_f)
-    z, z_bar = calc_z_vec(s0, td, td_bar, omega, gamma, v * frac_ani, tau)
-    t = calc_t_vec(td, theta, x, z, omega, gamma, tau, kappa_f)
-    t_bar = calc_t_vec(td_bar, theta, x_bar, z_bar, omega, gamma, tau, kappa_f)
+    def _c_eff(freq):
+        omega = 2 * np.pi * freq
+        k = omega / vs
+        theta = calc_theta_vec(v, omega, gamma, tau, kd_uuvv, dr, k, kappa, kappa_f)
+        z, z_bar = calc_z_vec(s0, td, td_bar, omega, gamma, v * frac_ani, tau)
+        t = calc_t_vec(td, theta, x, z, omega, gamma, tau, kappa_f)
+        t_bar = calc_t_vec(td_bar, theta, x_bar, z_bar, omega, gamma, tau, kappa_f)
+        return calc_c_eff_vec(c0, c1, gd, t, t_bar, v, frac_ani)
 
-    return calc_c_eff_vec(c0, c1, gd, t, t_bar, v, frac_ani)
+    if np.ndim(frequency) == 0:
+        return _c_eff(frequency)
+    return np.stack([_c_eff(freq) for freq in np.asarray(frequency)], axis=1)
@@ -1,11 +1,13 @@
 import numpy as np
 
 from .array_functions import array_inverse, array_matrix_mult
-from .g_tensor import g_tensor_vec
+from .g_tensor import _dense_g_cache
 from .iso_av import iso_av_vec
 
 
-def calc_isolated_part_vec(c0, s_0, kappa_f, alpha, v, case_iso, frac_ani):
+def calc_isolated_part_vec(
+    c0, s_0, kappa_f, alpha, v, case_iso, frac_ani, g_cache=None
+):
     """
     Returns the first order correction tensor: sum of the concentrations and
     t-matrices of the isolated porosity (6x6 matrix).
@@ -29,6 +31,9 @@ def calc_isolated_part_vec(c0, s_0, kappa_f, alpha, v, case_iso, frac_ani):
         Control parameter.
     frac_ani : float
         Fraction of anisotropic inclusions.
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s_0, shared with the other stages of the model. A new cache is made if it is
+        not given, unless c0 is not transversely isotropic.
 
     Returns
     -------
@@ -48,45 +53,41 @@ def calc_isolated_part_vec(c0, s_0, kappa_f, alpha, v, case_iso, frac_ani):
 
     log_length = c0.shape[0]
     if v.ndim != 2:
-        v = np.tile(v.reshape(1, v.shape[0]), (log_length, 1))
+        v = np.broadcast_to(v.reshape(1, v.shape[0]), (log_length, v.shape[0]))
 
     if alpha.ndim == 1 and alpha.shape[0] != c0.shape[0]:
-        alpha = np.tile(alpha.reshape(1, alpha.shape[0]), (log_length, 1))
+        alpha = np.broadcast_to(
+            alpha.reshape(1, alpha.shape[0]), (log_length, alpha.shape[0])
+        )
     alpha_len = alpha.shape[1]
+    if g_cache is None:
+        g_cache = _dense_g_cache(c0, s_0)
 
-    cn = np.zeros_like(c0)
-    cn[:, 0:3, 0:3] = np.tile(kappa_f.reshape((log_length, 1, 1)), (1, 3, 3))
-    cn_d = cn - c0
-    i4 = np.tile(np.eye(6).reshape(1, 6, 6), (log_length, 1, 1))
+    # Fluid stiffness minus host stiffness
+    cn_d = -c0
+    cn_d[:, 0:3, 0:3] += kappa_f.reshape((log_length, 1, 1))
+    i4 = np.eye(6)
     c1 = np.zeros_like(c0)
 
-    # Will need G tensor for each alpha
-    g_arr = []
-    for i in range(alpha_len):
-        g_arr.append(g_tensor_vec(c0, s_0, alpha[:, i]))
-
-    if case_iso != 1:
-        # if there is only isotropic or anisotropic inclusions
-        for j in range(alpha_len):
-            t = array_matrix_mult(
-                cn_d, array_inverse(i4 - array_matrix_mult(g_arr[j], cn_d))
-            )
-            if case_iso != 2:
-                t = iso_av_vec(t)
-            c1 = c1 + v[:, j].reshape(log_length, 1, 1) * t
-    else:
-        # Isotropic and anisotropic part
-        for j in range(alpha_len):
-            t = array_matrix_mult(
-                cn_d, array_inverse(i4 - array_matrix_mult(g_arr[j], cn_d))
-            )
-            t = iso_av_vec(t)
-            c1 = c1 + ((1 - frac_ani) * v[:, j]).reshape(log_length, 1, 1) * t
-        for j in range(alpha_len):
-            t = array_matrix_mult(
-                cn_d, array_inverse(i4 - array_matrix_mult(g_arr[j], cn_d))
-            )
-            c1 = c1 + (frac_ani * v[:, j]).reshape(log_length, 1, 1) * t
+    for j in range(alpha_len):
+        # The t-matrix for each inclusion set is calculated once, and it is shared by the isotropic and the
+        # anisotropic part in the mixed case
+        g = g_cache.dense(alpha[:, j])
+        t = array_matrix_mult(
+            cn_d,
+            array_inverse(i4 - array_matrix_mult(g, cn_d, check=False), check=False),
+            check=False,
+        )
+        if case_iso == 0:
+            # only isotropic inclusions
+            c1 += v[:, j].reshape(log_length, 1, 1) * iso_av_vec(t)
+        elif case_iso == 2:
+            # only anisotropic inclusions
+            c1 += v[:, j].reshape(log_length, 1, 1) * t
+        else:
+            # Isotropic and anisotropic part
+            c1 += ((1 - frac_ani) * v[:, j]).reshape(log_length, 1, 1) * iso_av_vec(t)
+            c1 += (frac_ani * v[:, j]).reshape(log_length, 1, 1) * t
 
     idx_zero = np.sum(v, axis=1) == 0.0
     if np.any(idx_zero):
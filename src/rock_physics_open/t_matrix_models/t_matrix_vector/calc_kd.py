@@ -1,10 +1,10 @@
 import numpy as np
 
-from .array_functions import array_inverse, array_matrix_mult
-from .g_tensor import g_tensor_vec
+from .array_functions import array_matrix_mult, array_solve
+from .g_tensor import _dense_g_cache
 
 
-def calc_kd_vec(c0, i4, s_0, alpha):
+def calc_kd_vec(c0, i4, s_0, alpha, g_cache=None):
     """
     kd is a (nx6x6x(number of alphas)) matrix.
 
@@ -18,6 +18,9 @@ def calc_kd_vec(c0, i4, s_0, alpha):
         Inverse of stiffness tensor.
     alpha : np.ndarray
         Vector of aspect ratios (1x (number of aspect ratios) vector) or nx(number of (number of alphas)).
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s_0, shared with the other stages of the model. A new cache is made if it is
+        not given, unless c0 is not transversely isotropic.
 
     Returns
     -------
@@ -29,12 +32,14 @@ def calc_kd_vec(c0, i4, s_0, alpha):
     if alpha.ndim == 1 and alpha.shape[0] != c0.shape[0]:
         alpha = np.tile(alpha.reshape(1, alpha.shape[0]), (log_length, 1))
     L = alpha.shape[1]
+    if g_cache is None:
+        g_cache = _dense_g_cache(c0, s_0)
     kd = np.zeros((log_length, 6, 6, L))
 
     for nc in range(L):
-        g = g_tensor_vec(c0, s_0, alpha[:, nc])
-        kd[:, :, :, nc] = array_matrix_mult(
-            array_inverse(i4 + array_matrix_mult(g, c0)), s_0
+        g = g_cache.dense(alpha[:, nc])
+        kd[:, :, :, nc] = array_solve(
+            i4 + array_matrix_mult(g, c0, check=False), s_0, check=False
         )
 
     return kd
@@ -1,12 +1,12 @@
 import numpy as np
 
-from .array_functions import array_inverse, array_matrix_mult
+from .array_functions import array_inverse, array_matrix_mult, array_solve
 from .calc_isolated import calc_isolated_part_vec
-from .g_tensor import g_tensor_vec
+from .g_tensor import _dense_g_cache
 
 
 def calc_kd_eff_vec(
-    c0, s_0, k_fl, alpha_con, alpha_iso, v_con, v_iso, gd, ctrl, frac_ani
+    c0, s_0, k_fl, alpha_con, alpha_iso, v_con, v_iso, gd, ctrl, frac_ani, g_cache=None
 ):
     """Returns the effective dry K-tensor (6x6x(numbers of inclusions) matrix.
     If there is no connected or no isolated pores, the function returns a NaN for
@@ -37,6 +37,9 @@ def calc_kd_eff_vec(
         0 :only isolated pores, 1 :both isolated and connected pores, 2 :only connected pores.
     frac_ani : float
         Fraction of anisotropic inclusions.
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s_0, shared with the other stages of the model. A new cache is made if it is
+        not given, unless c0 is not transversely isotropic.
 
     Returns
     -------
@@ -56,6 +59,8 @@ def calc_kd_eff_vec(
     Translated to Python and vectorised by Harald Flesche, hfle@equinor.com 2020.
     """
     log_len = c0.shape[0]
+    if g_cache is None:
+        g_cache = _dense_g_cache(c0, s_0)
     c1dry = np.zeros((log_len, 6, 6))
     c2dry = np.zeros((log_len, 6, 6))
 
@@ -65,52 +70,51 @@ def calc_kd_eff_vec(
     c1_isolated = None
     if ctrl != 2:
         c1_isolated = calc_isolated_part_vec(
-            c0, s_0, k_fl, alpha_iso, v_iso, ctrl, frac_ani
+            c0, s_0, k_fl, alpha_iso, v_iso, ctrl, frac_ani, g_cache
         )
         c1dry = c1dry + c1_isolated
         if alpha_iso.ndim == 1 and alpha_iso.shape[0] != c0.shape[0]:
             alpha_iso = np.tile(alpha_iso.reshape(1, alpha_iso.shape[0]), (log_len, 1))
-        c2dry = c2dry + array_matrix_mult(c1_isolated, gd, c1_isolated)
+        c2dry = c2dry + array_matrix_mult(c1_isolated, gd, c1_isolated, check=False)
     if ctrl != 0:
         c1_connected = calc_isolated_part_vec(
-            c0, s_0, np.zeros_like(k_fl), alpha_con, v_con, ctrl, frac_ani
+            c0, s_0, np.zeros_like(k_fl), alpha_con, v_con, ctrl, frac_ani, g_cache
         )
         c1dry = c1dry + c1_connected
         if alpha_con.ndim == 1 and alpha_con.shape[0] != c0.shape[0]:
             alpha_con = np.tile(alpha_con.reshape(1, alpha_con.shape[0]), (log_len, 1))
-        c2dry = c2dry + array_matrix_mult(c1_connected, gd, c1_connected)
+        c2dry = c2dry + array_matrix_mult(c1_connected, gd, c1_connected, check=False)
         if c1_isolated is not None:
             c2dry = (
                 c2dry
-                + array_matrix_mult(c1_connected, gd, c1_isolated)
-                + array_matrix_mult(c1_isolated, gd, c1_connected)
+                + array_matrix_mult(c1_connected, gd, c1_isolated, check=False)
+                + array_matrix_mult(c1_isolated, gd, c1_connected, check=False)
             )
 
     i4 = np.tile(np.eye(6).reshape(1, 6, 6), (log_len, 1, 1))
-    c_eff_dry = c0 + array_matrix_mult(
-        c1dry, array_inverse(i4 + array_matrix_mult(array_inverse(c1dry), c2dry))
+    c_dry_factor = array_inverse(
+        i4 + array_solve(c1dry, c2dry, check=False), check=False
     )
+    c_eff_dry = c0 + array_matrix_mult(c1dry, c_dry_factor, check=False)
     temp = array_matrix_mult(
-        i4,
-        array_inverse(i4 + array_matrix_mult(array_inverse(c1dry), c2dry)),
-        array_inverse(c_eff_dry),
+        c_dry_factor, array_inverse(c_eff_dry, check=False), check=False
     )
 
     # if only connected or mixed connected and isolated
     if ctrl != 0:
         kd_eff_connected = np.zeros((log_len, 6, 6, alpha_con.shape[1]))
         for j in range(alpha_con.shape[1]):
-            g = g_tensor_vec(c0, s_0, alpha_con[:, j])
-            kd_eff_connected[:, :, :, j] = array_matrix_mult(
-                array_inverse(i4 + array_matrix_mult(g, c0)), temp
+            g = g_cache.dense(alpha_con[:, j])
+            kd_eff_connected[:, :, :, j] = array_solve(
+                i4 + array_matrix_mult(g, c0, check=False), temp, check=False
             )
 
     if ctrl != 2:
         kd_eff_isolated = np.zeros((log_len, 6, 6, alpha_iso.shape[1]))
         for j in range(alpha_iso.shape[1]):
-            g = g_tensor_vec(c0, s_0, alpha_iso[:, j])
-            kd_eff_isolated[:, :, :, j] = array_matrix_mult(
-                array_inverse(i4 + array_matrix_mult(g, c0)), temp
+            g = g_cache.dense(alpha_iso[:, j])
+            kd_eff_isolated[:, :, :, j] = array_solve(
+                i4 + array_matrix_mult(g, c0, check=False), temp, check=False
             )
 
     return kd_eff_isolated, kd_eff_connected
@@ -1,6 +1,8 @@
 import numpy as np
 
 from .calc_kd_eff import calc_kd_eff_vec
+from .compact_tensor import TITensor
+from .t_matrix_compact import calc_kd_eff_compact
 
 
 def calc_pressure_vec(
@@ -17,6 +19,7 @@ def calc_pressure_vec(
     k_fl,
     ctrl,
     frac_ani,
+    g_cache=None,
 ):
     """Calculate the effect of depletion on aspect ratios.
 
@@ -30,11 +33,12 @@ def calc_pressure_vec(
         Volume of connected inclusions (r length vector).
     v_iso : np.ndarray
         Volume of connected inclusions (s length vector).
-    c0 : np.ndarray
-        Stiffness tensor of host material (nx6x6 array).
-    s_0 : np.ndarray
+    c0 : np.ndarray or TITensor
+        Stiffness tensor of host material (nx6x6 array). With TITensor inputs for c0, s_0 and gd, the effective dry
+        K-tensors are calculated in compact form.
+    s_0 : np.ndarray or TITensor
         Inverse of stiffness tensor (nx6x6 array).
-    gd : np.ndarray
+    gd : np.ndarray or TITensor
         The correlation function (green's tensor nx6x6 matrix).
     d_p : float
         Change in effective pressure.
@@ -48,6 +52,9 @@ def calc_pressure_vec(
         Control parameter.
     frac_ani : float
         Fraction of anisotropic inclusions.
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s_0. Passing the cache that the T-Matrix model used for the same aspect
+        ratios avoids recalculating the g-tensors. A new cache is made if it is not given.
 
     Returns
     -------
@@ -70,17 +77,13 @@ def calc_pressure_vec(
 
     def _new_values(k, sum_k, a, v, d_p, t, g):
         # Local helper function to avoid code duplication
+        # k is given as the sums of the upper left 3x3 block and the difference of the sums of rows 2 and 0
+        k_normal, k_rows = k
         len_alpha = a.shape[1]
-        len_log = k.shape[0]
+        len_log = k_normal.shape[0]
 
-        v_new = v * (
-            1
-            - (np.sum(k[:, 0:3, 0:3, :], axis=(1, 2)) - sum_k.reshape(len_log, 1)) * d_p
-        )
-        alpha_new = a * (
-            1
-            - (np.sum(k[:, 2, 0:3, :], axis=1) - np.sum(k[:, 0, 0:3, :], axis=1)) * d_p
-        )
+        v_new = v * (1 - (k_normal - sum_k.reshape(len_log, 1)) * d_p)
+        alpha_new = a * (1 - k_rows * d_p)
 
         idx_neg = (alpha_new < 0.0) | (v_new < 0.0)
         idx_high = (alpha_new > 1.0) | (v_new > 1.0)
@@ -97,23 +100,51 @@ def calc_pressure_vec(
 
         return v_new, alpha_new, tau_n, gamma_n
 
-    kd_eff_isolated, kd_eff_connected = calc_kd_eff_vec(
-        c0, s_0, k_fl, alpha_con, alpha_iso, v_con, v_iso, gd, ctrl, frac_ani
-    )
+    if isinstance(c0, TITensor):
+        kd_eff_isolated, kd_eff_connected = (
+            None if kd is None else (kd.normal_sum(), kd.row_sum(2) - kd.row_sum(0))
+            for kd in calc_kd_eff_compact(
+                c0,
+                s_0,
+                k_fl,
+                alpha_con,
+                alpha_iso,
+                v_con,
+                v_iso,
+                gd,
+                ctrl,
+                frac_ani,
+                g_cache,
+            )
+        )
+    else:
+        kd_eff_isolated, kd_eff_connected = (
+            None
+            if kd is None
+            else (
+                np.sum(kd[:, 0:3, 0:3, :], axis=(1, 2)),
+                np.sum(kd[:, 2, 0:3, :], axis=1) - np.sum(kd[:, 0, 0:3, :], axis=1),
+            )
+            for kd in calc_kd_eff_vec(
+                c0,
+                s_0,
+                k_fl,
+                alpha_con,
+                alpha_iso,
+                v_con,
+                v_iso,
+                gd,
+                ctrl,
+                frac_ani,
+                g_cache,
+            )
+        )
     # Find the sum in the eq. 21 Jakobsen and Johansen 2005
     sum_kd = 0.0
     if ctrl != 2 and kd_eff_isolated is not None:
-        count_isolated = kd_eff_isolated.shape[3]
-        for j in range(count_isolated):
-            sum_kd = sum_kd + v_iso[:, j] * np.sum(
-                kd_eff_isolated[:, 0:3, 0:3, j], axis=(1, 2)
-            )
+        sum_kd = sum_kd + np.sum(v_iso * kd_eff_isolated[0], axis=1)
     if ctrl != 0 and kd_eff_connected is not None:
-        count_connected = kd_eff_connected.shape[3]
-        for j in range(count_connected):
-            sum_kd = sum_kd + v_con[:, j] * np.sum(
-                kd_eff_connected[:, 0:3, 0:3, j], axis=(1, 2)
-            )
+        sum_kd = sum_kd + np.sum(v_con * kd_eff_connected[0], axis=1)
     # Find the new concentration of inclusion
     alpha_n_isolated = None
     alpha_n_connected = None
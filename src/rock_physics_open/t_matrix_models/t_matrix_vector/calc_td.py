@@ -1,10 +1,10 @@
 import numpy as np
 
-from .array_functions import array_inverse, array_matrix_mult
-from .g_tensor import g_tensor_vec
+from .array_functions import array_matrix_mult, array_solve
+from .g_tensor import _dense_g_cache
 
 
-def calc_td_vec(c0, i4, s_0, kd, alpha):
+def calc_td_vec(c0, i4, s_0, kd, alpha, g_cache=None):
     """Returns the dry t-matrix tensors (nx6x6x(numbers of empty cavities) matrix).
 
     Parameters
@@ -20,6 +20,9 @@ def calc_td_vec(c0, i4, s_0, kd, alpha):
         2009 for explanation.
     alpha : np.ndarray
         Aspect ratios of all the empty cavities (1x(numbers of empty cavities) vector).
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s_0, shared with the other stages of the model. A new cache is made if it is
+        not given, unless c0 is not transversely isotropic.
 
     Returns
     -------
@@ -30,13 +33,15 @@ def calc_td_vec(c0, i4, s_0, kd, alpha):
     if alpha.ndim == 1 and alpha.shape[0] != c0.shape[0]:
         alpha = np.tile(alpha.reshape(1, alpha.shape[0]), (log_len, 1))
     alpha_len = alpha.shape[1]
+    if g_cache is None:
+        g_cache = _dense_g_cache(c0, s_0)
 
     td = np.array(np.zeros((log_len, 6, 6, alpha_len)))
 
     for nc in range(alpha_len):
-        g = g_tensor_vec(c0, s_0, alpha[:, nc])
-        td[:, :, :, nc] = array_matrix_mult(
-            array_inverse(g), array_matrix_mult(kd[:, :, :, nc], c0) - i4
+        g = g_cache.dense(alpha[:, nc])
+        td[:, :, :, nc] = array_solve(
+            g, array_matrix_mult(kd[:, :, :, nc], c0, check=False) - i4, check=False
         )
 
     return td
@@ -27,7 +27,7 @@ def calc_x_vec(s_0, td):
     x = np.zeros((log_length, 6, 6, alpha_length))
     for j in range(alpha_length):
         x[:, :, :, j] = array_matrix_mult(
-            td[:, :, :, j], s_0, i2_i2, s_0, td[:, :, :, j]
+            td[:, :, :, j], s_0, i2_i2, s_0, td[:, :, :, j], check=False
         )
 
     return x
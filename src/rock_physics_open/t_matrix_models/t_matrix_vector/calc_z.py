@@ -44,7 +44,11 @@ def calc_z_vec(s0, td, td_bar, omega, gamma, v, tau):
         ).reshape(log_length, 1, 1)
 
     for j in range(alpha_length):
-        z[:, :, :, j] = array_matrix_mult(td[:, :, :, j], s0, i2_i2, s0, sum_z)
-        z_bar[:, :, :, j] = array_matrix_mult(td_bar[:, :, :, j], s0, i2_i2, s0, sum_z)
+        z[:, :, :, j] = array_matrix_mult(
+            td[:, :, :, j], s0, i2_i2, s0, sum_z, check=False
+        )
+        z_bar[:, :, :, j] = array_matrix_mult(
+            td_bar[:, :, :, j], s0, i2_i2, s0, sum_z, check=False
+        )
 
     return z, z_bar
@@ -0,0 +1,392 @@
+import numpy as np
+
+
+class TITensor:
+    """Stack of 6x6 tensors with transversely isotropic (TI) structure around the x3-axis, in the notation used in the
+    T-Matrix functions, where the shear terms on the diagonal are 2 * c44, 2 * c44, 2 * c66:
+
+    [[c11, c12, c13, 0,   0,   0  ],
+
+     [c12, c11, c13, 0,   0,   0  ],
+
+     [c31, c31, c33, 0,   0,   0  ],
+
+     [0,   0,   0,   d44, 0,   0  ],
+
+     [0,   0,   0,   0,   d44, 0  ],
+
+     [0,   0,   0,   0,   0,   d66]]
+
+    Isotropic tensors and all the tensors in the T-Matrix model (stiffness, Green's tensors, t-matrices and their
+    products and inverses) have this structure, which is closed under addition, multiplication and inversion. The
+    tensor is stored as
+
+    m : (..., 2, 2) array, the tensor acting on the subspace spanned by (1, 1, 0) and (0, 0, 1), i.e.
+        [[c11 + c12, c13], [2 * c31, c33]].
+    dev : (...) array, the eigenvalue c11 - c12 of the in-plane deviatoric strain (1, -1, 0).
+    d44 : (...) array, the diagonal element [3, 3] (and [4, 4]).
+    d66 : (...) array, the diagonal element [5, 5].
+
+    This is 7 values per tensor instead of 36, and products and inverses are found in closed form. The leading
+    dimensions are treated as batch dimensions and are broadcast in all operations.
+    """
+
+    # Make numpy defer to the reflected operators of this class
+    __array_ufunc__ = None
+
+    def __init__(self, m, dev, d44, d66):
+        self.m = np.asarray(m)
+        self.dev = np.asarray(dev)
+        self.d44 = np.asarray(d44)
+        self.d66 = np.asarray(d66)
+
+    @classmethod
+    def from_elements(cls, c11, c12, c13, c31, c33, d44, d66):
+        """Create from the elements of the 6x6 matrix, see class description."""
+        c11, c12, c13, c31, c33, d44, d66 = np.broadcast_arrays(
+            c11, c12, c13, c31, c33, d44, d66
+        )
+        m = np.stack(
+            (np.stack((c11 + c12, c13), axis=-1), np.stack((2 * c31, c33), axis=-1)),
+            axis=-2,
+        )
+        return cls(m, c11 - c12, d44, d66)
+
+    @classmethod
+    def isotropic(cls, lam, mu):
+        """Isotropic tensor from Lamé parameters."""
+        return cls.from_elements(
+            lam + 2 * mu, lam, lam, lam, lam + 2 * mu, 2 * mu, 2 * mu
+        )
+
+    @classmethod
+    def identity(cls, shape=()):
+        """Identity tensor, corresponding to np.eye(6)."""
+        return cls.isotropic(np.zeros(shape), 0.5 * np.ones(shape))
+
+    @classmethod
+    def i2_i2(cls, shape=()):
+        """Tensor product of two second order identity tensors, i.e. ones in the upper left 3x3 block."""
+        zeros = np.zeros(shape)
+        return cls.isotropic(np.ones(shape), zeros)
+
+    @classmethod
+    def zeros(cls, shape=(), dtype=float):
+        zeros = np.zeros(shape, dtype=dtype)
+        return cls(np.zeros(shape + (2, 2), dtype=dtype), zeros, zeros, zeros)
+
+    @classmethod
+    def concatenate(cls, tensors, axis=0):
+        """Join a sequence of tensors along an existing batch axis."""
+        ndim = tensors[0].ndim
+        axis = axis % ndim
+        return cls(
+            np.concatenate([t.m for t in tensors], axis=axis),
+            np.concatenate([t.dev for t in tensors], axis=axis),
+            np.concatenate([t.d44 for t in tensors], axis=axis),
+            np.concatenate([t.d66 for t in tensors], axis=axis),
+        )
+
+    @classmethod
+    def from_dense(cls, a, rtol=1e-10):
+        """Create from (..., 6, 6) arrays.
+
+        Parameters
+        ----------
+        a : np.ndarray
+            Array of shape (..., 6, 6).
+        rtol : float
+            Tolerance, relative to the largest element of each matrix, for the check of the TI structure.
+
+        Returns
+        -------
+        TITensor
+            Compact tensor.
+
+        Raises
+        ------
+        ValueError
+            If the input does not have TI structure.
+        """
+        a = np.asarray(a)
+        if a.ndim < 2 or a.shape[-2:] != (6, 6):
+            raise ValueError(
+                f"{__name__}: mismatch in inputs variables dimension/shape"
+            )
+        tensor = cls.from_elements(
+            a[..., 0, 0],
+            a[..., 0, 1],
+            a[..., 0, 2],
+            a[..., 2, 0],
+            a[..., 2, 2],
+            a[..., 3, 3],
+            a[..., 5, 5],
+        )
+        scale = np.max(np.abs(a), axis=(-2, -1), keepdims=True)
+        if np.any(np.abs(tensor.to_dense() - a) > rtol * scale):
+            raise ValueError(
+                f"{__name__}: input is not transversely isotropic around the x3-axis"
+            )
+        return tensor
+
+    def to_dense(self):
+        """(..., 6, 6) array representation of the tensor."""
+        out = np.zeros(self.shape + (6, 6), dtype=self.dtype)
+        c11 = self.c11
+        c12 = self.c12
+        out[..., 0, 0] = c11
+        out[..., 1, 1] = c11
+        out[..., 0, 1] = c12
+        out[..., 1, 0] = c12
+        out[..., :2, 2] = self.c13[..., np.newaxis]
+        out[..., 2, :2] = self.c31[..., np.newaxis]
+        out[..., 2, 2] = self.c33
+        out[..., 3, 3] = self.d44
+        out[..., 4, 4] = self.d44
+        out[..., 5, 5] = self.d66
+        return out
+
+    @property
+    def shape(self):
+        """Batch shape."""
+        return self.dev.shape
+
+    @property
+    def ndim(self):
+        return self.dev.ndim
+
+    @property
+    def dtype(self):
+        return np.result_type(self.m, self.dev, self.d44, self.d66)
+
+    @property
+    def nbytes(self):
+        return self.m.nbytes + self.dev.nbytes + self.d44.nbytes + self.d66.nbytes
+
+    @property
+    def c11(self):
+        return 0.5 * (self.m[..., 0, 0] + self.dev)
+
+    @property
+    def c12(self):
+        return 0.5 * (self.m[..., 0, 0] - self.dev)
+
+    @property
+    def c13(self):
+        return self.m[..., 0, 1]
+
+    @property
+    def c31(self):
+        return 0.5 * self.m[..., 1, 0]
+
+    @property
+    def c33(self):
+        return self.m[..., 1, 1]
+
+    def normal_sum(self):
+        """Sum of the elements of the upper left 3x3 block."""
+        return (
+            2 * self.m[..., 0, 0]
+            + 2 * self.m[..., 0, 1]
+            + self.m[..., 1, 0]
+            + self.m[..., 1, 1]
+        )
+
+    def row_sum(self, row):
+        """Sum of the elements of row 0, 1 or 2 of the upper left 3x3 block."""
+        if row == 2:
+            return self.m[..., 1, 0] + self.m[..., 1, 1]
+        return self.m[..., 0, 0] + self.m[..., 0, 1]
+
+    def inv(self):
+        """Inverse of the tensor, found in closed form.
+
+        Raises
+        ------
+        np.linalg.LinAlgError
+            If any of the tensors are singular.
+        """
+        m = self.m
+        det = m[..., 0, 0] * m[..., 1, 1] - m[..., 0, 1] * m[..., 1, 0]
+        if (
+            np.any(det == 0)
+            or np.any(self.dev == 0)
+            or np.any(self.d44 == 0)
+            or np.any(self.d66 == 0)
+        ):
+            raise np.linalg.LinAlgError("Singular matrix")
+        m_inv = (
+            np.stack(
+                (
+                    np.stack((m[..., 1, 1], -m[..., 0, 1]), axis=-1),
+                    np.stack((-m[..., 1, 0], m[..., 0, 0]), axis=-1),
+                ),
+                axis=-2,
+            )
+            / det[..., np.newaxis, np.newaxis]
+        )
+        return TITensor(m_inv, 1 / self.dev, 1 / self.d44, 1 / self.d66)
+
+    def solve(self, other):
+        """Solution x of self @ x = other, i.e. self.inv() @ other."""
+        return self.inv() @ other
+
+    def iso_av(self):
+        """Average over all orientations, same as iso_av_vec for dense tensors."""
+        c11 = self.c11
+        c12 = self.c12
+        c13 = self.c13
+        c33 = self.c33
+        lam = (c11 + c33 + 5 * c12 + 8 * c13 - 2 * self.d44) / 15
+        mu = (7 * c11 + 2 * c33 - 5 * c12 - 4 * c13 + 6 * self.d44) / 30
+        return TITensor.isotropic(lam, mu)
+
+    def reshape_batch(self, shape):
+        """Tensor with new batch shape."""
+        shape = tuple(shape)
+        return TITensor(
+            self.m.reshape(shape + (2, 2)),
+            self.dev.reshape(shape),
+            self.d44.reshape(shape),
+            self.d66.reshape(shape),
+        )
+
+    def sum(self, axis):
+        """Sum over a batch axis."""
+        axis = axis % self.ndim
+        return TITensor(
+            np.sum(self.m, axis=axis),
+            np.sum(self.dev, axis=axis),
+            np.sum(self.d44, axis=axis),
+            np.sum(self.d66, axis=axis),
+        )
+
+    def where(self, condition, other):
+        """Elementwise selection over the batch dimensions: self where condition is True, other elsewhere."""
+        condition = np.asarray(condition)
+        return TITensor(
+            np.where(condition[..., np.newaxis, np.newaxis], self.m, other.m),
+            np.where(condition, self.dev, other.dev),
+            np.where(condition, self.d44, other.d44),
+            np.where(condition, self.d66, other.d66),
+        )
+
+    def __getitem__(self, item):
+        if not isinstance(item, tuple):
+            item = (item,)
+        # The two last axes of m are the matrix axes
+        m_item = item if any(i is Ellipsis for i in item) else item + (Ellipsis,)
+        return TITensor(
+            self.m[m_item + (slice(None), slice(None))],
+            self.dev[item],
+            self.d44[item],
+            self.d66[item],
+        )
+
+    def __matmul__(self, other):
+        if isinstance(other, TITensor):
+            return TITensor(
+                _matmul_2x2(self.m, other.m),
+                self.dev * other.dev,
+                self.d44 * other.d44,
+                self.d66 * other.d66,
+            )
+        if isinstance(other, np.ndarray):
+            return self.to_dense() @ other
+        return NotImplemented
+
+    def __rmatmul__(self, other):
+        if isinstance(other, np.ndarray):
+            return other @ self.to_dense()
+        return NotImplemented
+
+    def __add__(self, other):
+        if isinstance(other, TITensor):
+            return TITensor(
+                self.m + other.m,
+                self.dev + other.dev,
+                self.d44 + other.d44,
+                self.d66 + other.d66,
+            )
+        if isinstance(other, np.ndarray):
+            return self.to_dense() + other
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return TITensor(-self.m, -self.dev, -self.d44, -self.d66)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        """Multiplication with scalars, or arrays that are broadcast with the batch dimensions."""
+        if isinstance(other, TITensor):
+            return NotImplemented
+        other = np.asarray(other)
+        return TITensor(
+            self.m * other[..., np.newaxis, np.newaxis],
+            self.dev * other,
+            self.d44 * other,
+            self.d66 * other,
+        )
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self * (1 / np.asarray(other))
+
+    def __repr__(self):
+        return f"TITensor(shape={self.shape}, dtype={self.dtype})"
+
+
+def _matmul_2x2(a, b):
+    """Batched 2x2 matrix product. Explicit elementwise products are much faster than np.matmul for small
+    matrices."""
+    return np.stack(
+        (
+            np.stack(
+                (
+                    a[..., 0, 0] * b[..., 0, 0] + a[..., 0, 1] * b[..., 1, 0],
+                    a[..., 0, 0] * b[..., 0, 1] + a[..., 0, 1] * b[..., 1, 1],
+                ),
+                axis=-1,
+            ),
+            np.stack(
+                (
+                    a[..., 1, 0] * b[..., 0, 0] + a[..., 1, 1] * b[..., 1, 0],
+                    a[..., 1, 0] * b[..., 0, 1] + a[..., 1, 1] * b[..., 1, 1],
+                ),
+                axis=-1,
+            ),
+        ),
+        axis=-2,
+    )
+
+
+def as_compact(a, rtol=1e-10):
+    """Return a TITensor representation of the (..., 6, 6) array a, or a itself if it does not have TI structure
+    around the x3-axis, so that dense 6x6 arrays are only used when the symmetry is broken.
+
+    Parameters
+    ----------
+    a : np.ndarray or TITensor
+        Array of shape (..., 6, 6).
+    rtol : float
+        Tolerance for the check of the TI structure.
+
+    Returns
+    -------
+    TITensor or np.ndarray
+        Compact tensor, or the input array.
+    """
+    if isinstance(a, TITensor):
+        return a
+    try:
+        return TITensor.from_dense(a, rtol=rtol)
+    except ValueError:
+        return a
@@ -1,60 +1,26 @@
 import numpy as np
 
-from .array_functions import array_matrix_mult
-
+from rock_physics_open.equinor_utilities import gen_utilities
 
-def g_tensor_vec(c0, s_0, alpha):
-    """Returns the Eshelby green's tensor (nx6x6 array).
+from .array_functions import array_matrix_mult
+from .compact_tensor import TITensor
 
-    Parameters
-    ----------
-    c0 : np.ndarray
-        n stiffness tensors of the host material (nx6x6 array).
-    s_0 : np.ndarray
-        Inverse of stiffness tensor.
-    alpha : float
-        Aspect ratio for single inclusion.
 
-    Returns
-    -------
-    np.ndarray
-        g-tensor.
-
-    Raises
-    ------
-    ValueError
-        If mismatch in input dimension/shape.
+def _eshelby_components(pois_ratio, alpha):
+    """Independent components s_11, s_12, s_13, s_31, s_33, s_44, s_66 of the Eshelby tensor for spheroidal
+    inclusions. pois_ratio and alpha are broadcast against each other. Aspect ratios outside the range [0, 1] give
+    zero components.
     """
-    if not (
-        c0.ndim == 3
-        and c0.shape[1] == c0.shape[2]
-        and s_0.ndim == 3
-        and s_0.shape[1] == s_0.shape[2]
-    ):
-        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
+    pois_ratio, alpha = np.broadcast_arrays(pois_ratio, alpha)
 
-    log_len = c0.shape[0]
-    mu = c0[:, 3, 3] / 2
-    kappa = c0[:, 0, 0] - (4 / 3) * mu
-    pois_ratio = (3 * kappa - 2 * mu) / (2 * (3 * kappa + mu))
+    s_11 = np.zeros(alpha.shape)
+    s_12 = np.zeros(alpha.shape)
+    s_13 = np.zeros(alpha.shape)
+    s_31 = np.zeros(alpha.shape)
+    s_33 = np.zeros(alpha.shape)
+    s_44 = np.zeros(alpha.shape)
+    s_66 = np.zeros(alpha.shape)
 
-    s_r = np.zeros(c0.shape)
-
-    s_11 = np.zeros(log_len)
-    s_12 = np.zeros(log_len)
-    s_13 = np.zeros(log_len)
-    s_21 = np.zeros(log_len)
-    s_22 = np.zeros(log_len)
-    s_23 = np.zeros(log_len)
-    s_31 = np.zeros(log_len)
-    s_32 = np.zeros(log_len)
-    s_33 = np.zeros(log_len)
-    s_44 = np.zeros(log_len)
-    s_55 = np.zeros(log_len)
-    s_66 = np.zeros(log_len)
-
-    if isinstance(alpha, float):
-        alpha = np.ones(log_len) * alpha
     # Check for valid range of alpha - those outside are returned with zero matrices
     idx_in = (alpha >= 0) & (alpha < 1)
     idx_one = alpha == 1
@@ -103,11 +69,6 @@ def g_tensor_vec(c0, s_0, alpha):
             * (1 - 2 * pois_ratio_in - (3 * (alpha_in**2 + 1)) / (alpha_in**2 - 1))
             * q
         )
-        s_22[idx_in] = s_11[idx_in]
-        s_21[idx_in] = s_12[idx_in]
-        s_23[idx_in] = s_13[idx_in]
-        s_32[idx_in] = s_31[idx_in]
-        s_55[idx_in] = s_44[idx_in]
     if np.any(idx_one):
         s_11[idx_one] = (5 * pois_ratio_one - 1) / (15 * (1 - pois_ratio_one)) + (
             2 * (4 - 5 * pois_ratio_one)
@@ -116,25 +77,225 @@ def g_tensor_vec(c0, s_0, alpha):
         s_13[idx_one] = (5 * pois_ratio_one - 1) / (15 * (1 - pois_ratio_one))
         s_31[idx_one] = (5 * pois_ratio_one - 1) / (15 * (1 - pois_ratio_one))
         s_44[idx_one] = (4 - 5 * pois_ratio_one) / (15 * (1 - pois_ratio_one))
-        s_22[idx_one] = s_11[idx_one]
         s_33[idx_one] = s_11[idx_one]
-        s_21[idx_one] = s_12[idx_one]
-        s_32[idx_one] = s_31[idx_one]
-        s_23[idx_one] = s_13[idx_one]
-        s_55[idx_one] = s_44[idx_one]
         s_66[idx_one] = s_44[idx_one]
 
+    return s_11, s_12, s_13, s_31, s_33, s_44, s_66
+
+
+def _poisson_ratio(kappa, mu):
+    return (3 * kappa - 2 * mu) / (2 * (3 * kappa + mu))
+
+
+def g_tensor_vec(c0, s_0, alpha):
+    """Returns the Eshelby green's tensor (nx6x6 array).
+
+    Parameters
+    ----------
+    c0 : np.ndarray
+        n stiffness tensors of the host material (nx6x6 array).
+    s_0 : np.ndarray
+        Inverse of stiffness tensor.
+    alpha : float
+        Aspect ratio for single inclusion.
+
+    Returns
+    -------
+    np.ndarray
+        g-tensor.
+
+    Raises
+    ------
+    ValueError
+        If mismatch in input dimension/shape.
+    """
+    if not (
+        c0.ndim == 3
+        and c0.shape[1] == c0.shape[2]
+        and s_0.ndim == 3
+        and s_0.shape[1] == s_0.shape[2]
+    ):
+        raise ValueError(f"{__name__}: mismatch in inputs variables dimension/shape")
+
+    mu = c0[:, 3, 3] / 2
+    kappa = c0[:, 0, 0] - (4 / 3) * mu
+    s_11, s_12, s_13, s_31, s_33, s_44, s_66 = _eshelby_components(
+        _poisson_ratio(kappa, mu), alpha
+    )
+
+    s_r = np.zeros(c0.shape)
     s_r[:, 0, 0] = s_11
-    s_r[:, 1, 1] = s_22
+    s_r[:, 1, 1] = s_11
     s_r[:, 2, 2] = s_33
     s_r[:, 3, 3] = 2 * s_44
-    s_r[:, 4, 4] = 2 * s_55
+    s_r[:, 4, 4] = 2 * s_44
     s_r[:, 5, 5] = 2 * s_66
     s_r[:, 0, 1] = s_12
     s_r[:, 0, 2] = s_13
-    s_r[:, 1, 0] = s_21
-    s_r[:, 1, 2] = s_23
+    s_r[:, 1, 0] = s_12
+    s_r[:, 1, 2] = s_13
     s_r[:, 2, 0] = s_31
-    s_r[:, 2, 1] = s_32
+    s_r[:, 2, 1] = s_31
+
+    return array_matrix_mult(-s_r, s_0, check=False)
+
+
+def g_tensor_compact(c0, s_0, alpha):
+    """Returns the Eshelby green's tensor in compact form, see g_tensor_vec.
+
+    Parameters
+    ----------
+    c0 : TITensor
+        Isotropic stiffness tensors of the host material.
+    s_0 : TITensor
+        Inverse of stiffness tensor.
+    alpha : float or np.ndarray
+        Aspect ratios, broadcast with the batch shape of c0, e.g. c0 with shape (n, 1) and alpha with shape (n, m)
+        give g-tensors with shape (n, m).
+
+    Returns
+    -------
+    TITensor
+        g-tensor.
+    """
+    mu = c0.d44 / 2
+    kappa = c0.c11 - (4 / 3) * mu
+    s_11, s_12, s_13, s_31, s_33, s_44, s_66 = _eshelby_components(
+        _poisson_ratio(kappa, mu), alpha
+    )
+    s_r = TITensor.from_elements(s_11, s_12, s_13, s_31, s_33, 2 * s_44, 2 * s_66)
+    return -s_r @ s_0
+
+
+class GTensorCache:
+    """Cache of g-tensors for one log of host materials. The g-tensor only depends on the host moduli and the aspect
+    ratio, and it is needed for the same aspect ratios in several stages of the T-Matrix model, both for the
+    connected and the isolated inclusions, and again in the pressure update. The cache evaluates each unique
+    combination of host moduli and aspect ratio once, so that a log with a single mineral and a few aspect ratios
+    only needs a handful of evaluations.
+
+    The cache keeps every aspect ratio it is given. Pressure steps change the aspect ratios of each sample, so a cache
+    should only be used within one pressure step, otherwise it grows with every step without being reused.
+
+    The host is assumed to be isotropic, as in g_tensor_vec, and the cache must only be used with the c0 and s_0 it
+    was created from.
+
+    Parameters
+    ----------
+    c0 : np.ndarray or TITensor
+        n stiffness tensors of the host material (nx6x6 array or TITensor with batch shape (n,)).
+    s_0 : np.ndarray or TITensor
+        Inverse of stiffness tensor.
+    """
+
+    def __init__(self, c0, s_0):
+        if not isinstance(c0, TITensor):
+            c0 = TITensor.from_dense(c0)
+        if not isinstance(s_0, TITensor):
+            s_0 = TITensor.from_dense(s_0)
+        if c0.ndim != 1 or s_0.shape != c0.shape:
+            raise ValueError(
+                f"{__name__}: mismatch in inputs variables dimension/shape"
+            )
+        self._c0 = c0
+        self._s0 = s_0
+        self._host_idx, self._host_code = gen_utilities.unique_rows((c0.c11, c0.d44))
+        # Sorted keys of the cached g-tensors, complex numbers host code + 1j * alpha, which numpy sorts
+        # lexicographically
+        self._keys = np.empty(0, dtype=complex)
+        self._values = TITensor.zeros((0,))
+        self.evaluations = 0
+
+    def compact(self, alpha):
+        """g-tensors for the aspect ratios alpha.
+
+        Parameters
+        ----------
+        alpha : float or np.ndarray
+            Aspect ratio, single value, n length vector or (n, number of inclusions) array.
+
+        Returns
+        -------
+        TITensor
+            g-tensors with batch shape (n,) or (n, number of inclusions).
+        """
+        alpha = np.asarray(alpha, dtype=float)
+        if alpha.ndim == 0:
+            alpha = np.broadcast_to(alpha, self._c0.shape)
+        if alpha.shape[0] != self._c0.shape[0]:
+            raise ValueError(
+                f"{__name__}: mismatch in inputs variables dimension/shape"
+            )
+        host_code = self._host_code.reshape((-1,) + (1,) * (alpha.ndim - 1))
+        all_keys = (host_code + 1j * alpha).reshape(-1)
+        # Aspect ratios that are not finite or outside the range [0, 1] give zero tensors, as in g_tensor_vec, and
+        # are not stored in the cache
+        idx_valid = (np.isfinite(alpha) & (alpha >= 0) & (alpha <= 1)).reshape(-1)
+        keys, idx_restore = np.unique(all_keys[idx_valid], return_inverse=True)
+        self._insert(keys)
+        pos = np.searchsorted(self._keys, keys)
+        if np.all(idx_valid):
+            return self._values[pos[idx_restore.reshape(alpha.shape)]]
+        idx = np.full(all_keys.shape, self._keys.shape[0])
+        idx[idx_valid] = pos[idx_restore]
+        values = TITensor.concatenate((self._values, TITensor.zeros((1,))))
+        return values[idx.reshape(alpha.shape)]
+
+    def dense(self, alpha):
+        """g-tensors for the aspect ratios alpha as nx6x6 array, same as g_tensor_vec(c0, s_0, alpha).
+
+        Parameters
+        ----------
+        alpha : float or np.ndarray
+            Aspect ratio, single value or n length vector.
+
+        Returns
+        -------
+        np.ndarray
+            g-tensor (nx6x6 array).
+        """
+        return self.compact(alpha).to_dense()
+
+    def _insert(self, keys):
+        # Evaluate and store the g-tensors for the sorted and unique keys that are not already in the cache
+        pos = np.searchsorted(self._keys, keys)
+        found = pos < self._keys.shape[0]
+        found[found] = self._keys[pos[found]] == keys[found]
+        missing = keys[~found]
+        if missing.shape[0] == 0:
+            return
+        rows = self._host_idx[missing.real.astype(np.intp)]
+        g = g_tensor_compact(self._c0[rows], self._s0[rows], missing.imag)
+        self.evaluations += missing.shape[0]
+
+        # Merge the sorted keys, the new keys are placed after the cached keys they follow
+        n_cached = self._keys.shape[0]
+        idx_new = np.searchsorted(self._keys, missing) + np.arange(missing.shape[0])
+        order = np.empty(n_cached + missing.shape[0], dtype=np.intp)
+        is_cached = np.ones(order.shape[0], dtype=bool)
+        is_cached[idx_new] = False
+        order[is_cached] = np.arange(n_cached)
+        order[idx_new] = n_cached + np.arange(missing.shape[0])
+        self._keys = np.concatenate((self._keys, missing))[order]
+        self._values = TITensor.concatenate((self._values, g))[order]
+
+
+class _GTensorDense:
+    """g-tensors from g_tensor_vec for every call, for host tensors without TI structure that GTensorCache does not
+    accept."""
+
+    def __init__(self, c0, s_0):
+        self._c0 = c0
+        self._s0 = s_0
+
+    def dense(self, alpha):
+        return g_tensor_vec(self._c0, self._s0, alpha)
+
 
-    return array_matrix_mult(-s_r, s_0)
+def _dense_g_cache(c0, s_0):
+    """g-tensor cache for the dense T-Matrix functions, see GTensorCache. Host tensors without TI structure are
+    evaluated without cache, as before the cache was introduced."""
+    try:
+        return GTensorCache(c0, s_0)
+    except ValueError:
+        return _GTensorDense(c0, s_0)
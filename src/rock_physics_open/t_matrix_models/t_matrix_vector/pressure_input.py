@@ -1,6 +1,6 @@
 import numpy as np
 
-from .array_functions import array_inverse, array_matrix_mult
+from .array_functions import array_inverse
 from .g_tensor import g_tensor_vec
 
 
@@ -27,7 +27,6 @@ def pressure_input_utility(k_min, mu_min, log_length):
     c44 = mu_min
     c12 = c11 - 2 * c44
 
-    i4 = np.tile(np.eye(6).reshape(1, 6, 6), (log_length, 1, 1))
     c0 = np.zeros((log_length, 6, 6))
 
     for i in range(3):
@@ -38,7 +37,7 @@ def pressure_input_utility(k_min, mu_min, log_length):
         c0[:, 1, 2 * i] = c12
         c0[:, 2, i] = c12
 
-    s0 = array_matrix_mult(i4, array_inverse(c0))
+    s0 = array_inverse(c0, check=False)
     gd = g_tensor_vec(c0, s0, 1.0)
 
     return c0, s0, gd
@@ -0,0 +1,317 @@
+"""
+Compact versions of the T-Matrix building blocks. All tensors are TITensor objects with batch shape (n,) for host and
+effective properties, and (n, number of inclusions) for inclusion dependent tensors. The functions follow their dense
+counterparts in the calc_*.py modules, see those for references.
+"""
+
+import numpy as np
+
+from .compact_tensor import TITensor
+from .g_tensor import GTensorCache, g_tensor_compact
+
+
+def _as_2d(arr, log_length):
+    """Inclusion parameters as (n, number of inclusions) arrays."""
+    arr = np.asarray(arr)
+    if arr.ndim == 1 and arr.shape[0] != log_length:
+        arr = arr.reshape(1, -1)
+    return np.broadcast_to(arr, (log_length, arr.shape[-1]))
+
+
+def pressure_input_compact(k_min, mu_min):
+    """Host stiffness tensor, its inverse, and the g-tensor for aspect ratio 1.0, see pressure_input_utility.
+
+    Parameters
+    ----------
+    k_min : np.ndarray
+        N length array, bulk modulus of matrix/mineral [Pa].
+    mu_min : np.ndarray
+        N length array, shear modulus of matrix/mineral [Pa].
+
+    Returns
+    -------
+    tuple
+        c0, s0, gd : (TITensor, TITensor, TITensor).
+    """
+    c0 = TITensor.isotropic(k_min - 2 / 3 * mu_min, mu_min)
+    s0 = c0.inv()
+    gd = g_tensor_compact(c0, s0, 1.0)
+    return c0, s0, gd
+
+
+def calc_isolated_part_compact(
+    c0, s0, kappa_f, alpha, v, case_iso, frac_ani, g_cache=None
+):
+    """First order correction tensor from the isolated porosity, see calc_isolated_part_vec.
+
+    Parameters
+    ----------
+    c0 : TITensor
+        Stiffness tensor of the host material, batch shape (n,).
+    s0 : TITensor
+        Inverse of stiffness tensor.
+    kappa_f : np.ndarray
+        Bulk modulus of the fluid (n length vector).
+    alpha : np.ndarray
+        Aspect ratios of the inclusions, (number of inclusions) or (n, number of inclusions).
+    v : np.ndarray
+        Concentration of the inclusions, (number of inclusions) or (n, number of inclusions).
+    case_iso : int
+        Control parameter, 0: isotropic, 1: mixed, 2: anisotropic porosity.
+    frac_ani : float
+        Fraction of anisotropic inclusions.
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s0, shared with the other stages of the model. A new cache is made if it is
+        not given.
+
+    Returns
+    -------
+    TITensor
+        c1: correction tensor.
+    """
+    log_length = c0.shape[0]
+    alpha = _as_2d(alpha, log_length)
+    v = _as_2d(v, log_length)
+    # The fraction can also be given per sample
+    frac_ani = np.asarray(frac_ani)
+    if frac_ani.ndim == 1:
+        frac_ani = frac_ani.reshape(log_length, 1)
+
+    if g_cache is None:
+        g_cache = GTensorCache(c0, s0)
+
+    cn_d = (TITensor.i2_i2() * kappa_f - c0)[:, np.newaxis]
+    g = g_cache.compact(alpha)
+    t = cn_d @ (TITensor.identity() - g @ cn_d).inv()
+
+    if case_iso == 0:
+        c1 = (t.iso_av() * v).sum(axis=1)
+    elif case_iso == 2:
+        c1 = (t * v).sum(axis=1)
+    else:
+        c1 = (t.iso_av() * ((1 - frac_ani) * v)).sum(axis=1) + (t * (frac_ani * v)).sum(
+            axis=1
+        )
+
+    # In case of zero porosity, the host material tensor is returned
+    return c0.where(np.sum(v, axis=1) == 0.0, c1)
+
+
+def calc_kd_eff_compact(
+    c0, s0, k_fl, alpha_con, alpha_iso, v_con, v_iso, gd, ctrl, frac_ani, g_cache=None
+):
+    """Effective dry K-tensors of the isolated and connected inclusions, see calc_kd_eff_vec.
+
+    Parameters
+    ----------
+    c0 : TITensor
+        Stiffness tensor of the host material, batch shape (n,).
+    s0 : TITensor
+        Inverse of stiffness tensor.
+    k_fl : np.ndarray
+        Bulk modulus of the fluid (n length vector).
+    alpha_con : np.ndarray
+        Aspect ratio of connected inclusions.
+    alpha_iso : np.ndarray
+        Aspect ratio of isolated inclusions.
+    v_con : np.ndarray
+        Concentration of connected pores.
+    v_iso : np.ndarray
+        Concentration of isolated pores.
+    gd : TITensor
+        Correlation function.
+    ctrl : int
+        0 :only isolated pores, 1 :both isolated and connected pores, 2 :only connected pores.
+    frac_ani : float
+        Fraction of anisotropic inclusions.
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s0, shared with the other stages of the model. A new cache is made if it is
+        not given.
+
+    Returns
+    -------
+    tuple
+        kd_eff_isolated, kd_eff_connected: (TITensor, TITensor), batch shape (n, number of inclusions), None for
+        the inclusion type that is not present.
+    """
+    log_length = c0.shape[0]
+    if g_cache is None:
+        g_cache = GTensorCache(c0, s0)
+    c1dry = TITensor.zeros((log_length,))
+    c2dry = TITensor.zeros((log_length,))
+
+    c1_isolated = None
+    if ctrl != 2:
+        c1_isolated = calc_isolated_part_compact(
+            c0, s0, k_fl, alpha_iso, v_iso, ctrl, frac_ani, g_cache
+        )
+        c1dry = c1dry + c1_isolated
+        c2dry = c2dry + c1_isolated @ gd @ c1_isolated
+    if ctrl != 0:
+        c1_connected = calc_isolated_part_compact(
+            c0, s0, np.zeros_like(k_fl), alpha_con, v_con, ctrl, frac_ani, g_cache
+        )
+        c1dry = c1dry + c1_connected
+        c2dry = c2dry + c1_connected @ gd @ c1_connected
+        if c1_isolated is not None:
+            c2dry = (
+                c2dry
+                + c1_connected @ gd @ c1_isolated
+                + c1_isolated @ gd @ c1_connected
+            )
+
+    i4 = TITensor.identity()
+    c_dry_factor = (i4 + c1dry.solve(c2dry)).inv()
+    c_eff_dry = c0 + c1dry @ c_dry_factor
+    temp = (c_dry_factor @ c_eff_dry.inv())[:, np.newaxis]
+
+    def _kd_eff(alpha):
+        g = g_cache.compact(_as_2d(alpha, log_length))
+        return (i4 + g @ c0[:, np.newaxis]).solve(temp)
+
+    kd_eff_isolated = _kd_eff(alpha_iso) if ctrl != 2 else None
+    kd_eff_connected = _kd_eff(alpha_con) if ctrl != 0 else None
+    return kd_eff_isolated, kd_eff_connected
+
+
+def calc_kd_td_compact(c0, s0, alpha, g_cache=None):
+    """Dry K-tensors and dry t-matrices of the connected inclusions, see calc_kd_vec and calc_td_vec. The g-tensor of
+    each inclusion is shared by the two.
+
+    Parameters
+    ----------
+    c0 : TITensor
+        Stiffness tensor of the host material, batch shape (n,).
+    s0 : TITensor
+        Inverse of stiffness tensor.
+    alpha : np.ndarray
+        Aspect ratios of the inclusions, (number of inclusions) or (n, number of inclusions).
+    g_cache : GTensorCache, optional
+        Cache of g-tensors for c0 and s0, shared with the other stages of the model. A new cache is made if it is
+        not given.
+
+    Returns
+    -------
+    tuple
+        kd, td : (TITensor, TITensor), batch shape (n, number of inclusions).
+    """
+    alpha = _as_2d(alpha, c0.shape[0])
+    if g_cache is None:
+        g_cache = GTensorCache(c0, s0)
+    g = g_cache.compact(alpha)
+
+    c0 = c0[:, np.newaxis]
+    s0 = s0[:, np.newaxis]
+    i4 = TITensor.identity()
+    kd = (i4 + g @ c0).solve(s0)
+    td = g.solve(kd @ c0 - i4)
+    return kd, td
+
+
+def calc_x_compact(s0, td):
+    """x-tensors of the connected inclusions, see calc_x_vec.
+
+    Parameters
+    ----------
+    s0 : TITensor
+        Inverse of stiffness tensor of the host material, batch shape (n,).
+    td : TITensor
+        Dry t-matrices, batch shape (n, number of inclusions).
+
+    Returns
+    -------
+    TITensor
+        x-tensor.
+    """
+    s0 = s0[:, np.newaxis]
+    return td @ s0 @ TITensor.i2_i2() @ s0 @ td
+
+
+def calc_c_eff_visco_compact(
+    vs,
+    k_r,
+    eta_f,
+    v,
+    gamma,
+    tau,
+    kd_uuvv,
+    kappa,
+    kappa_f,
+    c0,
+    s0,
+    c1,
+    td,
+    td_bar,
+    x,
+    x_bar,
+    gd,
+    frequency,
+    frac_ani,
+):
+    """Effective stiffness tensor for a visco-elastic system, see calc_c_eff_visco_vec. All tensors are TITensor
+    objects, inclusion dependent tensors with batch shape (n, number of inclusions).
+
+    The frequency can be a vector. Only the frequency dependent terms (theta, z- and t-tensors and the effective
+    stiffness) are calculated with an additional frequency axis, all other inputs are shared by all frequencies.
+
+    Returns
+    -------
+    TITensor
+        Effective stiffness tensor, batch shape (n,) for a single frequency, (n, number of frequencies) for a
+        frequency vector.
+    """
+    log_length = c0.shape[0]
+    single_frequency = np.ndim(frequency) == 0
+    # Frequency is the second batch axis, inclusions the last
+    omega = 2 * np.pi * np.atleast_1d(np.asarray(frequency, dtype=float))
+    omega_inc = omega[:, np.newaxis]
+    v = _as_2d(v, log_length)[:, np.newaxis]
+    gamma = np.asarray(gamma)[:, np.newaxis]
+    tau = np.asarray(tau)
+    if tau.ndim == 2:
+        tau = tau[:, np.newaxis]
+    kd_uuvv = kd_uuvv[:, np.newaxis]
+    kappa = kappa.reshape(log_length, 1)
+    kappa_f = kappa_f.reshape(log_length, 1)
+    dr = (k_r / eta_f).reshape(log_length, 1)
+    k = omega / vs.reshape(log_length, 1)
+    relax = 1 + 1j * omega_inc * gamma * tau
+
+    # theta, see calc_theta_vec
+    sigma_a = np.sum(v / relax, axis=-1)
+    sigma_b = np.sum((v / relax) * kd_uuvv, axis=-1)
+    theta = kappa_f / (
+        (1 - kappa_f / kappa) * sigma_a
+        + kappa_f * sigma_b
+        - (1j * k * k / omega) * dr * kappa_f
+    )
+
+    # Frequency independent tensors
+    td = td[:, np.newaxis]
+    td_bar = td_bar[:, np.newaxis]
+    x = x[:, np.newaxis]
+    x_bar = x_bar[:, np.newaxis]
+    s0 = s0[:, np.newaxis]
+
+    # z-tensors, see calc_z_vec
+    sum_z = ((td + td_bar) * (v * frac_ani / relax)).sum(axis=-1)
+    s0_sum_z = (s0 @ TITensor.i2_i2() @ s0 @ sum_z)[..., np.newaxis]
+    z = td @ s0_sum_z
+    z_bar = td_bar @ s0_sum_z
+
+    # t-matrices, see calc_t_vec
+    theta = theta[..., np.newaxis]
+    fluid = 1j * omega_inc * tau * kappa_f[..., np.newaxis]
+    t = td + (z * theta + x * fluid) / relax
+    t_bar = td_bar + (z_bar * theta + x_bar * fluid) / relax
+
+    # Effective stiffness, see calc_c_eff_vec
+    c1 = c1[:, np.newaxis] + (t * (frac_ani * v) + t_bar * ((1.0 - frac_ani) * v)).sum(
+        axis=-1
+    )
+    c_eff = (
+        c0[:, np.newaxis] + c1 @ (TITensor.identity() + gd[:, np.newaxis] @ c1).inv()
+    )
+    if single_frequency:
+        return c_eff[:, 0]
+    return c_eff
@@ -0,0 +1,435 @@
+import numpy as np
+
+from rock_physics_open.equinor_utilities import gen_utilities
+
+from .compact_tensor import TITensor
+from .g_tensor import GTensorCache
+from .t_matrix_compact import (
+    calc_c_eff_visco_compact,
+    calc_isolated_part_compact,
+    calc_kd_td_compact,
+    calc_x_compact,
+    pressure_input_compact,
+)
+from .velocity_vti_angles import velocity_vti_angles_vec
+
+
+class TMatrixFrame:
+    """Fluid independent part of the vectorised T-Matrix model for one set of inclusions: the host tensors, and the dry
+    K-tensors, dry t-matrices and x-tensors of the connected inclusions with their isotropic averages. The effective
+    stiffness and the velocities for a fluid are found from the frame with the fluid dependent terms only, so that
+    several fluids can be evaluated for the cost of one frame calculation.
+
+    The frame is normally created with t_matrix_frame_vectorised. All inputs are in SI units, and the inclusion
+    concentrations must already be limited by the aspect ratios.
+
+    Parameters
+    ----------
+    k_min : np.ndarray
+        N length array, bulk modulus of matrix/mineral [Pa].
+    mu_min : np.ndarray
+        N length array, shear modulus of matrix/mineral [Pa].
+    rho_min : np.ndarray
+        N length array, density of matrix/mineral [kg/m^3].
+    perm : np.ndarray
+        N length array, permeability [m^2].
+    alpha_con : np.ndarray or None
+        NxM array, aspect ratio of connected inclusions, None if there are no connected inclusions.
+    v_con : np.ndarray or None
+        NxM array, concentration of connected inclusions.
+    alpha_iso : np.ndarray or None
+        NxM array, aspect ratio of isolated inclusions, None if there are no isolated inclusions.
+    v_iso : np.ndarray or None
+        NxM array, concentration of isolated inclusions.
+    tau : np.ndarray
+        M length vector, relaxation time constant [s].
+    case : dict
+        Control parameters "con" and "iso" for connected and anisotropic inclusions, see
+        t_matrix_porosity_vectorised.
+    frac_ani : float
+        Fraction of anisotropic inclusions.
+    c0 : TITensor
+        Host stiffness tensors.
+    s0 : TITensor
+        Inverse of the host stiffness tensors.
+    gd : TITensor
+        Correlation function.
+    g_cache : GTensorCache
+        Cache of g-tensors for c0 and s0.
+    host_restore : np.ndarray or None
+        Index of the unique host material for each sample, given to calculate the dry properties only once for each
+        unique combination of host material and aspect ratios.
+    """
+
+    def __init__(
+        self,
+        k_min,
+        mu_min,
+        rho_min,
+        perm,
+        alpha_con,
+        v_con,
+        alpha_iso,
+        v_iso,
+        tau,
+        case,
+        frac_ani,
+        c0,
+        s0,
+        gd,
+        g_cache,
+        host_restore=None,
+    ):
+        self.log_length = k_min.shape[0]
+        self.k_min = k_min
+        self.rho_min = rho_min
+        self.perm = perm
+        self.alpha_con = alpha_con
+        self.v_con = v_con
+        self.alpha_iso = alpha_iso
+        self.v_iso = v_iso
+        self.tau = tau
+        self.case = case
+        self.frac_ani = frac_ani
+        self.c0 = c0
+        self.s0 = s0
+        self.gd = gd
+        self.g_cache = g_cache
+        # Reference velocity for the wave number
+        self.vs_min = np.sqrt(mu_min / rho_min)
+
+        phi_con = 0.0 if v_con is None else np.sum(v_con, axis=1)
+        phi_iso = 0.0 if v_iso is None else np.sum(v_iso, axis=1)
+        self.phi = phi_con + phi_iso
+
+        if case["con"] == 0:
+            return
+        # Connected part, dry properties (td) and the fluid effect (x) are calculated together with kd
+        if host_restore is not None:
+            idx_unique, idx_restore = gen_utilities.unique_rows(
+                (host_restore, alpha_con)
+            )
+            kd, td = calc_kd_td_compact(
+                c0[idx_unique], s0[idx_unique], alpha_con[idx_unique]
+            )
+            x = calc_x_compact(s0[idx_unique], td)
+            kd, td, x = kd[idx_restore], td[idx_restore], x[idx_restore]
+        else:
+            kd, td = calc_kd_td_compact(c0, s0, alpha_con, g_cache)
+            x = calc_x_compact(s0, td)
+        self.kd_uuvv = kd.normal_sum()
+        self.td = td
+        self.x = x
+        # iso averaging the isotropic porosity
+        self.td_bar = td.iso_av()
+        self.x_bar = x.iso_av()
+
+    def gamma(self, k_fl):
+        """Gamma factor of the connected inclusions for fluid bulk modulus k_fl."""
+        if self.case["con"] == 0:
+            return np.zeros_like(self.tau)
+        return (1 - k_fl / self.k_min).reshape(self.log_length, 1) + k_fl.reshape(
+            self.log_length, 1
+        ) * self.kd_uuvv
+
+    def c_eff(self, k_fl, visco, frequency):
+        """Effective stiffness tensor for a fluid.
+
+        Parameters
+        ----------
+        k_fl : np.ndarray
+            N length array, bulk modulus of fluid [Pa].
+        visco : np.ndarray
+            N length array, fluid viscosity [Pa s].
+        frequency : float or np.ndarray
+            Single float or F length vector, frequency [Hz].
+
+        Returns
+        -------
+        TITensor
+            Effective stiffness tensor, batch shape (N, F), F = 1 for a single frequency.
+        """
+        freq_steps = np.size(frequency)
+        if self.case["con"] == 2:
+            # All connected
+            c1 = TITensor.zeros((self.log_length,))
+        else:
+            # Isolated part: calculated c1 tensor (sum over all the isolated t-matrices and concentrations
+            c1 = calc_isolated_part_compact(
+                self.c0,
+                self.s0,
+                k_fl,
+                self.alpha_iso,
+                self.v_iso,
+                self.case["iso"],
+                self.frac_ani,
+                self.g_cache,
+            )
+        if self.case["con"] == 0:
+            c_eff = self.c0 + c1 @ (TITensor.identity() + self.gd @ c1).inv()
+            # No frequency dependence without connected inclusions
+            return c_eff[:, np.newaxis] * np.ones(freq_steps)
+
+        # Frequency dependent stiffness
+        c_eff = calc_c_eff_visco_compact(
+            self.vs_min,
+            self.perm,
+            visco,
+            self.v_con,
+            self.gamma(k_fl),
+            self.tau,
+            self.kd_uuvv,
+            self.k_min,
+            k_fl,
+            self.c0,
+            self.s0,
+            c1,
+            self.td,
+            self.td_bar,
+            self.x,
+            self.x_bar,
+            self.gd,
+            frequency,
+            self.frac_ani,
+        )
+        return c_eff.reshape_batch((self.log_length, freq_steps))
+
+    def rho_b(self, rho_fl):
+        """Effective density for fluid density rho_fl."""
+        return self.phi * rho_fl + (1 - self.phi) * self.rho_min
+
+    def velocities(self, c_eff, rho_b, angle):
+        """Velocities for effective stiffness tensors with batch shape (N, F) and N length density."""
+        if self.case["iso"] == 0:
+            angle = 0
+        freq_steps = c_eff.shape[1]
+        vel = velocity_vti_angles_vec(
+            c_eff.to_dense().reshape(-1, 6, 6),
+            np.repeat(rho_b, freq_steps),
+            angle,
+        )
+        return tuple(vel_i.reshape(self.log_length, freq_steps) for vel_i in vel)
+
+    def evaluate(
+        self, k_fl, rho_fl, visco, frequency, angle, return_c_eff=False, compact=False
+    ):
+        """Velocities and density of the rock saturated with a fluid. Only the fluid dependent part of the model is
+        calculated.
+
+        Parameters
+        ----------
+        k_fl : np.ndarray
+            N length array, bulk modulus of fluid [Pa].
+        rho_fl : np.ndarray
+            N length array, density of fluid [kg/m^3].
+        visco : np.ndarray or float
+            Single float or N length array, fluid viscosity [cP].
+        frequency : float or np.ndarray
+            Single float or F length vector, measurement frequency [Hz].
+        angle : float
+            Single float, angle of symmetry plane (0 = HTI, 90 = VTI medium).
+        return_c_eff : bool, optional
+            Also return the effective stiffness tensors, by default False.
+        compact : bool, optional
+            Return the effective stiffness tensors as TITensor, by default False.
+
+        Returns
+        -------
+        tuple
+            vp, vsv, vsh, rho_b: (np.ndarray, np.ndarray, np.ndarray, np.ndarray), N length arrays for a single
+            frequency, (N, F) arrays for a frequency vector, followed by c_eff if return_c_eff is True.
+        """
+        k_fl, rho_fl, visco, _ = gen_utilities.dim_check_vector(
+            (k_fl, rho_fl, visco, self.k_min)
+        )
+        c_eff = self.c_eff(k_fl, visco * 1.0e-2, frequency)
+        rho_b = self.rho_b(rho_fl)
+        vp, vsv, vsh = self.velocities(c_eff, rho_b, angle)
+        out = [vp, vsv, vsh, np.repeat(rho_b.reshape(-1, 1), c_eff.shape[1], axis=1)]
+        if return_c_eff:
+            out.append(c_eff if compact else c_eff.to_dense())
+        if np.ndim(frequency) == 0:
+            return tuple(arr[:, 0] for arr in out)
+        return tuple(out)
+
+
+def t_matrix_frame_vectorised(
+    k_min,
+    mu_min,
+    rho_min,
+    phi,
+    perm,
+    alpha,
+    v,
+    tau,
+    frac_inc_con,
+    frac_inc_ani,
+    dedup=False,
+):
+    """Fluid independent part of the vectorised T-Matrix model, see t_matrix_porosity_vectorised for a description
+    of the inputs. The frame is evaluated for one or more fluids with TMatrixFrame.evaluate, e.g. for fluid
+    substitution to several fluids.
+
+    Parameters
+    ----------
+    k_min : np.ndarray
+        N length array, bulk modulus of matrix/mineral [Pa].
+    mu_min : np.ndarray
+        N length array, shear modulus of matrix/mineral [Pa].
+    rho_min : np.ndarray
+        N length array, density of matrix/mineral [kg/m^3].
+    phi : np.ndarray
+        N length array, porosity [fraction].
+    perm : np.ndarray
+        Single float or N length array, permeability [mD].
+    alpha : np.ndarray
+        M length vector or NxM array, aspect ratio for inclusion sets [ratio].
+    v : np.ndarray
+        M length vector or NxM array, fraction of porosity belonging to each inclusion set [fraction].
+    tau : np.ndarray
+        M length vector, relaxation time constant [s].
+    frac_inc_con : float or np.ndarray
+        Single float or N length array with a single value, fraction of inclusions that are connected.
+    frac_inc_ani : float or np.ndaray
+        Single float or N length array with a single value, fraction of inclusions that are anisotropic.
+    dedup : bool, optional
+        Calculate the host properties only once for each unique combination of mineral moduli and aspect ratios, by
+        default False.
+
+    Returns
+    -------
+    TMatrixFrame
+        Frame of the T-Matrix model.
+    """
+    k_min, mu_min, rho_min, phi, perm = gen_utilities.dim_check_vector(
+        (k_min, mu_min, rho_min, phi, perm)
+    )
+    alpha_con, v_con, alpha_iso, v_iso, tau, case, frac_inc_ani = prepare_inclusions(
+        phi, alpha, v, tau, frac_inc_con, frac_inc_ani
+    )
+    limit_concentrations(phi, alpha_con, v_con, alpha_iso, v_iso)
+    c0, s0, gd, host_restore = host_tensors(k_min, mu_min, dedup)
+    return TMatrixFrame(
+        k_min,
+        mu_min,
+        rho_min,
+        perm * 0.986923e-15,
+        alpha_con,
+        v_con,
+        alpha_iso,
+        v_iso,
+        tau,
+        case,
+        frac_inc_ani,
+        c0,
+        s0,
+        gd,
+        GTensorCache(c0, s0),
+        host_restore,
+    )
+
+
+def prepare_inclusions(phi, alpha, v, tau, frac_inc_con, frac_inc_ani):
+    """Concentrations and aspect ratios of connected and isolated inclusions as NxM arrays, None for inclusion types
+    that are not present, and the control parameters of the model.
+
+    Returns
+    -------
+    tuple
+        alpha_con, v_con, alpha_iso, v_iso, tau, case, frac_inc_ani.
+    """
+    log_length = phi.shape[0]
+    # Alpha, v and tau should be of the same length, alpha and v can also be given per sample
+    if np.ndim(alpha) == 2:
+        alpha = np.asarray(alpha, dtype=float)
+        v = np.asarray(v, dtype=float)
+        tau = np.broadcast_to(np.asarray(tau, dtype=float), alpha.shape[1:])
+        if not (v.shape == alpha.shape and alpha.shape[0] == log_length):
+            raise ValueError(
+                "t_matrix_porosity_vectorised: alpha and v must be M length vectors or NxM arrays"
+            )
+    else:
+        (alpha, v, tau) = gen_utilities.dim_check_vector((alpha, v, tau))
+    frac_inc_con = _single_fraction(frac_inc_con, "frac_inc_con")
+    frac_inc_ani = _single_fraction(frac_inc_ani, "frac_inc_ani")
+
+    # Create case based on amount of anisotropic inclusions
+    if frac_inc_ani == 0:
+        case = {"iso": 0}  # All isotropic
+    elif frac_inc_ani == 1:
+        case = {"iso": 2}  # All anisotropic
+    else:
+        case = {"iso": 1}  # Mixed case
+
+    # Create case based on amount of connected inclusions
+    if frac_inc_con == 0:
+        case["con"] = 0
+    elif frac_inc_con == 1:
+        # All connected
+        case["con"] = 2
+    else:
+        # Mixed case
+        case["con"] = 1
+
+    # Vectorise v and alpha
+    v_con = None
+    alpha_con = None
+    v_iso = None
+    alpha_iso = None
+    if case["con"] != 0:
+        v_con = phi.reshape(log_length, 1) * np.atleast_2d(v * frac_inc_con)
+        alpha_con = np.ones(v_con.shape) * np.atleast_2d(alpha)
+    if case["con"] != 2:
+        v_iso = phi.reshape(log_length, 1) * np.atleast_2d(v * (1 - frac_inc_con))
+        alpha_iso = np.ones(v_iso.shape) * np.atleast_2d(alpha)
+
+    return alpha_con, v_con, alpha_iso, v_iso, tau, case, frac_inc_ani
+
+
+def limit_concentrations(phi, alpha_con, v_con, alpha_iso, v_iso):
+    """Check if v(j) > alpha(j) for maximum porosity. If true, set v(j) = alpha(j)/2 to make sure the numbers of
+    inclusions in the system is not violating the approximations for effective medium theories. The concentrations
+    are modified in place."""
+    phi = phi.reshape(-1, 1)
+    for alpha_inc, v_inc in ((alpha_con, v_con), (alpha_iso, v_iso)):
+        if v_inc is None:
+            continue
+        idx_v = v_inc * phi > alpha_inc
+        if np.any(idx_v):
+            v_inc[idx_v] = alpha_inc[idx_v] / 2
+
+
+def host_tensors(k_min, mu_min, dedup=False):
+    """Host stiffness tensors, their inverse and the correlation function, optionally calculated only for unique
+    mineral moduli.
+
+    Returns
+    -------
+    tuple
+        c0, s0, gd, host_restore: (TITensor, TITensor, TITensor, np.ndarray or None). host_restore is the index of
+        the unique host material for each sample if dedup is True.
+    """
+    if not dedup:
+        return (*pressure_input_compact(k_min, mu_min), None)
+    idx_host, host_restore = gen_utilities.unique_rows((k_min, mu_min))
+    c0, s0, gd = (
+        tensor[host_restore]
+        for tensor in pressure_input_compact(k_min[idx_host], mu_min[idx_host])
+    )
+    return c0, s0, gd, host_restore
+
+
+def _single_fraction(frac, name):
+    """The inclusion fractions must be the same for all samples in this function, but they can be given as arrays,
+    e.g. from run_t_matrix, where they can differ by rounding errors only."""
+    frac = np.asarray(frac, dtype=float)
+    if frac.ndim == 0:
+        return float(frac)
+    frac = frac[np.isfinite(frac)]
+    if frac.size == 0:
+        return 0.0
+    if not np.allclose(frac, frac[0], rtol=1.0e-10, atol=1.0e-12):
+        raise ValueError(
+            f"t_matrix_porosity_vectorised: {name} must be a single value for all samples"
+        )
+    return float(np.mean(frac))
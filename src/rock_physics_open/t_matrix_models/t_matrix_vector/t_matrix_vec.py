@@ -4,17 +4,15 @@ import numpy as np
 
 from rock_physics_open.equinor_utilities import gen_utilities
 
-from .array_functions import array_inverse, array_matrix_mult
-from .calc_c_eff import calc_c_eff_visco_vec
-from .calc_isolated import calc_isolated_part_vec
-from .calc_kd import calc_kd_vec
-from .calc_kd_uuv import calc_kd_uuvv_vec
 from .calc_pressure import calc_pressure_vec
-from .calc_td import calc_td_vec
-from .calc_x import calc_x_vec
-from .iso_av import iso_av_vec
-from .pressure_input import pressure_input_utility
-from .velocity_vti_angles import velocity_vti_angles_vec
+from .compact_tensor import TITensor
+from .g_tensor import GTensorCache
+from .t_matrix_frame import (
+    TMatrixFrame,
+    host_tensors,
+    limit_concentrations,
+    prepare_inclusions,
+)
 
 
 def t_matrix_porosity_vectorised(
@@ -34,10 +32,16 @@ def t_matrix_porosity_vectorised(
     frac_inc_con,
     frac_inc_ani,
     pressure=None,
+    dedup=False,
+    return_c_eff=False,
+    compact=False,
 ):
     """Vectorised version of T-Matrix, pure Python version - mainly intended for cases where it is wished to follow
     the entire process through and study intermediate results. The C++ implementation is significantly faster.
 
+    All tensors in the model are transversely isotropic around the same axis, and they are kept in compact form
+    (TITensor) throughout the calculation.
+
     Description of inputs:
     Mineral propeties (effective properties, assumed mixed).
     Fluid properties (effective properties, assume mixed).
@@ -61,27 +65,40 @@ def t_matrix_porosity_vectorised(
     visco : np.ndarray
         Single float or N length array, fluid viscosity [cP].
     alpha : np.ndarray
-        M length vector, aspect ratio for inclusion sets [ratio].
+        M length vector or NxM array, aspect ratio for inclusion sets [ratio].
     v : np.ndarray
-        M length vector, fraction of porosity belonging to each inclusion set [fraction].
+        M length vector or NxM array, fraction of porosity belonging to each inclusion set [fraction].
     tau : np.ndarray
         M length vector, relaxation time constant [s].
-    frequency : float
-        Single float, measurement frequency (seismic, sonic, ultrasonic range) [Hz].
+    frequency : float or np.ndarray
+        Single float or F length vector, measurement frequency (seismic, sonic, ultrasonic range) [Hz]. For a
+        frequency vector, only the frequency dependent part of the model is evaluated per frequency.
     angle : float
         Single float, angle of symmetry plane (0 = HTI, 90 = VTI medium).
     frac_inc_con : float or np.ndarray
-        Single float or N length array, fraction of inclusions that are connected.
+        Single float or N length array with a single value, fraction of inclusions that are connected.
     frac_inc_ani : float or np.ndaray
-        Single float or N length array, fraction of inclusions that are anisotropic.
+        Single float or N length array with a single value, fraction of inclusions that are anisotropic.
     pressure : np.ndarray, optional
         L length array (normally 2), by default None.
+    dedup : bool, optional
+        Calculate the frequency independent host properties (host stiffness tensor and its inverse, dry K-tensors,
+        dry t-matrices and x-tensors) only once for each unique combination of mineral moduli and aspect ratios,
+        which is faster for logs with a few distinct mineral compositions, by default False.
+    return_c_eff : bool, optional
+        Also return the effective stiffness tensors, e.g. for velocities at several angles with
+        velocity_vti_multi_angles_vec, by default False.
+    compact : bool, optional
+        Return the effective stiffness tensors as TITensor instead of (..., 6, 6) arrays, by default False.
 
     Returns
     -------
     tuple
         Of type (np.ndarray, np.ndarray, np.ndarray, np.ndarray). Vertical P-wave velocity [m/s], Vsv: Vertical polarity S-wave velocity [m/s],
-        Vsh: Horizontal polarity S-wave velocity [m/s], rho_b: bulk density [kg/m^3].
+        Vsh: Horizontal polarity S-wave velocity [m/s], rho_b: bulk density [kg/m^3]. The shape is (N, L) for a
+        single frequency, and (N, F) or (N, F, L) for a frequency vector without or with pressure steps.
+        If return_c_eff is True, the effective stiffness tensor is added as a fifth element, with the same leading
+        dimensions as the velocities.
     """
     log_length = len(phi)
     # Check that the inputs that should have the same length actually do
@@ -102,37 +119,9 @@ def t_matrix_porosity_vectorised(
     perm = perm * 0.986923e-15
     visco = visco * 1.0e-2
 
-    # Alpha, v and tau should be of the same length
-    (alpha, v, tau) = gen_utilities.dim_check_vector((alpha, v, tau))
-    shape_len = alpha.shape[0]
-
-    # Shape parameters go into a dict, duplicate here, can be changed with pressure effect
-    shape_params = {
-        "alpha_con": alpha,
-        "alpha_iso": alpha,
-        "v_con": v * frac_inc_con,
-        "v_iso": v * (1 - frac_inc_con),
-        "tau_con": tau,
-        "tau_iso": tau,
-    }
-    # Create case based on amount of anisotropic inclusions
-    if frac_inc_ani == 0:
-        case = {"iso": 0}  # All isotropic
-        angle = 0
-    elif frac_inc_ani == 1:
-        case = {"iso": 2}  # All anisotropic
-    else:
-        case = {"iso": 1}  # Mixed case
-
-    # Create case based on amount of connected inclusions
-    if frac_inc_con == 0:
-        case["con"] = 0
-    elif frac_inc_con == 1:
-        # All connected
-        case["con"] = 2
-    else:
-        # Mixed case
-        case["con"] = 1
+    alpha_con, v_con, alpha_iso, v_iso, tau, case, frac_inc_ani = prepare_inclusions(
+        phi, alpha, v, tau, frac_inc_con, frac_inc_ani
+    )
 
     pressure_steps = 1
     delta_pres = 0.0
@@ -147,119 +136,54 @@ def t_matrix_porosity_vectorised(
         else:
             delta_pres = np.diff(pressure)
 
+    freq_steps = np.size(frequency)
+
     # Predefine output vectors
-    vp = np.zeros((log_length, pressure_steps))
-    vs_v = np.zeros((log_length, pressure_steps))
-    vs_h = np.zeros((log_length, pressure_steps))
-    rho_b_est = np.zeros((log_length, pressure_steps))
+    vp = np.zeros((log_length, freq_steps, pressure_steps))
+    vs_v = np.zeros((log_length, freq_steps, pressure_steps))
+    vs_h = np.zeros((log_length, freq_steps, pressure_steps))
+    rho_b_est = np.zeros((log_length, freq_steps, pressure_steps))
+    c_eff_steps = []
 
     # Matrix properties needed
-    c0, s0, gd = pressure_input_utility(k_min, mu_min, log_length)
-
-    i4 = np.tile(np.eye(6).reshape(1, 6, 6), (log_length, 1, 1))
-
-    # Vectorise v and alpha
-    v_con = None
-    alpha_con = None
-    v_iso = None
-    alpha_iso = None
-    if case["con"] != 0:
-        v_con = phi.reshape(log_length, 1) * shape_params["v_con"].reshape(1, shape_len)
-        alpha_con = np.ones(v_con.shape) * shape_params["alpha_con"].reshape(
-            1, shape_len
-        )
-
-    if case["con"] != 2:
-        v_iso = phi.reshape(log_length, 1) * shape_params["v_iso"].reshape(1, shape_len)
-        alpha_iso = np.ones(v_iso.shape) * shape_params["alpha_iso"].reshape(
-            1, shape_len
-        )
-
+    c0, s0, gd, host_restore = host_tensors(k_min, mu_min, dedup)
     for i in range(pressure_steps):
-        # Check if v(j) > alpha(j)for maximum porosity. If true, set v(j) = alpha(j)/2 to make sure
-        # the numbers of inclusions in the system is not violating the
-        # approximations for effective medium theories.
-        phi_con = 0.0
-        phi_iso = 0.0
-        if case["con"] != 0:
-            idx_v_con = v_con * phi.reshape(log_length, 1) > alpha_con
-            if np.any(idx_v_con):
-                v_con[idx_v_con] = alpha_con[idx_v_con] / 2
-            phi_con = np.sum(v_con, axis=1)
-        if case["con"] != 2:
-            idx_v_iso = v_iso * phi.reshape(log_length, 1) > alpha_iso
-            if np.any(idx_v_iso):
-                v_iso[idx_v_iso] = alpha_iso[idx_v_iso] / 2
-            phi_iso = np.sum(v_iso, axis=1)
+        # The g-tensors are shared by all stages of the model within the pressure step. The aspect ratios change in
+        # every step, so a new cache is made for each step instead of keeping g-tensors that are not used again
+        g_cache = GTensorCache(c0, s0)
         # May seem unnecessary, but V-vectors can change with changing pressure
-        phi_out = phi_con + phi_iso
-
-        # Creating reference matrix
-        vs_min = np.sqrt(mu_min / rho_min)
-
-        if case["con"] == 0:
-            # All isolated
-            # Isolated part: calculated c1 tensor (sum over all the isolated t-matrices and concentrations
-            c1 = calc_isolated_part_vec(
-                c0, s0, k_fl, alpha_iso, v_iso, case["iso"], frac_inc_ani
-            )
-            c_eff = c0 + array_matrix_mult(
-                c1, array_inverse(i4 + array_matrix_mult(gd, c1))
-            )
-            gamma = np.zeros_like(tau)
-        else:
-            kd = calc_kd_vec(c0, i4, s0, alpha_con)
-            kd_uuvv = calc_kd_uuvv_vec(kd)
-            gamma = (1 - k_fl / k_min).reshape(log_length, 1) + k_fl.reshape(
-                log_length, 1
-            ) * kd_uuvv
-            if case["con"] == 1:
-                # Mix
-                # Isolated part: calculated c1 tensor (sum over all the isolated t-matrices and concentrations
-                c1 = calc_isolated_part_vec(
-                    c0, s0, k_fl, alpha_iso, v_iso, case["iso"], frac_inc_ani
-                )
-            else:  # case['con'] == 2
-                # All connected - only c1 differs from the most general case
-                c1 = np.zeros((log_length, 6, 6))
-            # Connected part Calculate dry properties:
-            td = calc_td_vec(c0, i4, s0, kd, alpha_con)
-            # iso averaging the isotropic porosity
-            td_bar = iso_av_vec(td)
-            # Calculate the fluid effect
-            x = calc_x_vec(s0, td)
-            # iso averaging the isotropic porosity
-            x_bar = iso_av_vec(x)
-            # Frequency dependent stiffness
-            c_eff = calc_c_eff_visco_vec(
-                vs_min,
-                perm,
-                visco,
-                v_con,
-                gamma,
-                tau,
-                kd_uuvv,
-                k_min,
-                k_fl,
-                c0,
-                s0,
-                c1,
-                td,
-                td_bar,
-                x,
-                x_bar,
-                gd,
-                frequency,
-                frac_inc_ani,
-            )
+        limit_concentrations(phi, alpha_con, v_con, alpha_iso, v_iso)
+        # Fluid independent part of the model, followed by the fluid dependent part
+        frame = TMatrixFrame(
+            k_min,
+            mu_min,
+            rho_min,
+            perm,
+            alpha_con,
+            v_con,
+            alpha_iso,
+            v_iso,
+            tau,
+            case,
+            frac_inc_ani,
+            c0,
+            s0,
+            gd,
+            g_cache,
+            host_restore,
+        )
+        c_eff = frame.c_eff(k_fl, visco, frequency)
         # Effective density
-        rho_b_est[:, i] = phi_out * rho_fl + (1 - phi_out) * rho_min
-        vp[:, i], vs_v[:, i], vs_h[:, i] = velocity_vti_angles_vec(
-            c_eff, rho_b_est[:, i], angle
+        rho_b_est[:, :, i] = frame.rho_b(rho_fl).reshape(log_length, 1)
+        # All frequencies in one call to the velocity function
+        vp[:, :, i], vs_v[:, :, i], vs_h[:, :, i] = frame.velocities(
+            c_eff, rho_b_est[:, 0, i], angle
         )
+        if return_c_eff:
+            c_eff_steps.append(c_eff.reshape_batch((log_length, freq_steps, 1)))
 
         if i != pressure_steps - 1:
-            alpha_con, v_con, alpha_iso, v_iso, tau, gamma = calc_pressure_vec(
+            alpha_con, v_con, alpha_iso, v_iso, tau, _ = calc_pressure_vec(
                 alpha_con,
                 alpha_iso,
                 v_con,
@@ -269,10 +193,20 @@ def t_matrix_porosity_vectorised(
                 gd,
                 delta_pres[i],
                 tau,
-                gamma,
+                frame.gamma(k_fl),
                 k_fl,
                 case["con"],
                 frac_inc_ani,
+                g_cache,
             )
 
-    return vp, vs_v, vs_h, rho_b_est
+    out = [vp, vs_v, vs_h, rho_b_est]
+    if return_c_eff:
+        c_eff = TITensor.concatenate(c_eff_steps, axis=-1)
+        out.append(c_eff if compact else c_eff.to_dense())
+
+    if np.ndim(frequency) == 0:
+        return tuple(arr[:, 0] for arr in out)
+    if pressure_steps == 1:
+        return tuple(arr[:, :, 0] for arr in out)
+    return tuple(out)
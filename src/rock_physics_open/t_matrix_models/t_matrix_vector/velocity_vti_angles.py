@@ -1,5 +1,7 @@
 import numpy as np
 
+from .compact_tensor import TITensor
+
 
 def velocity_vti_angles_vec(c_eff, rho_eff, angle):
     """Returns the P-velocity and  S-velocities.
@@ -27,6 +29,47 @@ def velocity_vti_angles_vec(c_eff, rho_eff, angle):
     ):
         raise ValueError("velocity_vti_angles: inconsistencies in input shapes")
 
+    return _velocities(*_vti_constants(c_eff, rho_eff), rho_eff, angle)
+
+
+def velocity_vti_multi_angles_vec(c_eff, rho_eff, angles):
+    """Returns the P-velocity and S-velocities for several angles at once, see velocity_vti_angles_vec. The stiffness
+    constants are extracted once, so that an angle sweep only costs the angle dependent trigonometry.
+
+    Parameters
+    ----------
+    c_eff : np.ndarray or TITensor
+        Effective stiffness tensor (nx6x6 matrix or TITensor with batch shape (n,)).
+    rho_eff : np.ndarray
+        Effective density.
+    angles : np.ndarray or float
+        The angles between the wave vector and the axis of symmetry (n_angles length vector).
+
+    Returns
+    -------
+    tuple
+        vp_out, vsv_out, vsh_out : (np.ndarray, np.ndarray, np.ndarray).
+        vp_out, vsv_out, vsh_out : p-velocity, vertical polarisation s-velocity, horizontal polarisation s-velocity,
+        each of shape (n, n_angles).
+    """
+    if isinstance(c_eff, TITensor):
+        c_eff = c_eff.to_dense()
+    angles = np.asarray(angles, dtype=float)
+    if not (
+        c_eff.ndim == 3
+        and rho_eff.ndim == 1
+        and angles.ndim <= 1
+        and (c_eff.shape[0] == rho_eff.shape[0] and c_eff.shape[1] == c_eff.shape[2])
+    ):
+        raise ValueError("velocity_vti_multi_angles: inconsistencies in input shapes")
+
+    constants = [c.reshape(-1, 1) for c in _vti_constants(c_eff, rho_eff)]
+    return _velocities(*constants, rho_eff.reshape(-1, 1), angles.reshape(1, -1))
+
+
+def _vti_constants(c_eff, rho_eff):
+    # Stiffness constants c11, c33, c44, c66 and c13 of the VTI medium
+
     # vp45
     m45 = (
         (c_eff[:, 0, 0] - c_eff[:, 3, 3] / 2.0) * 0.5
@@ -54,6 +97,11 @@ def velocity_vti_angles_vec(c_eff, rho_eff, angle):
         + (c11 + c44) * (c33 + c44)
     )
 
+    return c11, c33, c44, c66, c13
+
+
+def _velocities(c11, c33, c44, c66, c13, rho_eff, angle):
+    # Phase velocities for the angle(s) between the wave vector and the axis of symmetry
     rad_angle = (angle * np.pi) / 180.0
 
     m_real = (
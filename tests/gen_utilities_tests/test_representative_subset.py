@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from rock_physics_open.equinor_utilities.gen_utilities import representative_subset
+
+
+class RepresentativeSubsetTestCase(unittest.TestCase):
+    def test_representative_subset(self):
+        rng = np.random.default_rng(1234)
+        phi = rng.uniform(0.05, 0.35, 5000)
+        k_min = np.where(rng.uniform(size=5000) > 0.5, 36.8e9, 70.0e9)
+        k_fl = 2.7e9 * np.ones(5000)
+        idx, counts = representative_subset((phi, k_min, k_fl), 100)
+
+        assert 0 < idx.shape[0] <= 100
+        assert np.all(np.diff(idx) > 0)
+        # All samples are represented once, and both minerals and the porosity range are covered
+        assert counts.sum() == 5000
+        np.testing.assert_array_equal(np.unique(k_min[idx]), [36.8e9, 70.0e9])
+        assert phi[idx].min() < 0.1
+        assert phi[idx].max() > 0.3
+
+        # Short logs are returned as they are
+        idx, counts = representative_subset((phi[:50], k_min[:50]), 100)
+        np.testing.assert_array_equal(idx, np.arange(50))
+        np.testing.assert_array_equal(counts, np.ones(50))
+
+    def test_representative_subset_length_mismatch(self):
+        with pytest.raises(ValueError, match="equal length"):
+            representative_subset((np.ones(3), np.ones(4)), 2)
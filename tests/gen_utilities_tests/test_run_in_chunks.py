@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from rock_physics_open.equinor_utilities.gen_utilities import (
+    chunk_slices,
+    run_in_chunks,
+)
+
+
+def _add(a, b):
+    return a + b
+
+
+class RunInChunksTestCase(unittest.TestCase):
+    def test_chunk_slices(self):
+        slices = chunk_slices(10, 4)
+        assert slices == [slice(0, 4), slice(4, 8), slice(8, 10)]
+        assert chunk_slices(0, 4) == []
+
+    def test_run_in_chunks(self):
+        a = np.arange(23.0)
+        b = 2.0 * np.arange(23.0)
+        for n_workers, use_processes in ((None, False), (3, False), (2, True)):
+            out = np.full(23, np.nan)
+            chunk_sizes = []
+
+            def _store(sl, res, out=out, chunk_sizes=chunk_sizes):
+                out[sl] = res
+                chunk_sizes.append(res.size)
+
+            run_in_chunks(
+                _add,
+                (a, b),
+                _store,
+                chunk_size=5,
+                n_workers=n_workers,
+                use_processes=use_processes,
+            )
+            np.testing.assert_array_equal(out, a + b)
+            assert sorted(chunk_sizes) == [3, 5, 5, 5, 5]
+
+    def test_run_in_chunks_unequal_length(self):
+        with pytest.raises(ValueError, match="equal length"):
+            run_in_chunks(_add, (np.ones(3), np.ones(4)), print, chunk_size=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
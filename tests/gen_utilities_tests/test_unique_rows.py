@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from rock_physics_open.equinor_utilities.gen_utilities import unique_rows
+
+
+class UniqueRowsTestCase(unittest.TestCase):
+    def test_unique_rows(self):
+        k = np.array([36.0, 36.0, 70.0, 36.0, 70.0, 36.0])
+        mu = np.array([44.0, 44.0, 30.0, 44.0, 30.0, 45.0])
+        alpha = np.array(
+            [[0.1, 0.5], [0.1, 0.5], [0.1, 0.5], [0.2, 0.5]] + [[0.1, 0.5]] * 2
+        )
+        idx_unique, idx_restore = unique_rows((k, mu, alpha, 2.0))
+
+        rows = np.column_stack((k, mu, alpha))
+        expected = np.unique(rows, axis=0)
+        assert idx_unique.shape[0] == expected.shape[0] == 4
+        np.testing.assert_array_equal(rows[idx_unique][idx_restore], rows)
+
+        # All unique
+        idx_unique, idx_restore = unique_rows((np.arange(5.0),))
+        np.testing.assert_array_equal(idx_unique, np.arange(5))
+        np.testing.assert_array_equal(idx_restore, np.arange(5))
+
+    def test_unique_rows_length_mismatch(self):
+        with pytest.raises(ValueError, match="equal length"):
+            unique_rows((np.ones(3), np.ones(4)))
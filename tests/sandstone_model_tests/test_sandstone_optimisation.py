@@ -1,4 +1,5 @@
 import os
+import pickle
 
 import numpy as np
 import pandas as pd
@@ -15,6 +16,8 @@ from rock_physics_open.sandstone_models import (
     friable_model_optimisation,
     patchy_cement_model_optimisation,
 )
+from rock_physics_open.t_matrix_models import run_multi_well_optimisation
+from rock_physics_open.t_matrix_models.opt_subst_utilities import load_opt_params
 from tests.config import TESTDATA_DIR
 
 os.chdir(TESTDATA_DIR)
@@ -109,3 +112,54 @@ def test_patchy_cement_optimisation(data_dir):
         store_snapshot(get_snapshot_name(), *args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def test_multi_well_optimisation(data_dir):
+    # Wells optimised together, serially or in a process pool, give the same parameters as one by one, and a
+    # failing well does not stop the others
+    file_name = str(data_dir.joinpath("multi_well_optimisation.pkl"))
+    n = phit.shape[0] // 2
+    wells = {}
+    for i, sl in enumerate((slice(0, n), slice(n, None))):
+        wells[f"well_{i}"] = {
+            "k_min": k_min[sl],
+            "mu_min": mu_min[sl],
+            "rho_min": rho_min[sl],
+            "k_fl": k_fl[sl],
+            "rho_fl": rho_fl[sl],
+            "por": phit[sl],
+            "p_eff": p_eff[sl],
+            "vp": vp[sl],
+            "vs": vs[sl],
+            "rhob": rhob[sl],
+        }
+    wells["bad_well"] = dict(wells["well_0"], vp=vp[:3])
+    single = {
+        well_name: friable_model_optimisation(
+            **inputs,
+            file_out_str=str(data_dir.joinpath(f"{well_name}.pkl")),
+        )
+        for well_name, inputs in wells.items()
+        if well_name != "bad_well"
+    }
+
+    for n_workers in (None, 2):
+        logs, report = run_multi_well_optimisation(
+            friable_model_optimisation,
+            iter(wells.items()),
+            file_out_str=file_name,
+            n_workers=n_workers,
+        )
+        assert report["bad_well"]["status"] == "failed"
+        assert "ValueError" in report["bad_well"]["error"]
+        with open(file_name, "rb") as f_in:
+            store = pickle.load(f_in)
+        assert sorted(store) == sorted(logs) == ["well_0", "well_1"]
+        for well_name, args in single.items():
+            assert report[well_name]["status"] == "ok"
+            assert report[well_name]["time"] > 0.0
+            assert store[well_name]["well_name"] == well_name
+            _, opt_params, _ = load_opt_params(data_dir.joinpath(f"{well_name}.pkl"))
+            np.testing.assert_array_equal(store[well_name]["opt_vec"], opt_params)
+            for arr, arr_ref in zip(logs[well_name], args):
+                np.testing.assert_array_equal(arr, arr_ref)
@@ -1,6 +1,7 @@
 import os
 
 import numpy as np
+import pytest
 
 from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     INITIATE,
@@ -9,7 +10,15 @@ from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     read_snapshot,
     store_snapshot,
 )
-from rock_physics_open.span_wagner import co2_properties
+from rock_physics_open.span_wagner import co2_properties, co2_property_bundle
+from rock_physics_open.span_wagner.co2_properties import (
+    CO2_BUNDLE_PROPERTIES,
+    array_carbon_dioxide_density,
+    carbon_dioxide_density,
+    initial_density_grid,
+    lookup_table_property,
+    vectorized_carbon_dioxide_density,
+)
 
 temp = 100.0 * np.linspace(0.8, 1.2, 101)
 pres = 23.0e6 * np.linspace(0.8, 1.2, 101)
@@ -36,3 +45,129 @@ def test_co2_properties():
         store_snapshot(get_snapshot_name(), *args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def test_vectorized_co2_density_matches_scalar_solver():
+    rng = np.random.default_rng(1)
+    abs_temp = rng.uniform(220.0, 500.0, 200)
+    pres_mpa = rng.uniform(0.6, 60.0, 200)
+    for force_vapor in ("auto", True, False):
+        expected = carbon_dioxide_density(
+            abs_temp, pres_mpa, force_vapor=force_vapor, raise_error=False
+        )
+        result = vectorized_carbon_dioxide_density(
+            abs_temp, pres_mpa, force_vapor=force_vapor, raise_error=False
+        )
+        np.testing.assert_allclose(result, expected, rtol=1e-9, equal_nan=True)
+
+
+def test_vectorized_co2_density_raise_error():
+    # Liquid phase cannot be found below the vapor pressure
+    with pytest.raises(ValueError, match="different signs"):
+        vectorized_carbon_dioxide_density(
+            np.array([250.0, 280.0]), np.array([10.0, 1.0]), force_vapor=False
+        )
+    result = vectorized_carbon_dioxide_density(
+        np.array([250.0, 280.0]),
+        np.array([10.0, 1.0]),
+        force_vapor=False,
+        raise_error=False,
+    )
+    assert np.isfinite(result[0])
+    assert np.isnan(result[1])
+
+
+def test_vectorized_co2_density_scalar_input():
+    result = vectorized_carbon_dioxide_density(320.0, 20.0)
+    assert np.ndim(result) == 0
+    assert np.isclose(result, carbon_dioxide_density(320.0, 20.0), rtol=1e-9)
+
+
+def test_array_co2_density_reuses_initial_grid(tmp_path):
+    abs_temp = np.linspace(300.0, 380.0, 50)
+    pres_mpa = np.linspace(8.0, 40.0, 50)
+    grid_file = tmp_path / "initial_density.npz"
+    expected = vectorized_carbon_dioxide_density(abs_temp, pres_mpa)
+
+    result = array_carbon_dioxide_density(
+        abs_temp, pres_mpa, "auto", grid_file=grid_file
+    )
+    np.testing.assert_allclose(result, expected, rtol=1e-9)
+    grid = initial_density_grid(grid_file)
+    assert grid_file.is_file()
+    grid_shape = grid.z_grid.shape
+
+    # Inputs within the grid reuse it as is
+    result = array_carbon_dioxide_density(
+        abs_temp[::2], pres_mpa[::2], "auto", grid_file=grid_file
+    )
+    np.testing.assert_allclose(result, expected[::2], rtol=1e-9)
+    assert grid.z_grid.shape == grid_shape
+
+
+@pytest.mark.parametrize("method", ["linear", "cubic"])
+def test_co2_properties_interpolated(method):
+    # Supercritical samples, away from the saturation line
+    temp_c = np.linspace(40.0, 120.0, 51)
+    pres_pa = np.linspace(10.0e6, 40.0e6, 51)
+    expected = co2_properties(temp_c, pres_pa)
+    result = co2_properties(
+        temp_c, pres_pa, interpolate=True, interpolation_method=method
+    )
+    for res, exp in zip(result, expected):
+        np.testing.assert_allclose(res, exp, rtol=1e-2)
+
+
+def test_co2_density_interpolated_out_of_range():
+    result = carbon_dioxide_density(
+        np.array([320.0, 600.0]), np.array([20.0, 20.0]), interpolate=True
+    )
+    assert np.isclose(result[0], carbon_dioxide_density(320.0, 20.0), rtol=2e-3)
+    assert np.isnan(result[1])
+
+
+def test_co2_lookup_table_cubic_velocity_only():
+    # Cubic interpolation is only accurate for the velocity table
+    velocity = lookup_table_property(
+        "carbon_dioxide_velocity", 320.0, 20.0, method="cubic"
+    )
+    assert np.isclose(velocity, co2_properties(320.0 - 273.15, 20.0e6)[0], rtol=1e-3)
+    for name in ("carbon_dioxide_density", "carbon_dioxide_bulk_modulus"):
+        with pytest.raises(ValueError, match="cubic interpolation is not accurate"):
+            lookup_table_property(name, 320.0, 20.0, method="cubic")
+
+
+def test_co2_property_bundle():
+    # Reference values at 300 K and 10 MPa, from Span & Wagner's equation of state
+    bundle = co2_property_bundle(np.array([26.85]), np.array([10.0e6]))
+    assert set(bundle) == set(CO2_BUNDLE_PROPERTIES)
+    np.testing.assert_allclose(bundle["density"], 801.6, rtol=1e-3)
+    np.testing.assert_allclose(bundle["velocity"], 414.3, rtol=1e-3)
+    np.testing.assert_allclose(bundle["cp"], 2990.6, rtol=1e-3)
+    np.testing.assert_allclose(bundle["cv"], 949.6, rtol=1e-3)
+    np.testing.assert_allclose(
+        bundle["heat_capacity_ratio"],
+        bundle["bulk_modulus"] / bundle["isothermal_bulk_modulus"],
+        rtol=1e-10,
+    )
+
+    vel, den, k = co2_properties(temp, pres)
+    bundle = co2_property_bundle(temp, pres, properties=["bulk_modulus", "density"])
+    assert list(bundle) == ["bulk_modulus", "density"]
+    np.testing.assert_array_equal(bundle["density"], den)
+    np.testing.assert_array_equal(bundle["bulk_modulus"], k)
+
+    with pytest.raises(ValueError, match="unknown CO2 properties"):
+        co2_property_bundle(temp, pres, properties=["viscosity"])
+
+
+def test_co2_properties_chunked():
+    vel, den, k = co2_properties(temp, pres)
+    for kwargs in (
+        {"chunk_size": 17},
+        {"chunk_size": 17, "n_workers": 3},
+        {"chunk_size": 40, "n_workers": 2, "use_processes": True},
+    ):
+        result = co2_properties(temp, pres, **kwargs)
+        for res, ref in zip(result, (vel, den, k)):
+            np.testing.assert_array_equal(res, ref)
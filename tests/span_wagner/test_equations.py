@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from rock_physics_open.span_wagner import coefficients, equations
+
+sp = pytest.importorskip("sympy")
+
+_COEFF_NAMES = "n1 t1 d1 n2 d2 t2 c2 n3 d3 t3 alpha3 epsilon3 beta3 gamma3 n4 b4 a4 beta4 A4 B4 C4 D4"
+
+
+def _sympy_residual_helmholtz_energy(delta_, tau_, diff_delta, diff_tau):
+    """
+    Reference implementation of the residual helmholtz energy, differentiated symbolically with sympy.
+    """
+    coeff_symbols = sp.symbols(_COEFF_NAMES)
+    (
+        n1,
+        t1,
+        d1,
+        n2,
+        d2,
+        t2,
+        c2,
+        n3,
+        d3,
+        t3,
+        alpha3,
+        epsilon3,
+        beta3,
+        gamma3,
+        n4,
+        b4,
+        a4,
+        beta4,
+        A4,
+        B4,
+        C4,
+        D4,
+    ) = coeff_symbols
+    tau, delta = sp.symbols("tau delta", real=True)
+    s1 = n1 * delta**d1 * tau**t1
+    s2 = n2 * delta**d2 * tau**t2 * sp.exp(-(delta**c2))
+    s3 = (
+        n3
+        * delta**d3
+        * tau**t3
+        * sp.exp(-alpha3 * (delta - epsilon3) ** 2 - beta3 * (tau - gamma3) ** 2)
+    )
+    theta_expr = (1 - tau) + A4 * ((delta - 1) ** 2) ** (1 / (2 * beta4))
+    bigdelta_expr = theta_expr**2 + B4 * ((delta - 1) ** 2) ** a4
+    bigphi_expr = sp.exp(-C4 * (delta - 1) ** 2 - D4 * (tau - 1) ** 2)
+    s4 = n4 * bigdelta_expr**b4 * delta * bigphi_expr
+
+    coeff_vars = [getattr(coefficients, s.name) for s in coeff_symbols]
+    diff = [delta] * diff_delta + [tau] * diff_tau
+    result = 0.0
+    for expr in (s1, s2, s3, s4):
+        if len(diff) > 0:
+            expr = expr.diff(*diff)
+        func = sp.utilities.lambdify(
+            list(coeff_symbols) + [tau, delta],
+            expr.powsimp(),
+            modules=["numpy", {"DiracDelta": lambda x: x == 0}],
+        )
+        result = result + np.sum(func(*coeff_vars, tau_, delta_), axis=-1)
+    return result
+
+
+@pytest.mark.parametrize(
+    ("diff_delta", "diff_tau"),
+    [(0, 0), (1, 0), (0, 1), (2, 0), (0, 2), (1, 1)],
+)
+def test_residual_helmholtz_energy_matches_sympy(diff_delta, diff_tau):
+    delta, tau = np.meshgrid(
+        np.linspace(0.01, 2.8, 23), np.linspace(0.3, 1.45, 19), indexing="ij"
+    )
+    delta = delta.reshape(-1, 1)
+    tau = tau.reshape(-1, 1)
+
+    result = equations.residual_helmholtz_energy(delta, tau, diff_delta, diff_tau)
+    expected = _sympy_residual_helmholtz_energy(delta, tau, diff_delta, diff_tau)
+
+    assert result.shape == (delta.shape[0],)
+    np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_residual_helmholtz_energy_invalid_order():
+    delta = np.array([[0.5]])
+    tau = np.array([[0.9]])
+    with pytest.raises(ValueError, match="derivative order"):
+        equations.residual_helmholtz_energy(delta, tau, 2, 1)
+
+
+def test_residual_helmholtz_derivatives_single_pass():
+    delta = np.linspace(0.01, 2.8, 31).reshape(-1, 1)
+    tau = np.linspace(0.3, 1.45, 31).reshape(-1, 1)
+    orders = [(0, 0), (1, 0), (2, 0), (1, 1), (0, 2)]
+    result = equations.residual_helmholtz_derivatives(delta, tau, orders)
+    assert list(result) == orders
+    for diff_delta, diff_tau in orders:
+        np.testing.assert_allclose(
+            result[(diff_delta, diff_tau)],
+            equations.residual_helmholtz_energy(delta, tau, diff_delta, diff_tau),
+            rtol=1e-12,
+        )
@@ -0,0 +1,108 @@
+import zipfile
+
+import numpy as np
+
+from rock_physics_open.span_wagner.co2_properties import (
+    carbon_dioxide_bulk_modulus,
+    vectorized_carbon_dioxide_density,
+)
+from rock_physics_open.span_wagner.tables.generate_tables import (
+    TABLE_NAMES,
+    generate_co2_tables,
+)
+from rock_physics_open.span_wagner.tables.lookup_table import LazyLookupGrid
+
+
+class _CountingFunc:
+    def __init__(self):
+        self.n_evaluations = 0
+
+    def __call__(self, x, y):
+        self.n_evaluations += x.size
+        return x + 2.0 * y
+
+
+def test_lazy_lookup_grid_interpolation():
+    grid = LazyLookupGrid(_CountingFunc(), x_step=1.1, y_step=1.2)
+    x = np.array([2.0, 3.5, 7.0])
+    y = np.array([1.5, 4.0, 0.5])
+    np.testing.assert_allclose(grid(x, y), x + 2.0 * y, rtol=1e-10)
+
+
+def test_lazy_lookup_grid_extends_with_new_nodes_only():
+    func = _CountingFunc()
+    grid = LazyLookupGrid(func, x_step=1.1, y_step=1.2)
+    grid(np.array([2.0, 3.0]), np.array([1.0, 2.0]))
+    n_initial = func.n_evaluations
+    assert n_initial == grid.z_grid.size
+
+    # Points inside the grid do not trigger any evaluations
+    grid(np.array([2.5]), np.array([1.5]))
+    assert func.n_evaluations == n_initial
+
+    # Points outside the grid only evaluate the new nodes
+    grid(np.array([10.0]), np.array([1.5]))
+    assert func.n_evaluations == grid.z_grid.size
+    xx, yy = np.meshgrid(grid.x, grid.y, indexing="ij")
+    np.testing.assert_allclose(grid.z_grid, xx + 2.0 * yy)
+
+
+def test_lazy_lookup_grid_persistence(tmp_path):
+    filename = tmp_path / "grid.npz"
+    func = _CountingFunc()
+    grid = LazyLookupGrid(func, x_step=1.1, y_step=1.2, filename=filename)
+    grid(np.array([2.0, 3.0]), np.array([1.0, 2.0]))
+    assert filename.is_file()
+
+    reloaded_func = _CountingFunc()
+    reloaded = LazyLookupGrid(reloaded_func, x_step=1.1, y_step=1.2, filename=filename)
+    np.testing.assert_array_equal(reloaded.z_grid, grid.z_grid)
+    reloaded(np.array([2.5]), np.array([1.5]))
+    assert reloaded_func.n_evaluations == 0
+
+    # Grids with a different lattice are not reused
+    other = LazyLookupGrid(_CountingFunc(), x_step=1.05, y_step=1.2, filename=filename)
+    assert other.z_grid.size == 0
+
+
+def test_lazy_lookup_grid_persistence_suffix(tmp_path):
+    # The suffix that is added to the file name when the grid is stored is also used when it is read
+    grid = LazyLookupGrid(
+        _CountingFunc(), x_step=1.1, y_step=1.2, filename=tmp_path / "grid"
+    )
+    grid(np.array([2.0, 3.0]), np.array([1.0, 2.0]))
+    assert [path.name for path in tmp_path.iterdir()] == ["grid.npz"]
+
+    reloaded_func = _CountingFunc()
+    reloaded = LazyLookupGrid(
+        reloaded_func, x_step=1.1, y_step=1.2, filename=str(tmp_path / "grid")
+    )
+    np.testing.assert_array_equal(reloaded.z_grid, grid.z_grid)
+    assert reloaded_func.n_evaluations == 0
+
+
+def test_generate_co2_tables(tmp_path):
+    temperatures = np.linspace(320.0, 360.0, 5)
+    pressures = np.linspace(10.0, 30.0, 6)
+    tables = generate_co2_tables(tmp_path, temperatures, pressures)
+    for name in TABLE_NAMES:
+        assert (tmp_path / f"{name}.npz").is_file()
+        assert tables[name].shape == (5, 6)
+        with zipfile.ZipFile(tmp_path / f"{name}.npz") as table_file:
+            assert all(
+                info.compress_type == zipfile.ZIP_DEFLATED
+                for info in table_file.infolist()
+            )
+    # The tables are given for the temperatures along the first axis and the pressures along the second
+    density = vectorized_carbon_dioxide_density(
+        np.full(6, temperatures[1]), pressures, raise_error=False
+    )
+    np.testing.assert_allclose(tables["carbon_dioxide_density"][1], density)
+    np.testing.assert_allclose(
+        tables["carbon_dioxide_bulk_modulus"][1],
+        carbon_dioxide_bulk_modulus(np.full(6, temperatures[1]), density),
+    )
+    np.testing.assert_allclose(
+        tables["carbon_dioxide_velocity"] ** 2 * tables["carbon_dioxide_density"],
+        tables["carbon_dioxide_bulk_modulus"],
+    )
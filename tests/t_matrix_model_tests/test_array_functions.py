@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from rock_physics_open.t_matrix_models.t_matrix_vector.array_functions import (
+    array_inverse,
+    array_matrix_mult,
+    array_solve,
+)
+
+rng = np.random.default_rng(42)
+a = rng.normal(size=(5, 6, 6)) + 6.0 * np.eye(6)
+b = rng.normal(size=(5, 6, 6))
+c = rng.normal(size=(5, 6, 6)) + 1j * rng.normal(size=(5, 6, 6))
+
+
+def test_array_inverse():
+    expected = np.array([np.linalg.inv(x) for x in a])
+    np.testing.assert_allclose(array_inverse(a), expected, rtol=1e-12)
+
+    out = np.empty_like(a)
+    res = array_inverse(a, out=out)
+    assert res is out
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+
+def test_array_solve():
+    expected = np.array([np.linalg.inv(x) @ y for x, y in zip(a, b)])
+    np.testing.assert_allclose(array_solve(a, b), expected, rtol=1e-10, atol=1e-14)
+
+
+def test_array_matrix_mult():
+    expected = np.array([x @ y @ z for x, y, z in zip(a, b, c)])
+    res = array_matrix_mult(a, b, c)
+    assert res.dtype == np.complex128
+    np.testing.assert_allclose(res, expected, rtol=1e-12)
+
+    out = np.empty((5, 6, 6), dtype=np.complex128)
+    res = array_matrix_mult(a, b, c, out=out, check=False)
+    assert res is out
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+    assert array_matrix_mult(a, b).dtype == np.float64
+    assert array_matrix_mult(a) is a
+
+
+def test_array_functions_check_shapes():
+    with pytest.raises(ValueError, match="dimension/shape"):
+        array_inverse(a[0])
+    with pytest.raises(ValueError, match="dimension/shape"):
+        array_matrix_mult(a, b[:3])
+    with pytest.raises(ValueError, match="dimension/shape"):
+        array_solve(a, b[:, :3, :3])
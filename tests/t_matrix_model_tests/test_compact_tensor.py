@@ -0,0 +1,248 @@
+import numpy as np
+import pytest
+
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_c_eff import (
+    calc_c_eff_visco_vec,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_isolated import (
+    calc_isolated_part_vec,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_kd import calc_kd_vec
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_pressure import (
+    calc_pressure_vec,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_td import calc_td_vec
+from rock_physics_open.t_matrix_models.t_matrix_vector.calc_x import calc_x_vec
+from rock_physics_open.t_matrix_models.t_matrix_vector.compact_tensor import (
+    TITensor,
+    as_compact,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.g_tensor import (
+    GTensorCache,
+    g_tensor_vec,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.iso_av import iso_av_vec
+from rock_physics_open.t_matrix_models.t_matrix_vector.pressure_input import (
+    pressure_input_utility,
+)
+from rock_physics_open.t_matrix_models.t_matrix_vector.t_matrix_compact import (
+    calc_c_eff_visco_compact,
+    calc_isolated_part_compact,
+    calc_kd_td_compact,
+    calc_x_compact,
+    pressure_input_compact,
+)
+
+rng = np.random.default_rng(7)
+
+
+def _random_tensor(shape, complex_values=False):
+    elements = [rng.normal(size=shape) for _ in range(7)]
+    if complex_values:
+        elements = [e + 1j * rng.normal(size=shape) for e in elements]
+    # Make the tensors well conditioned
+    for i in (0, 4, 5, 6):
+        elements[i] = elements[i] + 4.0
+    return TITensor.from_elements(*elements)
+
+
+def test_ti_tensor_algebra():
+    a = _random_tensor((4, 3), complex_values=True)
+    b = _random_tensor((4, 1))
+    a_dense = a.to_dense()
+    b_dense = b.to_dense()
+
+    np.testing.assert_allclose((a @ b).to_dense(), a_dense @ b_dense, atol=1e-12)
+    np.testing.assert_allclose((a + b).to_dense(), a_dense + b_dense, atol=1e-12)
+    np.testing.assert_allclose((a - b).to_dense(), a_dense - b_dense, atol=1e-12)
+    np.testing.assert_allclose(
+        a.inv().to_dense(), np.linalg.inv(a_dense), rtol=1e-10, atol=1e-12
+    )
+    np.testing.assert_allclose(
+        b.solve(a).to_dense(), np.linalg.solve(b_dense, a_dense), atol=1e-12
+    )
+    np.testing.assert_allclose(
+        (a * np.arange(3)).to_dense(), a_dense * np.arange(3)[:, None, None]
+    )
+    np.testing.assert_allclose(a.sum(axis=1).to_dense(), a_dense.sum(axis=1))
+    np.testing.assert_allclose(a.normal_sum(), a_dense[..., :3, :3].sum(axis=(-2, -1)))
+
+    # Mixed compact and dense operations give dense results
+    np.testing.assert_allclose(a @ b_dense, a_dense @ b_dense, atol=1e-12)
+    np.testing.assert_allclose(b_dense @ a, b_dense @ a_dense, atol=1e-12)
+
+    c = _random_tensor((5,))
+    np.testing.assert_allclose(
+        c.iso_av().to_dense(), iso_av_vec(c.to_dense()), atol=1e-12
+    )
+    assert c.nbytes * 5 < c.to_dense().nbytes
+
+
+def test_ti_tensor_from_dense():
+    a = _random_tensor((6,))
+    np.testing.assert_array_equal(
+        TITensor.from_dense(a.to_dense()).to_dense(), a.to_dense()
+    )
+    np.testing.assert_array_equal(TITensor.identity().to_dense(), np.eye(6))
+
+    dense = a.to_dense()
+    dense[2, 0, 1] += 1.0
+    with pytest.raises(ValueError, match="transversely isotropic"):
+        TITensor.from_dense(dense)
+    assert as_compact(dense) is dense
+    assert isinstance(as_compact(a.to_dense()), TITensor)
+
+    singular = TITensor.i2_i2((3,))
+    with pytest.raises(np.linalg.LinAlgError):
+        singular.inv()
+
+
+def test_compact_pipeline_matches_dense():
+    n = 7
+    k_min = np.linspace(60.0e9, 75.0e9, n)
+    mu_min = np.linspace(28.0e9, 34.0e9, n)
+    k_fl = np.linspace(2.2e9, 2.8e9, n)
+    alpha = np.array([0.8, 0.1, 0.01])
+    v = np.outer(np.linspace(0.1, 0.3, n), [0.89, 0.1, 0.01])
+
+    c0, s0, gd = pressure_input_utility(k_min, mu_min, n)
+    c0_c, s0_c, gd_c = pressure_input_compact(k_min, mu_min)
+    np.testing.assert_allclose(c0_c.to_dense(), c0)
+    np.testing.assert_allclose(s0_c.to_dense(), s0, atol=1e-25)
+    np.testing.assert_allclose(gd_c.to_dense(), gd, atol=1e-12)
+
+    i4 = np.tile(np.eye(6), (n, 1, 1))
+    kd = calc_kd_vec(c0, i4, s0, alpha)
+    td = calc_td_vec(c0, i4, s0, kd, alpha)
+    kd_c, td_c = calc_kd_td_compact(c0_c, s0_c, alpha)
+    np.testing.assert_allclose(
+        np.moveaxis(kd_c.to_dense(), 1, -1), kd, rtol=1e-10, atol=1e-25
+    )
+    np.testing.assert_allclose(
+        np.moveaxis(td_c.to_dense(), 1, -1), td, rtol=1e-10, atol=1e-1
+    )
+
+    x = calc_x_vec(s0, td)
+    np.testing.assert_allclose(
+        np.moveaxis(calc_x_compact(s0_c, td_c).to_dense(), 1, -1),
+        x,
+        rtol=1e-10,
+        atol=1e-12,
+    )
+
+    for case_iso in (0, 1, 2):
+        c1 = calc_isolated_part_vec(c0, s0, k_fl, alpha, v, case_iso, 0.4)
+        c1_c = calc_isolated_part_compact(c0_c, s0_c, k_fl, alpha, v, case_iso, 0.4)
+        np.testing.assert_allclose(c1_c.to_dense(), c1, rtol=1e-10, atol=1e-1)
+
+
+def test_c_eff_visco_frequency_vector():
+    n = 5
+    k_min = np.linspace(60.0e9, 75.0e9, n)
+    mu_min = np.linspace(28.0e9, 34.0e9, n)
+    k_fl = np.linspace(2.2e9, 2.8e9, n)
+    alpha = np.array([0.8, 0.1])
+    v = np.outer(np.linspace(0.1, 0.3, n), [0.9, 0.1])
+    tau = np.array([1.0e-7, 1.0e-7])
+    frequencies = np.array([10.0, 1.0e4, 1.0e6])
+    vs = np.sqrt(mu_min / 2700.0)
+    perm = np.full(n, 1.0e-13)
+    visco = np.full(n, 1.0e-3)
+
+    c0, s0, gd = pressure_input_compact(k_min, mu_min)
+    kd, td = calc_kd_td_compact(c0, s0, alpha)
+    x = calc_x_compact(s0, td)
+    kd_uuvv = kd.normal_sum()
+    gamma = (1 - k_fl / k_min).reshape(n, 1) + k_fl.reshape(n, 1) * kd_uuvv
+    c1 = TITensor.zeros((n,))
+
+    compact_args = (c0, s0, c1, td, td.iso_av(), x, x.iso_av(), gd)
+    dense_args = [tensor.to_dense() for tensor in compact_args]
+    for i in (3, 4, 5, 6):
+        dense_args[i] = np.moveaxis(dense_args[i], 1, -1)
+    common = (vs, perm, visco, v, gamma, tau, kd_uuvv, k_min, k_fl)
+
+    c_eff = calc_c_eff_visco_compact(*common, *compact_args, frequencies, 0.5)
+    assert c_eff.shape == (n, 3)
+    c_eff_dense = calc_c_eff_visco_vec(*common, *dense_args, frequencies, 0.5)
+    assert c_eff_dense.shape == (n, 3, 6, 6)
+    np.testing.assert_allclose(c_eff.to_dense(), c_eff_dense, rtol=1e-10, atol=1e-1)
+    for j, freq in enumerate(frequencies):
+        np.testing.assert_allclose(
+            calc_c_eff_visco_compact(*common, *compact_args, freq, 0.5).to_dense(),
+            c_eff_dense[:, j],
+            rtol=1e-10,
+            atol=1e-1,
+        )
+
+
+def test_g_tensor_cache():
+    k_min = np.repeat([70.0e9, 37.0e9], 5)
+    mu_min = np.repeat([30.0e9, 44.0e9], 5)
+    alpha = np.tile([0.1, 0.1, 0.5, 1.0, 0.01], 2)
+    c0, s0, _ = pressure_input_utility(k_min, mu_min, 10)
+    g_cache = GTensorCache(c0, s0)
+
+    np.testing.assert_allclose(
+        g_cache.dense(alpha), g_tensor_vec(c0, s0, alpha), rtol=1e-12, atol=1e-25
+    )
+    assert g_cache.evaluations == 8
+    np.testing.assert_allclose(
+        g_cache.dense(0.1), g_tensor_vec(c0, s0, 0.1), rtol=1e-12, atol=1e-25
+    )
+    assert g_cache.evaluations == 8
+
+    # Inclusion arrays give compact tensors, only new combinations are evaluated
+    alpha_2d = np.stack((alpha, np.full(10, 0.2)), axis=1)
+    g = g_cache.compact(alpha_2d)
+    assert g.shape == (10, 2)
+    np.testing.assert_allclose(
+        g[:, 1].to_dense(), g_tensor_vec(c0, s0, 0.2), rtol=1e-12, atol=1e-25
+    )
+    assert g_cache.evaluations == 10
+
+
+def test_dense_functions_non_ti_host():
+    # Host tensors without TI structure are not cached, and give the same results as g_tensor_vec
+    k_min = np.repeat([70.0e9, 37.0e9], 5)
+    mu_min = np.repeat([30.0e9, 44.0e9], 5)
+    alpha = np.array([0.8, 0.1, 0.01])
+    c0, s0, i4 = pressure_input_utility(k_min, mu_min, 10)
+    c0 = c0.copy()
+    c0[:, 0, 5] = c0[:, 5, 0] = 1.0e9
+    s0 = np.linalg.inv(c0)
+    with pytest.raises(ValueError, match="not transversely isotropic"):
+        GTensorCache(c0, s0)
+
+    kd = calc_kd_vec(c0, i4, s0, alpha)
+    for j, alpha_j in enumerate(alpha):
+        g = g_tensor_vec(c0, s0, np.full(10, alpha_j))
+        np.testing.assert_allclose(
+            kd[..., j], np.linalg.solve(i4 + g @ c0, s0), rtol=1e-10
+        )
+    td = calc_td_vec(c0, i4, s0, kd, alpha)
+    assert np.all(np.isfinite(td))
+    c1 = calc_isolated_part_vec(c0, s0, np.full(10, 2.7e9), alpha, alpha / 10, 1, 0.5)
+    assert np.all(np.isfinite(c1))
+
+
+def test_calc_pressure_compact():
+    n = 6
+    k_min = np.linspace(60.0e9, 75.0e9, n)
+    mu_min = np.linspace(28.0e9, 34.0e9, n)
+    k_fl = np.full(n, 2.7e9)
+    phi = np.linspace(0.1, 0.3, n)
+    alpha = np.tile([0.9, 0.1, 0.01], (n, 1))
+    v = np.tile([0.89, 0.1, 0.01], (n, 1)) * (0.5 * phi).reshape(n, 1)
+    tau = np.full(3, 1.0e-7)
+    dense_input = pressure_input_utility(k_min, mu_min, n)
+    compact_input = pressure_input_compact(k_min, mu_min)
+    for ctrl, frac_ani in ((0, 0.3), (1, 0.3), (2, 0.3), (1, 0.0), (1, 1.0)):
+        common = (20.0e6, tau, np.zeros(3), k_fl, ctrl, frac_ani)
+        res_dense = calc_pressure_vec(alpha, alpha, v, v, *dense_input, *common)
+        res = calc_pressure_vec(alpha, alpha, v, v, *compact_input, *common)
+        for arr, arr_dense in zip(res[:4], res_dense[:4]):
+            if arr_dense is None:
+                assert arr is None
+            else:
+                np.testing.assert_allclose(arr, arr_dense, rtol=1e-12)
@@ -1,6 +1,7 @@
 import os
 
 import numpy as np
+import pytest
 
 from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     INITIATE,
@@ -9,7 +10,11 @@ from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     read_snapshot,
     store_snapshot,
 )
-from rock_physics_open.t_matrix_models import run_t_matrix, t_matrix_porosity_vectorised
+from rock_physics_open.t_matrix_models import (
+    run_t_matrix,
+    t_matrix_porosity_vectorised,
+    velocity_vti_multi_angles_vec,
+)
 
 k_min = np.ones(11) * 71.0e9
 mu_min = np.ones(11) * 32.0e9
@@ -79,3 +84,188 @@ def test_run_t_matrix_porosity_vectorised():
         store_snapshot(get_snapshot_name(), *args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def test_run_t_matrix_c_eff_angles():
+    angles = np.array([0.0, 30.0, 60.0, 90.0])
+    res = run_t_matrix(
+        k_min,
+        mu_min,
+        rho_min,
+        k_fl,
+        rho_fl,
+        phi,
+        perm,
+        visco,
+        alpha,
+        v,
+        tau,
+        frequency,
+        angle,
+        frac_inc_con,
+        frac_inc_ani,
+        pressure=pressure,
+        fcn="t_matrix_porosity_vectorised",
+        return_c_eff=True,
+        compact=True,
+    )
+    assert len(res) == 9
+    assert res[7].shape == res[8].shape == (11,)
+    # The density is returned for the first pressure step
+    vp, vsv, vsh = velocity_vti_multi_angles_vec(res[7], res[6], angles)
+    assert vp.shape == (11, 4)
+    # The velocities at the model angle are also returned directly
+    np.testing.assert_allclose(vp[:, 3], res[0], rtol=1e-12)
+    np.testing.assert_allclose(vsv[:, 3], res[2], rtol=1e-12)
+    np.testing.assert_allclose(vsh[:, 3], res[4], rtol=1e-12)
+
+    # Dense tensors from the vectorised function give the same velocities for all angles
+    _, _, _, rho_b, c_eff = t_matrix_porosity_vectorised(
+        k_min,
+        mu_min,
+        rho_min,
+        k_fl,
+        rho_fl,
+        phi,
+        perm,
+        visco,
+        alpha,
+        v,
+        tau,
+        frequency,
+        angle,
+        frac_inc_con,
+        frac_inc_ani,
+        return_c_eff=True,
+    )
+    assert c_eff.shape == (11, 1, 6, 6)
+    vp_all = velocity_vti_multi_angles_vec(c_eff[:, 0], rho_b[:, 0], angles)[0]
+    for j, ang in enumerate(angles):
+        vp_single = t_matrix_porosity_vectorised(
+            k_min,
+            mu_min,
+            rho_min,
+            k_fl,
+            rho_fl,
+            phi,
+            perm,
+            visco,
+            alpha,
+            v,
+            tau,
+            frequency,
+            ang,
+            frac_inc_con,
+            frac_inc_ani,
+        )[0]
+        np.testing.assert_allclose(vp_all[:, j], vp_single[:, 0], rtol=1e-12)
+
+    with pytest.raises(ValueError, match="return_c_eff"):
+        run_t_matrix(
+            k_min,
+            mu_min,
+            rho_min,
+            k_fl,
+            rho_fl,
+            phi,
+            perm,
+            visco,
+            alpha,
+            v,
+            tau,
+            frequency,
+            angle,
+            frac_inc_con,
+            frac_inc_ani,
+            return_c_eff=True,
+        )
+
+
+def test_run_t_matrix_batch_pressure():
+    # Pressure steps stacked in one run give the same results as the loop over pressure steps
+    pressure_steps = np.linspace(18.0e6, 38.0e6, 5)
+    inputs = (k_min, mu_min, rho_min, k_fl, rho_fl, phi, perm, visco, alpha, v, tau)
+    for fcn in ("t_matrix_porosity_c_alpha_v", "t_matrix_porosity_vectorised"):
+        res = run_t_matrix(
+            *inputs,
+            frequency,
+            angle,
+            frac_inc_con,
+            frac_inc_ani,
+            pressure=pressure_steps,
+            fcn=fcn,
+            batch_pressure=True,
+        )
+        ref = run_t_matrix(
+            *inputs,
+            frequency,
+            angle,
+            frac_inc_con,
+            frac_inc_ani,
+            pressure=pressure_steps,
+            fcn=fcn,
+        )
+        assert all(arr.shape == (11, 5) for arr in res)
+        for i in range(3):
+            np.testing.assert_allclose(
+                res[i], np.stack(ref[5 * i : 5 * (i + 1)], axis=1), rtol=1e-10
+            )
+        np.testing.assert_allclose(res[3][:, 0], ref[15], rtol=1e-12)
+
+
+def test_run_t_matrix_nan_sample():
+    # A sample with undefined porosity gives undefined results for that sample only, also with pressure steps
+    phi_nan = phi.copy()
+    phi_nan[3] = np.nan
+    pressure_steps = np.array([18.0e6, 28.0e6, 38.0e6])
+    inputs = (k_min, mu_min, rho_min, k_fl, rho_fl)
+    for con in (0.0, 0.5, 1.0):
+        res = run_t_matrix(
+            *inputs,
+            phi_nan,
+            perm,
+            visco,
+            alpha,
+            v,
+            tau,
+            frequency,
+            angle,
+            con,
+            frac_inc_ani,
+            pressure=pressure_steps,
+        )
+        ref = run_t_matrix(
+            *inputs,
+            phi,
+            perm,
+            visco,
+            alpha,
+            v,
+            tau,
+            frequency,
+            angle,
+            con,
+            frac_inc_ani,
+            pressure=pressure_steps,
+        )
+        for arr, arr_ref in zip(res, ref):
+            np.testing.assert_array_equal(np.isnan(arr), np.arange(11) == 3)
+            np.testing.assert_allclose(np.delete(arr, 3), np.delete(arr_ref, 3))
+
+    res = t_matrix_porosity_vectorised(
+        *inputs,
+        phi_nan,
+        perm * np.ones_like(phi),
+        visco * np.ones_like(phi),
+        alpha,
+        v,
+        tau,
+        frequency,
+        angle,
+        0.0,
+        frac_inc_ani,
+        pressure=pressure_steps,
+    )
+    for arr in res:
+        assert np.all(np.isnan(arr[3]))
+        assert np.all(np.isfinite(np.delete(arr, 3, axis=0)))
@@ -1,6 +1,7 @@
 import os
 
 import numpy as np
+import pytest
 
 from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     INITIATE,
@@ -15,6 +16,10 @@ from rock_physics_open.t_matrix_models import (
     run_t_matrix_with_opt_params_exp,
     run_t_matrix_with_opt_params_petec,
 )
+from rock_physics_open.t_matrix_models.opt_subst_utilities import (
+    load_opt_params,
+    save_opt_params,
+)
 
 k_min = np.ones(101) * 71.0e9
 mu_min = np.ones(101) * 32.0e9
@@ -125,3 +130,99 @@ def test_run_t_matrix_opt_forward_model_exp(monkeypatch, data_dir):
         store_snapshot(get_snapshot_name(), *args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def _frame_reuse_params(tmp_path, data_dir):
+    # Frame reuse is only available for a fraction of anisotropic inclusions of 0.5, where the vectorised model
+    # matches the calibrated C++ model. The fraction is set to 0.5 in copies of the parameter files
+    for name in ("petec_opt_param.pkl", "exp_opt_param.pkl"):
+        opt_type, opt_params, _ = load_opt_params(data_dir.joinpath(name))
+        opt_params = opt_params.copy()
+        opt_params[0] = 0.5
+        save_opt_params(opt_type, opt_params, tmp_path.joinpath(name))
+    return tmp_path
+
+
+def _fluid_sub_cases():
+    return (
+        (
+            run_t_matrix_with_opt_params_petec,
+            "petec_opt_param.pkl",
+            (k_min, mu_min, rho_min),
+            (),
+        ),
+        (run_t_matrix_with_opt_params_exp, "exp_opt_param.pkl", (), (vsh,)),
+    )
+
+
+def test_run_t_matrix_with_opt_params_multi_fluid(tmp_path, data_dir):
+    # Several fluids in one call must match the fluid substitutions one by one, also when the T-Matrix frame is
+    # shared by all fluids
+    param_dir = _frame_reuse_params(tmp_path, data_dir)
+    fluids = [(k_fl_sub, rho_fl_sub), (k_fl_sub * 0.1, rho_fl_sub * 0.3)]
+    common = (vp, vs, rho, phi)
+    params = (angle, perm, visco, tau, freq)
+    for fcn, fname, mineral, extra in _fluid_sub_cases():
+        fname = param_dir.joinpath(fname)
+        for frame_reuse in (False, True):
+            multi = fcn(
+                *mineral,
+                k_fl_orig,
+                rho_fl_orig,
+                [fl[0] for fl in fluids],
+                [fl[1] for fl in fluids],
+                *common,
+                *extra,
+                *params,
+                fname,
+                frame_reuse=frame_reuse,
+            )
+            for i, (k_fl_i, rho_fl_i) in enumerate(fluids):
+                single = fcn(
+                    *mineral,
+                    k_fl_orig,
+                    rho_fl_orig,
+                    k_fl_i,
+                    rho_fl_i,
+                    *common,
+                    *extra,
+                    *params,
+                    fname,
+                    frame_reuse=frame_reuse,
+                )
+                for arr_multi, arr_single in zip(multi[:5], single[:5]):
+                    np.testing.assert_allclose(arr_multi[i], arr_single, rtol=1e-10)
+                for arr_multi, arr_single in zip(multi[5:], single[5:]):
+                    np.testing.assert_allclose(arr_multi, arr_single, rtol=1e-10)
+
+
+def test_run_t_matrix_with_opt_params_frame_reuse(tmp_path, data_dir):
+    # Frame reuse must give the same results as the C++ model that the parameters are calibrated with. The porosity
+    # is reduced to avoid samples where the modelled shear velocity is undefined
+    param_dir = _frame_reuse_params(tmp_path, data_dir)
+    for fcn, fname, mineral, extra in _fluid_sub_cases():
+        args = (
+            *mineral,
+            k_fl_orig,
+            rho_fl_orig,
+            k_fl_sub,
+            rho_fl_sub,
+            vp,
+            vs,
+            rho,
+            0.5 * phi,
+            *extra,
+            angle,
+            perm,
+            visco,
+            tau,
+            freq,
+        )
+        reference = fcn(*args, param_dir.joinpath(fname))
+        frame = fcn(*args, param_dir.joinpath(fname), frame_reuse=True)
+        for arr_frame, arr_reference in zip(frame, reference):
+            np.testing.assert_allclose(arr_frame, arr_reference, rtol=1e-6)
+
+        # The shipped parameter files have other fractions of anisotropic inclusions
+        with pytest.raises(ValueError, match="frame_reuse"):
+            fcn(*args, data_dir.joinpath(fname), frame_reuse=True)
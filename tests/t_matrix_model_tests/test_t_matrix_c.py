@@ -10,6 +10,7 @@ from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     store_snapshot,
 )
 from rock_physics_open.t_matrix_models import (
+    t_matrix_frame_vectorised,
     t_matrix_porosity_c_alpha_v,
     t_matrix_porosity_vectorised,
 )
@@ -79,3 +80,114 @@ def test_t_matrix_vectorised():
         store_snapshot(get_snapshot_name(), *args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def test_t_matrix_dedup():
+    # Repeated samples with two mineral compositions
+    k_min_2 = np.where(np.arange(21) % 2 == 0, 71.0e9, 37.0e9)
+    mu_min_2 = np.where(np.arange(21) % 2 == 0, 32.0e9, 44.0e9)
+    phi_2 = np.round(phi, 2)
+    inputs = (k_min_2, mu_min_2, rho_min, k_fl, rho_fl, phi_2, perm, visco, alpha, v)
+
+    def _run(dedup):
+        return t_matrix_porosity_c_alpha_v(
+            *inputs,
+            float(tau[0]),
+            frequency,
+            angle,
+            frac_inc_con,
+            frac_inc_ani,
+            dedup=dedup,
+        ) + t_matrix_porosity_vectorised(
+            *inputs,
+            tau,
+            frequency,
+            angle,
+            frac_inc_con,
+            frac_inc_ani,
+            pressure=np.array([18.0e6, 28.0e6]),
+            dedup=dedup,
+        )
+
+    for res, ref in zip(_run(True), _run(False)):
+        np.testing.assert_allclose(res, ref, rtol=1e-12)
+
+
+def test_t_matrix_vectorised_frequency_vector():
+    frequencies = np.array([10.0, 1000.0, 1.0e6])
+    inputs = (k_min, mu_min, rho_min, k_fl, rho_fl, phi, perm, visco, alpha, v, tau)
+    for pressure in (None, np.array([18.0e6, 28.0e6])):
+        res = t_matrix_porosity_vectorised(
+            *inputs, frequencies, angle, frac_inc_con, frac_inc_ani, pressure=pressure
+        )
+        for j, freq in enumerate(frequencies):
+            res_single = t_matrix_porosity_vectorised(
+                *inputs, freq, angle, frac_inc_con, frac_inc_ani, pressure=pressure
+            )
+            for arr, arr_single in zip(res, res_single):
+                if pressure is None:
+                    assert arr.shape == (21, 3)
+                    arr_single = arr_single[:, 0]
+                else:
+                    assert arr.shape == (21, 3, 2)
+                np.testing.assert_allclose(arr[:, j], arr_single, rtol=1e-12)
+
+
+def test_t_matrix_frame():
+    # One frame evaluated for several fluids gives the same result as the full model for each fluid
+    fluids = [(k_fl, rho_fl, visco), (k_fl * 0.05, rho_fl * 0.2, visco * 0.01)]
+    for frac_con, frac_ani in ((0.0, 0.5), (0.5, 0.0), (1.0, 1.0), (0.5, 0.5)):
+        frame = t_matrix_frame_vectorised(
+            k_min, mu_min, rho_min, phi, perm, alpha, v, tau, frac_con, frac_ani
+        )
+        for k_fl_i, rho_fl_i, visco_i in fluids:
+            res = frame.evaluate(
+                k_fl_i, rho_fl_i, visco_i, frequency, angle, return_c_eff=True
+            )
+            ref = t_matrix_porosity_vectorised(
+                k_min,
+                mu_min,
+                rho_min,
+                k_fl_i,
+                rho_fl_i,
+                phi,
+                perm,
+                visco_i,
+                alpha,
+                v,
+                tau,
+                frequency,
+                angle,
+                frac_con,
+                frac_ani,
+                return_c_eff=True,
+            )
+            for arr, arr_ref in zip(res, ref):
+                np.testing.assert_allclose(arr, arr_ref[:, 0], rtol=1e-12)
+
+
+def test_t_matrix_c_chunks():
+    # Chunked runs must give exactly the same results as a single call to the C++ library
+    frac_con_vec = np.full(21, frac_inc_con)
+    inputs = (k_min, mu_min, rho_min, k_fl, rho_fl, phi, perm, visco, alpha, v)
+    ref = t_matrix_porosity_c_alpha_v(
+        *inputs, float(tau[0]), frequency, angle, frac_inc_con, frac_inc_ani
+    )
+    for frac_con in (frac_inc_con, frac_con_vec):
+        for kwargs in (
+            {"chunk_size": 4},
+            {"chunk_size": 5, "n_workers": 3, "use_processes": False},
+            {"n_workers": 2},
+            {"chunk_size": 8, "n_workers": 2},
+        ):
+            res = t_matrix_porosity_c_alpha_v(
+                *inputs,
+                float(tau[0]),
+                frequency,
+                angle,
+                frac_con,
+                frac_inc_ani,
+                **kwargs,
+            )
+            for arr, arr_ref in zip(res, ref):
+                np.testing.assert_array_equal(arr, arr_ref)
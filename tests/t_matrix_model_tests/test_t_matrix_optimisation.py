@@ -2,6 +2,7 @@ import os
 
 import numpy as np
 import pandas as pd
+import pytest
 
 from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     INITIATE,
@@ -11,12 +12,17 @@ from rock_physics_open.equinor_utilities.snapshot_test_utilities import (
     store_snapshot,
 )
 from rock_physics_open.t_matrix_models.curvefit_t_matrix_exp import (
+    PreparedCurveFitExp,
     curvefit_t_matrix_exp,
 )
 from rock_physics_open.t_matrix_models.curvefit_t_matrix_min import (
+    PreparedCurveFit2InclusionSets,
     curve_fit_2_inclusion_sets,
 )
-from rock_physics_open.t_matrix_models.opt_subst_utilities import gen_opt_routine
+from rock_physics_open.t_matrix_models.opt_subst_utilities import (
+    gen_opt_percentile_routine,
+    gen_opt_routine,
+)
 from tests import config
 
 TEST_DIR = config.TESTDATA_DIR
@@ -150,3 +156,324 @@ def test_t_matrix_opt_params_exp():
         store_snapshot(get_snapshot_name(), args)
     else:
         assert compare_snapshots(args, read_snapshot(get_snapshot_name()))
+
+
+def test_t_matrix_opt_params_prepared():
+    # The prepared functions used in the optimisation give the same results as the plain functions
+    x_data_petec = np.stack(
+        (
+            phi,
+            k_min,
+            mu_min,
+            rho_min,
+            k_fl_orig,
+            rho_fl_orig,
+            angle,
+            perm,
+            visco,
+            tau,
+            freq,
+            def_vp_vs_ratio,
+        ),
+        axis=1,
+    )
+    x_data_exp = np.stack(
+        (
+            phi,
+            vsh,
+            k_fl_orig,
+            rho_fl_orig,
+            angle,
+            perm,
+            visco,
+            tau,
+            freq,
+            def_vp_vs_ratio,
+        ),
+        axis=1,
+    )
+    prepared_petec = PreparedCurveFit2InclusionSets(x_data_petec)
+    prepared_exp = PreparedCurveFitExp(x_data_exp)
+    for par in ([0.5, 0.5, 0.5, 0.2, 0.2], [0.3, 0.8, 0.9, 0.1, 0.6]):
+        first = prepared_petec(x_data_petec, *par)
+        np.testing.assert_array_equal(
+            first, curve_fit_2_inclusion_sets(x_data_petec, *par)
+        )
+        # Results are not overwritten by the next evaluation
+        prepared_petec(x_data_petec, 0.1, 0.1, 0.6, 0.05, 0.9)
+        np.testing.assert_array_equal(
+            first, curve_fit_2_inclusion_sets(x_data_petec, *par)
+        )
+    for par in (
+        [0.5, 0.5, 0.5, 0.30, 0.7, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+        [0.2, 0.7, 0.8, 0.1, 0.9, 0.8, 0.6, 0.9, 0.3, 0.4, 0.7],
+    ):
+        np.testing.assert_array_equal(
+            prepared_exp(x_data_exp, *par), curvefit_t_matrix_exp(x_data_exp, *par)
+        )
+    # Other inputs are passed on to the plain function
+    np.testing.assert_array_equal(
+        prepared_exp(x_data_exp[:10].copy(), *par),
+        curvefit_t_matrix_exp(x_data_exp[:10], *par),
+    )
+
+
+def test_optimisation_parallel_jacobian():
+    # The Jacobian evaluated in parallel gives the same optimisation result as the serial Jacobian in curve_fit
+    x = np.linspace(0, 1, 18)
+    y = poly_function(x, 0.25, 0.28, 0.98, 0.24, 0.46)
+    par_init = 0.5 * np.ones(5)
+    lower_bound = np.zeros(5)
+    upper_bound = np.ones(5)
+    ref_report = {}
+    ref = gen_opt_routine(
+        poly_function,
+        x,
+        y,
+        par_init,
+        lower_bound,
+        upper_bound,
+        fit_report=ref_report,
+    )
+    for jac_processes in (False, True):
+        report = {}
+        res = gen_opt_routine(
+            poly_function,
+            x,
+            y,
+            par_init,
+            lower_bound,
+            upper_bound,
+            jac_workers=2,
+            jac_processes=jac_processes,
+            fit_report=report,
+        )
+        for arr, arr_ref in zip(res, ref):
+            np.testing.assert_array_equal(arr, arr_ref)
+        # The function value at the parameters of the Jacobian is taken from the cache, not evaluated again
+        assert report["n_calls"] + report["jac_calls"] == ref_report["n_calls"]
+
+
+def _linear_function_limited(x, a, b):
+    # Linear function which is not defined for low values of a
+    if a < 1.42:
+        return np.full_like(x, np.nan)
+    return a + b * x
+
+
+def test_optimisation_percentile_search():
+    x = np.linspace(0, 1, 18)
+    y = _linear_function_limited(x, 1.5, 0.5)
+
+    def _bounds(percentile):
+        return np.array([percentile / 100.0, 0.0]), np.array([2.0, 1.0])
+
+    percentiles = [50, 75, 80, 90, 100]
+    # Percentiles with undefined function values at the start point are skipped
+    *res, percentile = gen_opt_percentile_routine(
+        _linear_function_limited, x, y, _bounds, percentiles
+    )
+    assert percentile == 90
+    ref = gen_opt_routine(
+        _linear_function_limited, x, y, np.array([1.45, 0.5]), *_bounds(90)
+    )
+    for arr, arr_ref in zip(res, ref):
+        np.testing.assert_array_equal(arr, arr_ref)
+
+    # The function value from the check of the start point is reused by the optimisation
+    calls = []
+
+    def _counting_function(x, a, b):
+        calls.append((a, b))
+        return _linear_function_limited(x, a, b)
+
+    gen_opt_percentile_routine(_counting_function, x, y, _bounds, percentiles)
+    assert calls.count((1.45, 0.5)) == 1
+
+    # Bisection continues from the valid optimum towards the lower percentile
+    *res, percentile = gen_opt_percentile_routine(
+        _linear_function_limited, x, y, _bounds, percentiles, bisect=True
+    )
+    assert 80 < percentile <= 81
+    np.testing.assert_allclose(res[2], [1.5, 0.5], rtol=1e-6)
+
+    with pytest.raises(ValueError, match="no valid optimisation"):
+        gen_opt_percentile_routine(_linear_function_limited, x, y, _bounds, [50, 75])
+
+
+def test_optimisation_subset():
+    # Optimisation on a subset of the samples followed by all samples finds the same parameters as all samples only
+    x = np.linspace(0, 1, 2000)
+    coeffs = np.array([0.25, 0.28, 0.98, 0.24, 0.46])
+    y = poly_function(x, *coeffs)
+    par_init = 0.5 * np.ones(5)
+    lower_bound = np.zeros(5)
+    upper_bound = np.ones(5)
+    ref = gen_opt_routine(poly_function, x, y, par_init, lower_bound, upper_bound)
+    report = {}
+    res = gen_opt_routine(
+        poly_function,
+        x,
+        y,
+        par_init,
+        lower_bound,
+        upper_bound,
+        subset_size=50,
+        fit_report=report,
+    )
+    np.testing.assert_allclose(ref[2], coeffs, atol=1e-4)
+    np.testing.assert_allclose(res[2], coeffs, atol=1e-4)
+    assert report["n_samples"] == 2000
+    assert report["subset_size"] <= 50
+    assert report["subset_rms"] < 1e-6
+    assert report["rms"] <= report["subset_rms"]
+
+
+def test_optimisation_report_counters():
+    # Repeated evaluations are taken from the cache, and the calls to the function are counted
+    x = np.linspace(0, 1, 200)
+    y = poly_function(x, 0.25, 0.28, 0.98, 0.24, 0.46)
+    calls = []
+
+    def _counted_function(x, *params):
+        calls.append(params)
+        return poly_function(x, *params)
+
+    par_init = 0.5 * np.ones(5)
+    lower_bound = np.zeros(5)
+    upper_bound = np.ones(5)
+    reports = []
+    for memo_size in (32, 0):
+        calls.clear()
+        report = {}
+        res = gen_opt_routine(
+            _counted_function,
+            x,
+            y,
+            par_init,
+            lower_bound,
+            upper_bound,
+            fit_report=report,
+            memo_size=memo_size,
+        )
+        assert report["n_calls"] == len(calls)
+        assert report["call_time"] <= report["total_time"]
+        reports.append((res, report))
+    (res, report), (res_no_cache, report_no_cache) = reports
+    # The final evaluation for the optimal parameters is found in the cache
+    assert report["cache_hits"] >= 1
+    assert report_no_cache["cache_hits"] == 0
+    assert report["n_calls"] + report["cache_hits"] == report_no_cache["n_calls"]
+    for arr, arr_ref in zip(res, res_no_cache):
+        np.testing.assert_array_equal(arr, arr_ref)
+
+
+def test_optimisation_surrogate():
+    # A first optimisation against an emulator gives the same parameters, and reports the emulator error
+    x = np.linspace(0, 1, 200)
+    coeffs = np.array([0.25, 0.28, 0.98, 0.24, 0.46])
+    y = poly_function(x, *coeffs)
+    par_init = 0.5 * np.ones(5)
+    lower_bound = np.zeros(5)
+    upper_bound = np.ones(5)
+    report = {}
+    res = gen_opt_routine(
+        poly_function,
+        x,
+        y,
+        par_init,
+        lower_bound,
+        upper_bound,
+        fit_report=report,
+        surrogate_samples=60,
+    )
+    np.testing.assert_allclose(res[2], coeffs, atol=1e-4)
+    assert report["surrogate_samples"] == 60
+    assert report["surrogate_params"].shape == (5,)
+    # The polynomial is linear in the parameters, and is reproduced by the emulator
+    assert report["surrogate_cv_rms"] < 1e-6
+    assert report["surrogate_rms"] < 1e-6
+    assert not report["surrogate_fallback"]
+
+    # The emulator optimum is where the function is not defined, the optimisation then starts from the best
+    # parameter set and finds the best valid parameters
+    x = np.linspace(0, 1, 50)
+    y = 1.2 + 0.5 * x
+    report = {}
+    res = gen_opt_routine(
+        _linear_function_limited,
+        x,
+        y,
+        np.array([2.0, 1.0]),
+        np.array([0.0, 0.0]),
+        np.array([3.0, 1.0]),
+        fit_report=report,
+        surrogate_samples=20,
+    )
+    assert report["surrogate_fallback"]
+    assert np.isnan(report["surrogate_rms"])
+    assert report["surrogate_params"][0] < 1.42
+    assert res[2][0] == pytest.approx(1.42, abs=1e-6)
+
+    with pytest.raises(ValueError, match="too few valid parameter sets"):
+        gen_opt_routine(
+            lambda x, *params: np.full_like(x, np.nan),
+            x,
+            y,
+            par_init,
+            lower_bound,
+            upper_bound,
+            surrogate_samples=20,
+        )
+
+
+def _wave_function(x, a, b):
+    # Function with local minima in the frequency a
+    return b * np.sin(a * x)
+
+
+def test_optimisation_multi_start():
+    # Several start points find the global optimum, where a single start point ends in a local minimum
+    x = np.linspace(0, 1, 100)
+    y = _wave_function(x, 13.0, 1.0)
+    par_init = np.array([3.0, 1.0])
+    lower_bound = np.array([0.0, 0.0])
+    upper_bound = np.array([20.0, 2.0])
+    res_single = gen_opt_routine(
+        _wave_function, x, y, par_init, lower_bound, upper_bound
+    )
+    assert abs(res_single[2][0] - 13.0) > 1.0
+    for start_workers in (None, 2):
+        report = {}
+        res = gen_opt_routine(
+            _wave_function,
+            x,
+            y,
+            par_init,
+            lower_bound,
+            upper_bound,
+            n_starts=8,
+            start_workers=start_workers,
+            fit_report=report,
+        )
+        np.testing.assert_allclose(res[2], [13.0, 1.0], rtol=1e-6)
+        assert report["rms"] == report["start_rms"].min()
+        assert report["start_params"].shape == (report["n_starts"], 2)
+        assert report["param_spread"].shape == (2,)
+        assert report["n_converged_starts"] >= 3
+        if start_workers is None:
+            # The remaining starts are skipped when three starts have found the best optimum
+            assert report["n_starts"] < 8
+            assert report["n_converged_starts"] == 3
+
+    with pytest.raises(ValueError, match="can not be combined"):
+        gen_opt_routine(
+            _wave_function,
+            x,
+            y,
+            par_init,
+            lower_bound,
+            upper_bound,
+            n_starts=8,
+            surrogate_samples=20,
+        )